@@ -0,0 +1,157 @@
+"""Замер скорости обработки сегментов при разбивке записи на аккорды.
+
+Строит синтетическую запись из нескольких затухающих аккордов с шумом между
+ними и повторяет шаги ChordRecorderTab.find_chords_robust, сравнивая прежний
+и новый способ: огибающую сверткой и скользящей суммой
+(chord_segmentation.smooth_envelope), поиск точки затухания циклом по
+семплам и векторный (chord_segmentation.find_fade_point). Границы участков
+и точки затухания обоих способов сверяются.
+
+    python benchmark_segmentation.py --chords 40 --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from chord_segmentation import ENVELOPE_WINDOW_SECONDS, FADE_SEARCH_SECONDS, find_fade_point, smooth_envelope
+
+
+def make_recording(chords, sample_rate, seed=0):
+    """Синтетическая запись: аккорды (110/165/220 Гц с затуханием) между паузами с шумом.
+
+    Возвращает (семплы int16, [(начало, конец) каждого аккорда в семплах]).
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    spans = []
+    position = 0
+    for _ in range(chords):
+        parts.append(rng.normal(0, 30, int(sample_rate * rng.uniform(0.8, 2.0))))
+        position += len(parts[-1])
+        duration = rng.uniform(2.0, 6.0)
+        t = np.arange(int(sample_rate * duration)) / sample_rate
+        tone = sum(np.sin(2 * np.pi * freq * t) for freq in (110, 165, 220))
+        parts.append(tone * np.exp(-t * rng.uniform(0.3, 1.5)) * rng.uniform(3000, 9000))
+        spans.append((position, position + len(t)))
+        position += len(t)
+    parts.append(rng.normal(0, 30, sample_rate))
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16), spans
+
+
+def envelope_convolve(normalized, window_size):
+    """Прежняя огибающая: свертка mode='same', O(N * window)"""
+    return np.convolve(normalized, np.ones(window_size) / window_size, mode='same')
+
+
+def find_boundaries(envelope, silence_thresh):
+    """Начала и концы участков выше порога тишины, как в find_chords_robust"""
+    changes = np.diff((envelope > 10 ** (silence_thresh / 20) * 100).astype(int))
+    starts = np.where(changes == 1)[0]
+    ends = np.where(changes == -1)[0]
+    if len(starts) and len(ends) and starts[0] > ends[0]:
+        ends = ends[1:]
+    if len(starts) > len(ends):
+        ends = np.append(ends, len(envelope))
+    return starts, ends
+
+
+def find_segments(envelope, starts, ends, sample_rate, min_chord_duration, min_amplitude):
+    """Участки звука, прошедшие проверки длительности и амплитуды, как в find_chords_robust"""
+    segments = []
+    for start_idx, end_idx in zip(starts, ends):
+        if (end_idx - start_idx) * 1000 / sample_rate < min_chord_duration:
+            continue
+        if np.max(envelope[start_idx:end_idx]) < min_amplitude:
+            continue
+        segments.append((start_idx, end_idx))
+    return segments
+
+
+def fade_points_loop(envelope, segments, threshold, sample_rate):
+    """Прежний способ: цикл назад по семплам последних 3 секунд"""
+    points = []
+    for start_idx, end_idx in segments:
+        segment_envelope = envelope[start_idx:end_idx]
+        fade_point = end_idx
+        for i in range(len(segment_envelope) - 1, max(0, len(segment_envelope) - int(3 * sample_rate)), -1):
+            if segment_envelope[i] > threshold:
+                fade_point = start_idx + i
+                break
+        points.append(fade_point)
+    return points
+
+
+def fade_points_vectorized(envelope, segments, threshold, sample_rate):
+    """Новый способ: обратный argmax по маске"""
+    search_length = int(FADE_SEARCH_SECONDS * sample_rate)
+    points = []
+    for start_idx, end_idx in segments:
+        fade_offset = find_fade_point(envelope[start_idx:end_idx], threshold, search_length)
+        points.append(end_idx if fade_offset is None else start_idx + fade_offset)
+    return points
+
+
+def measure(function, repeat, *args):
+    """Лучшее время из repeat запусков и результат"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Скорость огибающей и поиска точки затухания аккордов')
+    parser.add_argument('--chords', type=int, default=30, help='Количество аккордов в записи')
+    parser.add_argument('--sample-rate', type=int, default=44100, help='Частота дискретизации')
+    parser.add_argument('--silence-thresh', type=float, default=-45, help='Порог тишины, dB')
+    parser.add_argument('--min-duration', type=int, default=800, help='Мин. длительность аккорда, мс')
+    parser.add_argument('--min-amplitude', type=float, default=4.0, help='Мин. амплитуда, %%')
+    parser.add_argument('--fade-threshold', type=float, default=2.0, help='Порог затухания, %%')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов замера')
+    args = parser.parse_args(argv)
+
+    samples, _ = make_recording(args.chords, args.sample_rate)
+    normalized = np.abs(samples) / np.max(np.abs(samples)) * 100
+    window_size = max(1, int(ENVELOPE_WINDOW_SECONDS * args.sample_rate))
+    print(f"Запись: {len(samples) / args.sample_rate:.1f} сек")
+
+    # Огибающая: свертка против скользящей суммы, границы участков должны совпасть
+    convolve_time, convolve_envelope = measure(envelope_convolve, args.repeat, normalized, window_size)
+    cumsum_time, envelope = measure(smooth_envelope, args.repeat, normalized, window_size)
+    starts, ends = find_boundaries(envelope, args.silence_thresh)
+    convolve_starts, convolve_ends = find_boundaries(convolve_envelope, args.silence_thresh)
+    if not (np.array_equal(starts, convolve_starts) and np.array_equal(ends, convolve_ends)):
+        print("❌ Границы участков по огибающим не совпадают")
+        return 1
+
+    print(f"Огибающая, границ участков: {len(starts)}")
+    for name, elapsed in (("свертка", convolve_time), ("скользящая сумма", cumsum_time)):
+        print(f"{name:>16}: {elapsed * 1000:8.1f} мс, {len(samples) / elapsed / 1e6:10.1f} млн семплов/сек")
+    print(f"Ускорение: {convolve_time / cumsum_time:.1f}x, границы совпадают")
+
+    segments = find_segments(
+        envelope, starts, ends, args.sample_rate, args.min_duration, args.min_amplitude
+    )
+    print(f"Точка затухания, сегментов: {len(segments)}")
+    loop_time, loop_points = measure(
+        fade_points_loop, args.repeat, envelope, segments, args.fade_threshold, args.sample_rate
+    )
+    vector_time, vector_points = measure(
+        fade_points_vectorized, args.repeat, envelope, segments, args.fade_threshold, args.sample_rate
+    )
+    if loop_points != vector_points:
+        print("❌ Точки затухания не совпадают")
+        return 1
+
+    for name, elapsed in (("цикл по семплам", loop_time), ("векторный поиск", vector_time)):
+        print(f"{name:>16}: {elapsed * 1000:8.1f} мс, {len(segments) / elapsed:10.0f} сегментов/сек")
+    print(f"Ускорение: {loop_time / vector_time:.1f}x, точки затухания совпадают")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,78 +1,295 @@
-import pandas as pd
 import os
 import json
-from PyQt5.QtGui import QPixmap, QPainter, QBrush, QColor, QLinearGradient, QRadialGradient
+import math
+import pickle
+import threading
+import hashlib
+import logging
+from collections import OrderedDict, namedtuple
+from PyQt5.QtGui import QPixmap, QPainter, QBrush, QColor, QImage
 from PyQt5.QtCore import Qt
 
+from grafic_tools import element_model, style_registry
+
+# Трассировка разбора и отрисовки аккордов: по умолчанию выводятся только
+# предупреждения и ошибки, подробный вывод включается set_verbose_logging()
+logger = logging.getLogger(__name__)
+
+
+# Скомпилированный план отрисовки аккорда: область обрезки и неизменяемые элементы
+ChordRenderPlan = namedtuple('ChordRenderPlan', ['crop_rect', 'elements'])
+
+# Элемент аккорда: тип отрисовки, ключ в шаблоне и неизменяемые данные
+# (Fret, Note, OpenNote или Barre из grafic_tools.element_model)
+ChordElement = namedtuple('ChordElement', ['type', 'key', 'data'])
+
+
+# Трассировка, которую включает set_verbose_logging: разбор и отрисовка аккордов
+# и вкладка конфигурации аккордов
+VERBOSE_LOGGERS = (__name__, 'chord_config_tab')
+
+
+def set_verbose_logging(verbose=True):
+    """Включение (или выключение) подробной трассировки разбора и отрисовки аккордов в stderr"""
+    for name in VERBOSE_LOGGERS:
+        verbose_logger = logging.getLogger(name)
+        if not verbose:
+            verbose_logger.setLevel(logging.NOTSET)
+            continue
+
+        if not verbose_logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            verbose_logger.addHandler(handler)
+        verbose_logger.setLevel(logging.DEBUG)
+
+
+def override_element(element, **changes):
+    """Элемент с измененными полями данных (исходный элемент и шаблон не меняются)"""
+    return element._replace(data=element.data._replace(**changes))
+
+
+def element_to_json(element):
+    """Словарь JSON данных элемента аккорда (с типом, как в экспорте конфигурации)"""
+    data = element.data.to_json()
+    data['type'] = element.type
+    return data
+
 
 class ChordConfigManager:
+    # Соответствие колонок аккорда колонкам таблицы NOTE: (значение, элемент)
+    NOTE_COLUMN_MAPPING = {
+        'FNL': ('FNL', 'FNL_ELEM'),
+        'FN': ('FN', 'FN_ELEM'),
+        'FPOL': ('FPOL', 'FPOL_ELEM'),
+        'FPXL': ('FPXL', 'FPXL_ELEM'),
+        'FP1': ('FP1', 'FP1_ELEM'),
+        'FP2': ('FP2', 'FP2_ELEM'),
+        'FP3': ('FP3', 'FP3_ELEM'),
+        'FP4': ('FP4', 'FP4_ELEM')
+    }
+
+    # Соответствие римских цифр ладов обычным
+    ROMAN_TO_NUMERIC = {
+        'I': '1', 'II': '2', 'III': '3', 'IV': '4', 'V': '5',
+        'VI': '6', 'VII': '7', 'VIII': '8', 'IX': '9', 'X': '10',
+        'XI': '11', 'XII': '12', 'XIII': '13', 'XIV': '14', 'XV': '15',
+        'XVI': '16'
+    }
+
+    # Толщина обводки барре и нот (В ДВА РАЗА ТОЛЩЕ)
+    OUTLINE_WIDTHS = {
+        "none": 0,
+        "thin": 2,  # было 1, стало 2
+        "medium": 4,  # было 2, стало 4
+        "thick": 6  # было 3, стало 6
+    }
+
+    # Масштабы отображения (доля от размера области обрезки)
+    SCALE_TYPES = ["small1", "small2", "medium1", "medium2", "original"]
+    SCALE_FACTORS = {
+        "small2": 0.3,  # Маленький 2 - 30% от оригинального
+        "medium1": 0.5,  # Средний 1 - 50% от оригинального
+        "medium2": 0.7  # Средний 2 - 70% от оригинального
+    }
+
+    # Максимальное количество планов отрисовки в LRU кэше
+    RENDER_PLAN_CACHE_SIZE = 256
+
+    # Версия формата кэша конфигурации (увеличивать при изменении структуры данных)
+    CONFIG_CACHE_VERSION = 2
+
     def __init__(self):
         self.excel_path = os.path.join("templates2", "chord_config.xlsx")
         self.template_path = os.path.join("templates2", "template.json")
         self.image_path = os.path.join("templates2", "img.png")
+        self.cache_path = os.path.join("templates2", ".chord_config.cache")
         self.chord_data = {}
         self.ram_data = {}
         self.note_data = []  # Данные из листа NOTE
+        self.note_index = {}  # Индекс NOTE: колонка -> {нормализованный ключ -> элемент}
         self.templates = {}
+        self.template_geometry = None  # Колоночная геометрия элементов шаблонов
+        self._render_plan_cache = OrderedDict()  # LRU кэш планов отрисовки
+        self._file_hashes = {}  # Кэш хэшей файлов: путь -> (mtime, размер, хэш)
 
-    def load_config_data(self):
-        """Загрузка всех данных из Excel и JSON"""
-        try:
-            # Загружаем Excel файл
-            if os.path.exists(self.excel_path):
-                # Основной лист с аккордами
-                df_chords = pd.read_excel(self.excel_path, sheet_name='CHORDS')
-                print("=" * 80)
-                print("КОЛОНКИ В EXCEL CHORDS:", df_chords.columns.tolist())
-
-                # Конвертируем в словари
-                self.chord_data = df_chords.to_dict('records')
-                print(f"Загружено {len(self.chord_data)} аккордов")
-
-                # Загружаем данные RAM
-                df_ram = pd.read_excel(self.excel_path, sheet_name='RAM')
-                print("КОЛОНКИ В EXCEL RAM:", df_ram.columns.tolist())
-
-                # Сохраняем RAM данные для использования
-                self.ram_data = df_ram.to_dict('records')
-                print(f"Загружено {len(self.ram_data)} RAM конфигураций")
-
-                # Загружаем данные NOTE
-                try:
-                    df_note = pd.read_excel(self.excel_path, sheet_name='NOTE')
-                    print("КОЛОНКИ В EXCEL NOTE:", df_note.columns.tolist())
-                    print("ПЕРВЫЕ 5 СТРОК NOTE:")
-                    print(df_note.head())
-
-                    # Сохраняем NOTE данные для использования
-                    self.note_data = df_note.to_dict('records')
-                    print(f"Загружено {len(self.note_data)} NOTE конфигураций")
-                except Exception as e:
-                    print(f"⚠️ Лист NOTE не найден или ошибка загрузки: {e}")
-                    self.note_data = []
+    def load_config_data(self, use_cache=True):
+        """Загрузка всех данных из Excel и JSON (из кэша, если исходники не менялись)"""
+        # Планы отрисовки построены по старым данным - сбрасываем их
+        self.clear_render_plan_cache()
 
-            else:
-                print(f"Excel файл не найден: {self.excel_path}")
+        try:
+            if not os.path.exists(self.excel_path):
+                logger.error("Excel файл не найден: %s", self.excel_path)
                 return False
 
-            # Загружаем JSON шаблоны
-            if os.path.exists(self.template_path):
-                with open(self.template_path, 'r', encoding='utf-8') as f:
-                    self.templates = json.load(f)
-                print("JSON шаблоны загружены")
+            if not os.path.exists(self.template_path):
+                logger.error("JSON файл не найден: %s", self.template_path)
+                return False
 
+            if use_cache and self._load_config_cache():
+                logger.info("⚡ Конфигурация загружена из кэша: %d аккордов, %d RAM, %d NOTE",
+                            len(self.chord_data), len(self.ram_data), len(self.note_data))
             else:
-                print(f"JSON файл не найдена: {self.template_path}")
-                return False
+                self._parse_config_sources()
+                self._save_config_cache()
 
+            # Строим индекс таблицы NOTE один раз, чтобы поиск был O(1)
+            self.note_index = self._build_note_index()
+            self.template_geometry = None
+            self.get_template_geometry()
             return True
 
         except Exception as e:
-            print(f"Ошибка загрузки конфигурации: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Ошибка загрузки конфигурации: %s", e)
+            return False
+
+    def _parse_config_sources(self):
+        """Полный разбор Excel и JSON шаблонов"""
+        # Все листы читаем за один проход по книге
+        sheets = self._read_excel_sheets(['CHORDS', 'RAM', 'NOTE'])
+
+        # Основной лист с аккордами
+        chord_columns, self.chord_data = sheets['CHORDS']
+        logger.debug("КОЛОНКИ В EXCEL CHORDS: %s", chord_columns)
+        logger.info("Загружено %d аккордов", len(self.chord_data))
+
+        # Загружаем данные RAM
+        ram_columns, self.ram_data = sheets['RAM']
+        logger.debug("КОЛОНКИ В EXCEL RAM: %s", ram_columns)
+        logger.info("Загружено %d RAM конфигураций", len(self.ram_data))
+
+        # Загружаем данные NOTE
+        if 'NOTE' in sheets:
+            note_columns, self.note_data = sheets['NOTE']
+            logger.debug("КОЛОНКИ В EXCEL NOTE: %s", note_columns)
+            logger.debug("ПЕРВЫЕ 5 СТРОК NOTE: %s", self.note_data[:5])
+            logger.info("Загружено %d NOTE конфигураций", len(self.note_data))
+        else:
+            logger.warning("⚠️ Лист NOTE не найден в %s", self.excel_path)
+            self.note_data = []
+
+        # Загружаем JSON шаблоны
+        with open(self.template_path, 'r', encoding='utf-8') as f:
+            self.templates = self._build_template_elements(json.load(f))
+        logger.info("JSON шаблоны загружены")
+
+    def _build_template_elements(self, raw_templates):
+        """Перевод разделов шаблонов из JSON в элементы модели (невалидные баре отбрасываются)"""
+        templates = {}
+        for section, items in raw_templates.items():
+            if section not in element_model.SECTION_TYPES:
+                continue
+            if section == 'barres':
+                items = {key: data for key, data in items.items() if self.validate_barre_data(data)}
+            templates[section] = element_model.section_from_json(section, items)
+        return templates
+
+    def _get_source_signature(self, file_path):
+        """Подпись исходного файла для кэша: (mtime, размер, SHA-1)"""
+        stat = os.stat(file_path)
+        return stat.st_mtime, stat.st_size, self.get_file_hash(file_path)
+
+    def _is_source_unchanged(self, file_path, signature):
+        """Проверка, что исходный файл совпадает с записанным в кэше"""
+        if not signature:
+            return False
+        stat = os.stat(file_path)
+        cached_mtime, cached_size, cached_hash = signature
+        if stat.st_size != cached_size:
+            return False
+        if stat.st_mtime == cached_mtime:
+            return True
+        # mtime изменился (например, файл пересохранили) - сверяем содержимое
+        return self.get_file_hash(file_path) == cached_hash
+
+    def _load_config_cache(self):
+        """Загрузка разобранной конфигурации из кэша. True, если кэш актуален"""
+        if not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            logger.warning("⚠️ Кэш конфигурации поврежден, выполняется полный разбор: %s", e)
+            return False
+
+        if not isinstance(cache, dict) or cache.get('version') != self.CONFIG_CACHE_VERSION:
             return False
 
+        sources = cache.get('sources', {})
+        if not (self._is_source_unchanged(self.excel_path, sources.get('excel')) and
+                self._is_source_unchanged(self.template_path, sources.get('template'))):
+            return False
+
+        self.chord_data = cache['chord_data']
+        self.ram_data = cache['ram_data']
+        self.note_data = cache['note_data']
+        self.templates = cache['templates']
+        return True
+
+    def _save_config_cache(self):
+        """Запись разобранной конфигурации в кэш (ошибки записи не критичны)"""
+        cache = {
+            'version': self.CONFIG_CACHE_VERSION,
+            'sources': {
+                'excel': self._get_source_signature(self.excel_path),
+                'template': self._get_source_signature(self.template_path),
+            },
+            'chord_data': self.chord_data,
+            'ram_data': self.ram_data,
+            'note_data': self.note_data,
+            'templates': self.templates,
+        }
+
+        # Уникальное имя временного файла: кэш могут записывать несколько загрузок одновременно
+        temp_path = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("⚠️ Не удалось сохранить кэш конфигурации: %s", e)
+            # Недописанный временный файл не оставляем (его может уже не быть)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _read_excel_sheets(self, sheet_names):
+        """Чтение листов Excel за одно открытие книги (openpyxl, только чтение, значения формул).
+
+        Возвращает {лист: (колонки, строки)}, где строка - словарь колонка -> значение
+        (int, float, str или None для пустой ячейки). Пустые строки пропускаются.
+        Обязательные листы CHORDS и RAM должны присутствовать.
+        """
+        # openpyxl нужен только при полном разборе (при актуальном кэше не загружается)
+        import openpyxl
+        workbook = openpyxl.load_workbook(self.excel_path, read_only=True, data_only=True)
+        try:
+            sheets = {}
+            for sheet_name in sheet_names:
+                if sheet_name not in workbook.sheetnames:
+                    if sheet_name in ('CHORDS', 'RAM'):
+                        raise KeyError(f"Лист {sheet_name} не найден в {self.excel_path}")
+                    continue
+
+                rows = workbook[sheet_name].iter_rows(values_only=True)
+                headers = next(rows, None) or ()
+                columns = [(index, str(header)) for index, header in enumerate(headers) if header is not None]
+
+                records = []
+                for row in rows:
+                    record = {name: row[index] if index < len(row) else None for index, name in columns}
+                    if any(value is not None for value in record.values()):
+                        records.append(record)
+
+                sheets[sheet_name] = ([name for _, name in columns], records)
+            return sheets
+        finally:
+            workbook.close()
+
     def get_chord_groups(self):
         """Получение списка групп аккордов"""
         groups = set()
@@ -107,25 +324,20 @@ class ChordConfigManager:
     def get_ram_crop_area(self, ram_name):
         """Получение области обрезки из RAM в JSON"""
         if not ram_name or self._is_empty_value(ram_name):
-            print(f"RAM '{ram_name}' пустой или не найден")
+            logger.debug("RAM '%s' пустой или не найден", ram_name)
             return None
 
         ram_name = str(ram_name).strip()
-        print(f"🔍 Поиск области обрезки для RAM: '{ram_name}'")
+        logger.debug("🔍 Поиск области обрезки для RAM: '%s'", ram_name)
 
         # Ищем RAM в разделе crop_rects
         if 'crop_rects' in self.templates and ram_name in self.templates['crop_rects']:
-            crop_data = self.templates['crop_rects'][ram_name]
-            area = (
-                crop_data.get('x', 0),
-                crop_data.get('y', 0),
-                crop_data.get('width', 100),
-                crop_data.get('height', 100)
-            )
-            print(f"✅ Найдена область обрезки '{ram_name}': {area}")
+            crop = self.templates['crop_rects'][ram_name]
+            area = (crop.x, crop.y, crop.width, crop.height)
+            logger.debug("✅ Найдена область обрезки '%s': %s", ram_name, area)
             return area
 
-        print(f"❌ Область обрезки для '{ram_name}' не найдена в JSON")
+        logger.debug("❌ Область обрезки для '%s' не найдена в JSON", ram_name)
         return None
 
     def get_ram_lad_value(self, ram_name):
@@ -134,17 +346,17 @@ class ChordConfigManager:
             return None
 
         ram_name = str(ram_name).strip()
-        print(f"🔍 Поиск LAD для RAM: '{ram_name}'")
+        logger.debug("🔍 Поиск LAD для RAM: '%s'", ram_name)
 
         # Ищем RAM в таблице RAM
         for ram_item in self.ram_data:
             item_ram = ram_item.get('RAM')
             if item_ram and str(item_ram).strip() == ram_name:
                 lad_value = ram_item.get('LAD')
-                print(f"✅ Найден LAD для RAM '{ram_name}': '{lad_value}'")
+                logger.debug("✅ Найден LAD для RAM '%s': '%s'", ram_name, lad_value)
                 return lad_value
 
-        print(f"❌ RAM '{ram_name}' не найден в таблице RAM")
+        logger.debug("❌ RAM '%s' не найден в таблице RAM", ram_name)
         return None
 
     def get_ram_elements(self, ram_name):
@@ -157,27 +369,13 @@ class ChordConfigManager:
 
         # Ищем элементы RAM в frets
         if ram_name in self.templates.get('frets', {}):
-            element_data = self.templates['frets'][ram_name]
-            element_data['_key'] = ram_name
-            element_data['type'] = 'fret'  # Явно указываем тип
-
-            elements.append({
-                'type': 'fret',
-                'data': element_data
-            })
+            elements.append(ChordElement('fret', ram_name, self.templates['frets'][ram_name]))
 
         # Ищем элементы с суффиксами (RAM1, RAM2 и т.д.)
         for i in range(1, 5):
             element_key = f"{ram_name}{i}"
             if element_key in self.templates.get('frets', {}):
-                element_data = self.templates['frets'][element_key]
-                element_data['_key'] = element_key
-                element_data['type'] = 'fret'  # Явно указываем тип
-
-                elements.append({
-                    'type': 'fret',
-                    'data': element_data
-                })
+                elements.append(ChordElement('fret', element_key, self.templates['frets'][element_key]))
 
         return elements
 
@@ -189,7 +387,7 @@ class ChordConfigManager:
             return elements
 
         lad_value = str(lad_value).strip()
-        print(f"🔍 Поиск элементов для LAD: '{lad_value}'")
+        logger.debug("🔍 Поиск элементов для LAD: '%s'", lad_value)
 
         # Разделяем значения по запятой
         lad_keys = [key.strip() for key in lad_value.split(',')]
@@ -198,31 +396,41 @@ class ChordConfigManager:
             # Формируем ключ для поиска в JSON (добавляем LAD)
             json_key = f"{lad_key}LAD"
             if json_key in self.templates.get('frets', {}):
-                element_data = self.templates['frets'][json_key]
-                element_data['_key'] = json_key
-                element_data['type'] = 'fret'  # Явно указываем тип
-
-                elements.append({
-                    'type': 'fret',
-                    'data': element_data
-                })
-                print(f"✅ Найден элемент лада: {json_key}")
+                elements.append(ChordElement('fret', json_key, self.templates['frets'][json_key]))
+                logger.debug("✅ Найден элемент лада: %s", json_key)
             else:
-                print(f"❌ Элемент лада не найден в JSON: {json_key}")
+                logger.debug("❌ Элемент лада не найден в JSON: %s", json_key)
 
-        print(f"📊 Найдено {len(elements)} элементов LAD")
+        logger.debug("📊 Найдено %d элементов LAD", len(elements))
         return elements
 
     def _is_empty_value(self, value):
         """Проверка на пустое значение"""
         if value is None:
             return True
-        if isinstance(value, float) and pd.isna(value):
+        if isinstance(value, float) and math.isnan(value):
             return True
         if isinstance(value, str) and value.strip() == '':
             return True
         return False
 
+    def get_template_geometry(self):
+        """Колоночная геометрия элементов шаблонов (строится по требованию)"""
+        if self.template_geometry is None:
+            # NumPy загружается вместе с конфигурацией, а не при запуске приложения
+            from grafic_tools.element_geometry import TemplateGeometry
+            self.template_geometry = TemplateGeometry(self.templates)
+        return self.template_geometry
+
+    def find_elements_outside_crop(self, plan):
+        """Ключи элементов аккорда, выходящих за область обрезки (одна проверка на весь аккорд)"""
+        if not plan.crop_rect or not plan.elements:
+            return []
+
+        geometry = self.get_template_geometry()
+        outside = geometry.outside(geometry.element_rows(plan.elements), plan.crop_rect)
+        return [element.key for element, is_outside in zip(plan.elements, outside) if is_outside]
+
     def validate_barre_data(self, barre_data):
         """Проверка и валидация данных баре"""
         if not barre_data:
@@ -232,7 +440,7 @@ class ChordConfigManager:
         required_fields = ['x', 'y', 'width', 'height']
         for field in required_fields:
             if field not in barre_data:
-                print(f"❌ Отсутствует поле {field} в данных баре")
+                logger.warning("❌ Отсутствует поле %s в данных баре", field)
                 return False
 
         return True
@@ -245,27 +453,16 @@ class ChordConfigManager:
             return elements
 
         bar_str = str(bar_value).strip()
-        print(f"🔍 Поиск баре: '{bar_str}'")
+        logger.debug("🔍 Поиск баре: '%s'", bar_str)
 
         # Ищем баре в разделе barres
         if bar_str in self.templates.get('barres', {}):
-            barre_data = self.templates['barres'][bar_str]
-
-            # Добавляем ключ для идентификации типа
-            barre_data['_key'] = bar_str
-            barre_data['type'] = 'barre'
-
-            # Валидируем данные баре
-            if self.validate_barre_data(barre_data):
-                elements.append({
-                    'type': 'barre',
-                    'data': barre_data
-                })
-                print(f"✅ Найден баре: {bar_str} - {barre_data.get('width', 0)}x{barre_data.get('height', 0)}")
-            else:
-                print(f"❌ Невалидные данные баре: {bar_str}")
+            # Невалидные баре отброшены при загрузке шаблонов
+            barre = self.templates['barres'][bar_str]
+            elements.append(ChordElement('barre', bar_str, barre))
+            logger.debug("✅ Найден баре: %s - %sx%s", bar_str, barre.width, barre.height)
         else:
-            print(f"❌ Баре не найден: {bar_str}")
+            logger.debug("❌ Баре не найден: %s", bar_str)
 
         return elements
 
@@ -283,20 +480,20 @@ class ChordConfigManager:
         # Например: "21.25" может быть "21,25" в Excel
         note_list = self._parse_note_values(note_str)
 
-        print(f"🔍 Поиск элементов для колонки '{column_name}': {note_list}")
+        logger.debug("🔍 Поиск элементов для колонки '%s': %s", column_name, note_list)
 
         for note_key in note_list:
-            print(f"  🔎 Обработка значения: '{note_key}'")
+            logger.debug("  🔎 Обработка значения: '%s'", note_key)
 
             # Ищем в таблице NOTE
             element_found = self._find_element_in_note_table(note_key, column_name)
             if element_found:
                 elements.append(element_found)
-                print(f"  ✅ Найден элемент для '{note_key}': {element_found['type']}")
+                logger.debug("  ✅ Найден элемент для '%s': %s", note_key, element_found.type)
             else:
-                print(f"  ❌ Элемент не найден в таблице NOTE для '{note_key}'")
+                logger.debug("  ❌ Элемент не найден в таблице NOTE для '%s'", note_key)
 
-        print(f"📝 Найдено {len(elements)} элементов для колонки '{column_name}'")
+        logger.debug("📝 Найдено %d элементов для колонки '%s'", len(elements), column_name)
         return elements
 
     def _parse_note_values(self, note_str):
@@ -345,154 +542,124 @@ class ChordConfigManager:
         else:
             return str(value)
 
+    def _normalize_note_key(self, value):
+        """Нормализованный ключ значения NOTE: числа сравниваются по значению, '.' и ',' эквивалентны"""
+        value_str = str(value).strip()
+        try:
+            return round(float(value_str.replace(',', '.')), 3)
+        except ValueError:
+            return value_str.replace('.', ',')
+
+    def _build_note_index(self):
+        """Построение индекса таблицы NOTE: колонка -> {нормализованный ключ -> ключ элемента}"""
+        note_index = {}
+        for column_name, (source_col, elem_col) in self.NOTE_COLUMN_MAPPING.items():
+            column_index = {}
+            for note_item in self.note_data:
+                item_value = note_item.get(source_col)
+                if not item_value or self._is_empty_value(item_value):
+                    continue
+
+                elem_value = note_item.get(elem_col)
+                if not elem_value or self._is_empty_value(elem_value):
+                    continue
+
+                # Первое совпадение в таблице имеет приоритет, как при линейном поиске
+                key = self._normalize_note_key(self._convert_value_to_string(item_value))
+                column_index.setdefault(key, self._convert_value_to_string(elem_value))
+            note_index[column_name] = column_index
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Построен индекс NOTE: %d ключей", sum(len(v) for v in note_index.values()))
+        return note_index
+
     def _find_element_in_note_table(self, note_key, column_name):
         """Поиск элемента в таблице NOTE по ключу и колонке"""
         if not self.note_data:
-            print(f"  ⚠️ Таблица NOTE не загружена, поиск напрямую в JSON")
+            logger.debug("  ⚠️ Таблица NOTE не загружена, поиск напрямую в JSON")
             return self._find_element_in_json(note_key)
 
-        # Определяем соответствие колонок
-        column_mapping = {
-            'FNL': ('FNL', 'FNL_ELEM'),
-            'FN': ('FN', 'FN_ELEM'),
-            'FPOL': ('FPOL', 'FPOL_ELEM'),
-            'FPXL': ('FPXL', 'FPXL_ELEM'),
-            'FP1': ('FP1', 'FP1_ELEM'),
-            'FP2': ('FP2', 'FP2_ELEM'),
-            'FP3': ('FP3', 'FP3_ELEM'),
-            'FP4': ('FP4', 'FP4_ELEM')
-        }
-
-        if column_name not in column_mapping:
-            print(f"  ❌ Неизвестная колонка: {column_name}")
+        if column_name not in self.NOTE_COLUMN_MAPPING:
+            logger.warning("  ❌ Неизвестная колонка: %s", column_name)
             return None
 
-        source_col, elem_col = column_mapping[column_name]
+        column_index = self.note_index.get(column_name)
+        if column_index is None:
+            # Данные NOTE заданы без load_config_data - строим индекс по требованию
+            self.note_index = self._build_note_index()
+            column_index = self.note_index[column_name]
 
-        # Ищем в таблице NOTE
-        for note_item in self.note_data:
-            item_value = note_item.get(source_col)
-            if item_value and not self._is_empty_value(item_value):
-                # Конвертируем значение из таблицы для сравнения
-                item_value_str = self._convert_value_to_string(item_value)
+        elem_key = column_index.get(self._normalize_note_key(note_key))
+        if elem_key is not None:
+            logger.debug("  ✅ Найден элемент в NOTE: %s -> %s", note_key, elem_key)
+            return self._find_element_in_json(elem_key)
 
-                # Пробуем разные варианты сравнения
-                if self._values_match(item_value_str, note_key):
-                    elem_value = note_item.get(elem_col)
-                    if elem_value and not self._is_empty_value(elem_value):
-                        elem_key = self._convert_value_to_string(elem_value)
-                        print(f"  ✅ Найден элемент в NOTE: {note_key} -> {elem_key}")
-                        return self._find_element_in_json(elem_key)
-
-        print(f"  ❌ Не найдено соответствие в NOTE для '{note_key}' в колонке '{source_col}'")
+        logger.debug("  ❌ Не найдено соответствие в NOTE для '%s' в колонке '%s'",
+                     note_key, self.NOTE_COLUMN_MAPPING[column_name][0])
         return None
 
-    def _values_match(self, value1, value2):
-        """Проверяет, совпадают ли значения с учетом специальных случаев"""
-        # Прямое сравнение
-        if str(value1).strip() == str(value2).strip():
-            return True
-
-        # Если одно значение с точкой, а другое с запятой
-        v1_clean = str(value1).replace('.', ',').strip()
-        v2_clean = str(value2).replace('.', ',').strip()
-        if v1_clean == v2_clean:
-            return True
-
-        # Если одно значение целое, а другое дробное с .0
-        try:
-            v1_float = float(value1)
-            v2_float = float(value2)
-            if abs(v1_float - v2_float) < 0.001:  # Сравнение с небольшой погрешностью
-                return True
-        except (ValueError, TypeError):
-            pass
-
-        return False
-
     def _find_element_in_json(self, element_key):
         """Поиск элемента в различных разделах JSON"""
         element_key = element_key.strip()
 
         # Ищем в notes
         if element_key in self.templates.get('notes', {}):
-            element_data = self.templates['notes'][element_key]
-            # Добавляем ключ для отладки
-            element_data['_key'] = element_key
-            element_data['type'] = 'note'  # Явно указываем тип
-            print(f"    ✅ Найден элемент ноты: {element_key} (стиль: {element_data.get('style', 'default')})")
-            return {
-                'type': 'note',
-                'data': element_data
-            }
+            note = self.templates['notes'][element_key]
+            logger.debug("    ✅ Найден элемент ноты: %s (стиль: %s)", element_key, note.style)
+            return ChordElement('note', element_key, note)
 
         # Ищем в open_notes
         if element_key in self.templates.get('open_notes', {}):
-            element_data = self.templates['open_notes'][element_key]
-            element_data['_key'] = element_key
-            element_data['type'] = 'note'  # Явно указываем тип
-            print(f"    ✅ Найден элемент открытой ноты: {element_key} (стиль: {element_data.get('style', 'default')})")
-            return {
-                'type': 'note',
-                'data': element_data
-            }
+            open_note = self.templates['open_notes'][element_key]
+            logger.debug("    ✅ Найден элемент открытой ноты: %s (стиль: %s)", element_key, open_note.style)
+            return ChordElement('note', element_key, open_note)
 
         # Ищем в frets (лады)
         if element_key in self.templates.get('frets', {}):
-            element_data = self.templates['frets'][element_key]
-            element_data['_key'] = element_key
-            element_data['type'] = 'fret'  # Явно указываем тип
-            print(f"    ✅ Найден элемент лада: {element_key}")
-            return {
-                'type': 'fret',
-                'data': element_data
-            }
-
-        print(f"    ❌ Элемент не найден в JSON: {element_key}")
+            logger.debug("    ✅ Найден элемент лада: %s", element_key)
+            return ChordElement('fret', element_key, self.templates['frets'][element_key])
+
+        logger.debug("    ❌ Элемент не найден в JSON: %s", element_key)
         return None
 
     def get_chord_elements(self, chord_config, display_type):
         """Получение элементов аккорда в зависимости от типа отображения"""
         elements = []
 
-        print(f"🎵 Получение элементов для аккорда:")
-        print(f"   RAM: {chord_config.get('RAM')}")
-        print(f"   BAR: {chord_config.get('BAR')}")
-        print(f"   FNL: {chord_config.get('FNL')} (тип: {type(chord_config.get('FNL'))})")
-        print(f"   FN: {chord_config.get('FN')} (тип: {type(chord_config.get('FN'))})")
-        print(f"   FPOL: {chord_config.get('FPOL')} (тип: {type(chord_config.get('FPOL'))})")
-        print(f"   FPXL: {chord_config.get('FPXL')} (тип: {type(chord_config.get('FPXL'))})")
-        print(f"   FP1: {chord_config.get('FP1')} (тип: {type(chord_config.get('FP1'))})")
-        print(f"   FP2: {chord_config.get('FP2')} (тип: {type(chord_config.get('FP2'))})")
-        print(f"   FP3: {chord_config.get('FP3')} (тип: {type(chord_config.get('FP3'))})")
-        print(f"   FP4: {chord_config.get('FP4')} (тип: {type(chord_config.get('FP4'))})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🎵 Получение элементов для аккорда:")
+            logger.debug("   RAM: %s", chord_config.get('RAM'))
+            logger.debug("   BAR: %s", chord_config.get('BAR'))
+            for column in ('FNL', 'FN', 'FPOL', 'FPXL', 'FP1', 'FP2', 'FP3', 'FP4'):
+                value = chord_config.get(column)
+                logger.debug("   %s: %s (тип: %s)", column, value, type(value))
 
         # Получаем значение LAD из таблицы RAM на основе RAM аккорда
         ram_key = chord_config.get('RAM')
         lad_value = None
         if ram_key:
             lad_value = self.get_ram_lad_value(ram_key)
-            print(f"   LAD (из таблицы RAM): {lad_value}")
+            logger.debug("   LAD (из таблицы RAM): %s", lad_value)
 
         # Добавляем RAM элементы из колонки RAM (для обрезки)
         if ram_key:
             ram_elements = self.get_ram_elements(ram_key)
             elements.extend(ram_elements)
-            print(f"🔧 Добавлено {len(ram_elements)} элементов RAM")
+            logger.debug("🔧 Добавлено %d элементов RAM", len(ram_elements))
 
         # Добавляем LAD элементы на основе значения из таблицы RAM
         if lad_value:
             lad_elements = self.get_ram_elements_from_lad(lad_value)
             elements.extend(lad_elements)
-            print(f"🎯 Добавлено {len(lad_elements)} элементов LAD")
+            logger.debug("🎯 Добавлено %d элементов LAD", len(lad_elements))
 
         # Добавляем элементы баре ТОЛЬКО для режима пальцев
         if display_type == "fingers":
             bar_elements = self.get_barre_elements(chord_config.get('BAR'))
             elements.extend(bar_elements)
-            print(f"🎸 Добавлено {len(bar_elements)} элементов баре")
+            logger.debug("🎸 Добавлено %d элементов баре", len(bar_elements))
         else:
-            print("🎸 Баре пропущен (режим нот)")
+            logger.debug("🎸 Баре пропущен (режим нот)")
 
         if display_type == "notes":
             # Для нот: используем FNL и FN
@@ -501,7 +668,7 @@ class ChordConfigManager:
 
             elements.extend(fnl_elements)
             elements.extend(fn_elements)
-            print(f"🎵 Добавлено {len(fnl_elements) + len(fn_elements)} элементов нот")
+            logger.debug("🎵 Добавлено %d элементов нот", len(fnl_elements) + len(fn_elements))
 
         else:  # fingers
             # Для пальцев: используем FPOL, FPXL, FP1, FP2, FP3, FP4
@@ -518,323 +685,305 @@ class ChordConfigManager:
             elements.extend(fp2_elements)
             elements.extend(fp3_elements)
             elements.extend(fp4_elements)
-            print(
-                f"👆 Добавлено {len(fpol_elements) + len(fpxl_elements) + len(fp1_elements) + len(fp2_elements) + len(fp3_elements) + len(fp4_elements)} элементов пальцев")
+            logger.debug("👆 Добавлено %d элементов пальцев",
+                         len(fpol_elements) + len(fpxl_elements) + len(fp1_elements) +
+                         len(fp2_elements) + len(fp3_elements) + len(fp4_elements))
 
-        print(f"📊 ИТОГО элементов для отрисовки: {len(elements)}")
+        logger.debug("📊 ИТОГО элементов для отрисовки: %d", len(elements))
 
         return elements
 
-    def draw_elements_on_image(self, pixmap, elements, crop_rect=None):
-        """Рисование элементов на изображении БЕЗ масштабирования элементов"""
-        if pixmap.isNull():
-            return pixmap
-
-        result_pixmap = QPixmap(pixmap)
-        painter = QPainter(result_pixmap)
+    def get_render_plan(self, chord_config, display_type, fret_type="roman",
+                        barre_outline="none", note_outline="none"):
+        """Получение плана отрисовки аккорда из LRU кэша (или его построение)"""
+        cache_key = (
+            str(chord_config.get('CHORD')), str(chord_config.get('VARIANT')),
+            display_type, fret_type, barre_outline, note_outline
+        )
+
+        plan = self._render_plan_cache.get(cache_key)
+        if plan is not None:
+            self._render_plan_cache.move_to_end(cache_key)
+            return plan
+
+        plan = self._compile_render_plan(chord_config, display_type, fret_type, barre_outline, note_outline)
+        self._render_plan_cache[cache_key] = plan
+        if len(self._render_plan_cache) > self.RENDER_PLAN_CACHE_SIZE:
+            self._render_plan_cache.popitem(last=False)
+        return plan
+
+    def clear_render_plan_cache(self):
+        """Сброс кэша планов отрисовки"""
+        self._render_plan_cache.clear()
+
+    def _compile_render_plan(self, chord_config, display_type, fret_type, barre_outline, note_outline):
+        """Построение неизменяемого плана отрисовки аккорда"""
+        crop_rect = self.get_ram_crop_area(chord_config.get('RAM'))
+
+        elements = self.get_chord_elements(chord_config, display_type)
+        if fret_type == "numeric":
+            elements = self.convert_frets_to_numeric(elements)
+        elements = self.apply_outline_settings(elements, barre_outline, note_outline)
+
+        # Элементы неизменяемы, шаблоны при разборе не изменяются
+        plan = ChordRenderPlan(crop_rect, tuple(elements))
+
+        # Части таких элементов не попадут на изображение - ошибка в шаблонах или RAM
+        outside = self.find_elements_outside_crop(plan)
+        if outside:
+            logger.warning("⚠️ Элементы аккорда %s выходят за область обрезки RAM %s: %s",
+                           chord_config.get('CHORD'), chord_config.get('RAM'), ', '.join(map(str, outside)))
+        return plan
+
+    def get_file_hash(self, file_path):
+        """SHA-1 содержимого файла (пересчитывается только при изменении mtime или размера)"""
+        stat = os.stat(file_path)
+        cached = self._file_hashes.get(file_path)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        sha = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        file_hash = sha.hexdigest()
+        self._file_hashes[file_path] = (stat.st_mtime, stat.st_size, file_hash)
+        return file_hash
+
+    def get_base_image_hash(self):
+        """Хэш изображения грифа (пустая строка, если файла нет)"""
+        if not os.path.exists(self.image_path):
+            return ""
+        return self.get_file_hash(self.image_path)
+
+    def get_style_definitions_hash(self):
+        """Хэш кода, от которого зависят пиксели аккорда.
+
+        Реестр стилей, отрисовка элементов, шрифты, модель и геометрия
+        элементов и этот модуль (адаптация координат к области обрезки).
+        """
+        import drawing_elements
+        from grafic_tools import element_geometry, font_cache
+        sha = hashlib.sha1()
+        for module in (style_registry, drawing_elements, font_cache, element_model, element_geometry):
+            sha.update(self.get_file_hash(module.__file__).encode('ascii'))
+        sha.update(self.get_file_hash(__file__).encode('ascii'))
+        return sha.hexdigest()
+
+    def get_chord_content_hash(self, plan, *extra):
+        """Хэш входных данных аккорда: элементы, область обрезки и дополнительные параметры"""
+        payload = {
+            'crop_rect': plan.crop_rect,
+            'elements': [{'type': element.type, 'data': dict(element_to_json(element), _key=element.key)}
+                         for element in plan.elements],
+            'extra': extra
+        }
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+    def convert_frets_to_numeric(self, elements):
+        """Преобразование римских цифр ладов в обычные цифры"""
+        converted_elements = []
+        for element in elements:
+            if element.type == 'fret' and element.data.symbol in self.ROMAN_TO_NUMERIC:
+                original_symbol = element.data.symbol
+                # Преобразуем символ лада
+                element = override_element(element, symbol=self.ROMAN_TO_NUMERIC[original_symbol])
+                logger.debug("🎯 Преобразован лад: %s -> %s", original_symbol, element.data.symbol)
+
+            # Остальные элементы оставляем как есть
+            converted_elements.append(element)
+
+        return converted_elements
+
+    def apply_outline_settings(self, elements, barre_outline="none", note_outline="none"):
+        """Применение настроек обводки к элементам"""
+        barre_width = self.OUTLINE_WIDTHS.get(barre_outline, 0)
+        note_width = self.OUTLINE_WIDTHS.get(note_outline, 0)
+
+        modified_elements = []
+        for element in elements:
+            if element.type == 'barre' and barre_width > 0:
+                # Добавляем обводку к барре (черный цвет)
+                element = override_element(element, outline_width=barre_width, outline_color=(0, 0, 0))
+            elif element.type == 'note' and note_width > 0:
+                # Добавляем обводку к нотам (черный цвет)
+                element = override_element(element, outline_width=note_width, outline_color=(0, 0, 0))
+
+            # Для других элементов оставляем как есть
+            modified_elements.append(element)
+
+        return modified_elements
+
+    def get_scaled_size(self, width, height, scale_type):
+        """Размер изображения для выбранного масштаба (None - оригинальный размер)"""
+        if scale_type == "small1":
+            # МАЛЕНЬКИЙ 1 - ширина не больше 400
+            display_width = min(400, width)
+            return display_width, int(height * display_width / width)
+        if scale_type in self.SCALE_FACTORS:
+            factor = self.SCALE_FACTORS[scale_type]
+            return int(width * factor), int(height * factor)
+        return None
 
-        try:
-            for element in elements:
-                if element['type'] == 'fret':
-                    self.draw_fret(painter, element['data'], crop_rect)
-                elif element['type'] == 'note':
-                    self.draw_note(painter, element['data'], crop_rect)
-                elif element['type'] == 'barre':
-                    self.draw_barre(painter, element['data'], crop_rect)
+    def render_chord_image(self, base_image, plan, scale_type="original", fit_size=None):
+        """Отрисовка аккорда по плану в QImage без виджетов.
 
-        finally:
-            painter.end()
+        fit_size - размер области отображения: без обрезки "Маленький 1"
+        вписывается в нее (вкладка конфигурации), иначе - ширина до 400.
+        """
+        crop_rect = plan.crop_rect
 
-        return result_pixmap
+        if crop_rect:
+            crop_x, crop_y, crop_width, crop_height = crop_rect
 
-    def draw_elements_on_canvas(self, painter, elements, crop_rect):
-        """Рисование элементов на готовом QPainter с правильными координатами"""
-        try:
-            for element in elements:
-                if element['type'] == 'fret':
-                    self.draw_fret_on_canvas(painter, element['data'], crop_rect)
-                elif element['type'] == 'note':
-                    self.draw_note_on_canvas(painter, element['data'], crop_rect)
-                elif element['type'] == 'barre':
-                    self.draw_barre_on_canvas(painter, element['data'], crop_rect)
-        except Exception as e:
-            print(f"❌ Ошибка рисования элементов на canvas: {e}")
-            import traceback
-            traceback.print_exc()
+            # Проверяем границы и корректируем при необходимости
+            crop_x = max(0, min(crop_x, base_image.width() - 1))
+            crop_y = max(0, min(crop_y, base_image.height() - 1))
+            crop_width = max(1, min(crop_width, base_image.width() - crop_x))
+            crop_height = max(1, min(crop_height, base_image.height() - crop_y))
+            crop_rect = (crop_x, crop_y, crop_width, crop_height)
 
-    def draw_fret(self, painter, fret_data, crop_rect=None):
-        """Рисование лада с учетом обрезки"""
-        try:
-            # Адаптируем координаты к обрезанному изображению
-            adapted_data = self._adapt_coordinates_simple(fret_data, crop_rect)
-            symbol = adapted_data.get('symbol', '?')
-            print(f"🎨 Рисование лада: {symbol} на позиции ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)})")
+            result_image = QImage(crop_width, crop_height, QImage.Format_ARGB32_Premultiplied)
+            result_image.fill(Qt.white)  # Белый фон
 
-            from drawing_elements import DrawingElements
-            DrawingElements.draw_fret(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования лада: {e}")
+            painter = QPainter(result_image)
+            painter.drawImage(0, 0, base_image, crop_x, crop_y, crop_width, crop_height)
+        else:
+            # Если нет обрезки, рисуем на полном изображении
+            result_image = base_image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            painter = QPainter(result_image)
 
-    def draw_fret_on_canvas(self, painter, fret_data, crop_rect):
-        """Рисование лада на canvas с правильными координатами"""
         try:
-            # Адаптируем координаты к canvas
-            adapted_data = self._adapt_coordinates_for_canvas(fret_data, crop_rect)
-            symbol = adapted_data.get('symbol', '?')
-            print(
-                f"🎨 Рисование лада на canvas: {symbol} на позиции ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)})")
-
-            from drawing_elements import DrawingElements
-            DrawingElements.draw_fret(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования лада на canvas: {e}")
+            self.draw_elements_on_canvas(painter, plan.elements, crop_rect)
+        finally:
+            painter.end()
 
-    def draw_note(self, painter, note_data, crop_rect=None):
-        """Рисование ноты с учетом обрезки"""
-        try:
-            # Адаптируем координаты к обрезанному изображению
-            adapted_data = self._adapt_coordinates_simple(note_data, crop_rect)
+        if scale_type == "small1" and fit_size and not crop_rect:
+            scaled_size = fit_size
+        else:
+            scaled_size = self.get_scaled_size(result_image.width(), result_image.height(), scale_type)
+        if scaled_size:
+            result_image = result_image.scaled(
+                scaled_size[0],
+                scaled_size[1],
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
 
-            # Определяем тип отображаемого текста
-            display_text = adapted_data.get('display_text', 'finger')
-            if display_text == 'note_name':
-                symbol = adapted_data.get('note_name', '')
-            elif display_text == 'symbol':
-                symbol = adapted_data.get('symbol', '')
-            else:  # finger
-                symbol = adapted_data.get('finger', '1')
+        return result_image
 
-            print(f"🎵 Рисование ноты: {symbol} на позиции ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)}) "
-                  f"стиль: {adapted_data.get('style', 'default')}")
+    def draw_elements_on_image(self, pixmap, elements, crop_rect=None):
+        """Рисование элементов на изображении БЕЗ масштабирования элементов"""
+        if pixmap.isNull():
+            return pixmap
 
-            from drawing_elements import DrawingElements
-            DrawingElements.draw_note(painter, adapted_data)
-        except Exception as e:
-            print(f"Ошибка рисования ноты: {e}")
+        result_pixmap = QPixmap(pixmap)
+        painter = QPainter(result_pixmap)
 
-    def draw_note_on_canvas(self, painter, note_data, crop_rect):
-        """Рисование ноты на canvas с правильными координатами"""
         try:
-            # Адаптируем координаты к canvas
-            adapted_data = self._adapt_coordinates_for_canvas(note_data, crop_rect)
-
-            # Определяем тип отображаемого текста
-            display_text = adapted_data.get('display_text', 'finger')
-            if display_text == 'note_name':
-                symbol = adapted_data.get('note_name', '')
-            elif display_text == 'symbol':
-                symbol = adapted_data.get('symbol', '')
-            else:  # finger
-                symbol = adapted_data.get('finger', '1')
-
-            print(
-                f"🎵 Рисование ноты на canvas: {symbol} на позиции ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)}) "
-                f"стиль: {adapted_data.get('style', 'default')}")
-
             from drawing_elements import DrawingElements
-            DrawingElements.draw_note(painter, adapted_data)
-        except Exception as e:
-            print(f"Ошибка рисования ноты на canvas: {e}")
-
-    def draw_barre(self, painter, barre_data, crop_rect=None):
-        """Рисование баре с учетом обрезки - ПРОСТОЙ СДВИГ КООРДИНАТ"""
-        try:
-            # Адаптируем координаты к обрезанному изображению
-            adapted_data = self._adapt_coordinates_simple(barre_data, crop_rect)
+            for element in self.adapt_elements_simple(elements, crop_rect):
+                try:
+                    if element.type == 'fret':
+                        DrawingElements.draw_fret(painter, element.data)
+                    elif element.type == 'note':
+                        DrawingElements.draw_note(painter, element.data)
+                    elif element.type == 'barre':
+                        DrawingElements.draw_barre(painter, element.data)
+                except Exception as e:
+                    logger.error("❌ Ошибка рисования элемента %s: %s", element.key, e)
 
-            print(f"🎸 Рисование баре: позиция ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)}) "
-                  f"размер {adapted_data.get('width', 0)}x{adapted_data.get('height', 0)} "
-                  f"стиль {adapted_data.get('style', 'default')}")
+        finally:
+            painter.end()
 
-            from drawing_elements import DrawingElements
-            DrawingElements.draw_barre(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования баре: {e}")
-            import traceback
-            traceback.print_exc()
+        return result_pixmap
 
-    def draw_barre_on_canvas(self, painter, barre_data, crop_rect):
-        """Рисование баре на canvas с правильными координатами"""
+    def draw_elements_on_canvas(self, painter, elements, crop_rect):
+        """Рисование элементов на готовом QPainter с правильными координатами"""
         try:
-            # Адаптируем координаты к canvas
-            adapted_data = self._adapt_coordinates_for_canvas(barre_data, crop_rect)
-
-            print(f"🎸 Рисование баре на canvas: позиция ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)}) "
-                  f"размер {adapted_data.get('width', 0)}x{adapted_data.get('height', 0)} "
-                  f"радиус {adapted_data.get('radius', 0)}")
-
             from drawing_elements import DrawingElements
-            DrawingElements.draw_barre(painter, adapted_data)
+            # Координаты всех элементов адаптируются одним проходом
+            elements = self.adapt_elements_for_canvas(elements, crop_rect)
         except Exception as e:
-            print(f"❌ Ошибка рисования баре на canvas: {e}")
-            import traceback
-            traceback.print_exc()
-
-    def _adapt_coordinates_simple(self, element_data, crop_rect):
-        """Простая адаптация координат - только сдвиг без масштабирования"""
-        if not crop_rect:
-            return element_data.copy()
-
-        # Копируем данные элемента
-        adapted_data = element_data.copy()
-
-        # Получаем координаты обрезки
-        crop_x, crop_y, crop_width, crop_height = crop_rect
-
-        # Просто вычитаем координаты обрезки
-        if 'x' in adapted_data:
-            adapted_data['x'] = adapted_data['x'] - crop_x
-
-        if 'y' in adapted_data:
-            adapted_data['y'] = adapted_data['y'] - crop_y
-
-        # Преобразуем в целые числа для Qt
-        adapted_data['x'] = int(round(adapted_data.get('x', 0)))
-        adapted_data['y'] = int(round(adapted_data.get('y', 0)))
-
-        if 'width' in adapted_data:
-            adapted_data['width'] = int(round(adapted_data.get('width', 100)))
-        if 'height' in adapted_data:
-            adapted_data['height'] = int(round(adapted_data.get('height', 20)))
-        if 'radius' in adapted_data:
-            adapted_data['radius'] = int(round(adapted_data.get('radius', 10)))
-
-        return adapted_data
-
-    def _adapt_coordinates_for_canvas(self, element_data, crop_rect):
-        """Упрощенная адаптация координат для canvas - ВСЕ элементы одинаково"""
-        if not crop_rect:
-            return element_data.copy()
-
-        # Копируем данные элемента
-        adapted_data = element_data.copy()
-
-        # Получаем координаты обрезки
-        crop_x, crop_y, crop_width, crop_height = crop_rect
-
-        original_x = element_data.get('x', 0)
-        original_y = element_data.get('y', 0)
-
-        print(f"🎯 Адаптация {element_data.get('type', 'unknown')}:")
-        print(f"   Оригинальные координаты: ({original_x}, {original_y})")
-        print(f"   Область обрезки: ({crop_x}, {crop_y}, {crop_width}, {crop_height})")
-
-        # Для ВСЕХ элементов просто вычитаем координаты обрезки
-        if 'x' in adapted_data:
-            adapted_data['x'] = original_x - crop_x
-
-        if 'y' in adapted_data:
-            adapted_data['y'] = original_y - crop_y
-
-        # Преобразуем в целые числа для Qt
-        adapted_data['x'] = int(round(adapted_data.get('x', 0)))
-        adapted_data['y'] = int(round(adapted_data.get('y', 0)))
-
-        # Для баре - дополнительная коррекция координат (центр -> левый верхний угол)
-        if adapted_data.get('type') == 'barre':
-            barre_width = adapted_data.get('width', 100)
-            barre_height = adapted_data.get('height', 20)
-
-            if 'x' in adapted_data:
-                adapted_data['x'] = adapted_data['x'] - (barre_width // 2)
-            if 'y' in adapted_data:
-                adapted_data['y'] = adapted_data['y'] - (barre_height // 2)
-
-        print(f"   Финальные координаты: ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)})")
-
-        return adapted_data
+            logger.exception("❌ Ошибка адаптации элементов к canvas: %s", e)
+            return
+
+        for element in elements:
+            try:
+                if element.type == 'fret':
+                    DrawingElements.draw_fret(painter, element.data)
+                elif element.type == 'note':
+                    DrawingElements.draw_note(painter, element.data)
+                elif element.type == 'barre':
+                    DrawingElements.draw_barre(painter, element.data)
+            except Exception as e:
+                logger.error("❌ Ошибка рисования элемента %s на canvas: %s", element.key, e)
+
+    def get_adapted_geometry(self, elements, crop_rect, barre_corners=True):
+        """Координаты элементов аккорда относительно области обрезки (векторно, за один проход).
+
+        Возвращает целочисленные массивы x, y и строки геометрии элементов.
+        При barre_corners координаты баре переводятся из центра в левый верхний угол.
+        """
+        import numpy as np
+
+        geometry = self.get_template_geometry()
+        rows = geometry.element_rows(elements)
+        x, y = geometry.offset(rows, crop_rect)
+
+        if barre_corners:
+            # Для баре - коррекция координат (центр -> левый верхний угол)
+            is_barre = np.fromiter((element.type == 'barre' for element in elements),
+                                   dtype=bool, count=len(elements))
+            table = geometry.data[rows]
+            x = x - np.where(is_barre, table['width'] // 2, 0).astype(np.int64)
+            y = y - np.where(is_barre, table['height'] // 2, 0).astype(np.int64)
+
+        return x, y, geometry.data[rows]
+
+    def adapt_elements_for_canvas(self, elements, crop_rect):
+        """Адаптация всех элементов аккорда к canvas одним проходом.
+
+        Координаты сдвигаются на область обрезки, у баре - из центра в левый верхний угол.
+        """
+        if not crop_rect or not elements:
+            return list(elements)
+
+        x, y, _ = self.get_adapted_geometry(elements, crop_rect)
+        return [override_element(element, x=element_x, y=element_y)
+                for element, element_x, element_y in zip(elements, x.tolist(), y.tolist())]
+
+    def adapt_elements_simple(self, elements, crop_rect):
+        """Сдвиг всех элементов аккорда на область обрезки одним проходом.
+
+        Размеры и радиусы округляются до целых для Qt, баре остаются с координатами центра.
+        """
+        if not crop_rect or not elements:
+            return list(elements)
+
+        import numpy as np
+
+        x, y, table = self.get_adapted_geometry(elements, crop_rect, barre_corners=False)
+        width = np.rint(table['width']).astype(np.int64).tolist()
+        height = np.rint(table['height']).astype(np.int64).tolist()
+        radius = np.rint(table['radius']).astype(np.int64).tolist()
+
+        adapted = []
+        for i, element in enumerate(elements):
+            if element.type == 'fret':
+                element = override_element(element, x=x[i].item(), y=y[i].item())
+            elif element.type == 'barre':
+                element = override_element(element, x=x[i].item(), y=y[i].item(),
+                                           width=width[i], height=height[i], radius=radius[i])
+            else:
+                element = override_element(element, x=x[i].item(), y=y[i].item(), radius=radius[i])
+            adapted.append(element)
+        return adapted
 
     def get_brush_from_style(self, style_name, x=0, y=0, radius=0, width=0, height=0):
-        """Получение кисти на основе стиля с поддержкой градиентов"""
-        if style_name == "wood":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(210, 180, 140))
-            gradient.setColorAt(0.5, QColor(160, 120, 80))
-            gradient.setColorAt(1, QColor(210, 180, 140))
-            return QBrush(gradient)
-        elif style_name == "metal":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(200, 200, 200))
-            gradient.setColorAt(0.5, QColor(100, 100, 100))
-            gradient.setColorAt(1, QColor(200, 200, 200))
-            return QBrush(gradient)
-        elif style_name == "rubber":
-            gradient = QRadialGradient(x + width / 2, y + height / 2, max(width, height))
-            gradient.setColorAt(0, QColor(80, 80, 80))
-            gradient.setColorAt(1, QColor(40, 40, 40))
-            return QBrush(gradient)
-        elif style_name == "gradient":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(189, 183, 107))
-            lighter = QColor(189, 183, 107).lighter(150)
-            gradient.setColorAt(1, QColor(lighter.red(), lighter.green(), lighter.blue()))
-            return QBrush(gradient)
-        elif style_name == "striped":
-            return QBrush(QColor(189, 183, 107))
-
-        # НОВЫЕ ОРАНЖЕВЫЕ СТИЛИ ДЛЯ БАРЕ (ТАКИЕ ЖЕ КАК В drawing_elements.py)
-        elif style_name == "orange_gradient":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 200, 100))  # Светло-оранжевый
-            gradient.setColorAt(0.5, QColor(255, 140, 0))  # Оранжевый
-            gradient.setColorAt(1, QColor(255, 100, 0))  # Темно-оранжевый
-            return QBrush(gradient)
-        elif style_name == "orange_metal":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 220, 150))
-            gradient.setColorAt(0.3, QColor(255, 180, 80))
-            gradient.setColorAt(0.7, QColor(255, 140, 40))
-            gradient.setColorAt(1, QColor(255, 120, 20))
-            return QBrush(gradient)
-        elif style_name == "orange_glow":
-            gradient = QRadialGradient(x + width / 2, y + height / 2, max(width, height) * 0.8)
-            gradient.setColorAt(0, QColor(255, 230, 180))
-            gradient.setColorAt(0.5, QColor(255, 180, 80))
-            gradient.setColorAt(1, QColor(255, 140, 0))
-            return QBrush(gradient)
-        elif style_name == "dark_orange":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 150, 50))
-            gradient.setColorAt(0.5, QColor(255, 120, 0))
-            gradient.setColorAt(1, QColor(220, 100, 0))
-            return QBrush(gradient)
-        elif style_name == "orange_wood":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 200, 150))
-            gradient.setColorAt(0.3, QColor(255, 170, 100))
-            gradient.setColorAt(0.7, QColor(255, 140, 60))
-            gradient.setColorAt(1, QColor(255, 120, 40))
-            return QBrush(gradient)
-        elif style_name == "bright_orange":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 230, 100))
-            gradient.setColorAt(0.5, QColor(255, 200, 0))
-            gradient.setColorAt(1, QColor(255, 160, 0))
-            return QBrush(gradient)
-        elif style_name == "orange_red":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 180, 100))
-            gradient.setColorAt(0.5, QColor(255, 120, 0))
-            gradient.setColorAt(1, QColor(255, 80, 0))
-            return QBrush(gradient)
-        elif style_name == "orange_yellow":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 240, 150))
-            gradient.setColorAt(0.5, QColor(255, 200, 50))
-            gradient.setColorAt(1, QColor(255, 180, 0))
-            return QBrush(gradient)
-        elif style_name == "orange_brown":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 190, 130))
-            gradient.setColorAt(0.5, QColor(255, 150, 80))
-            gradient.setColorAt(1, QColor(210, 120, 60))
-            return QBrush(gradient)
-        elif style_name == "orange_pastel":
-            gradient = QLinearGradient(x, y, x + width, y + height)
-            gradient.setColorAt(0, QColor(255, 220, 180))
-            gradient.setColorAt(0.5, QColor(255, 190, 140))
-            gradient.setColorAt(1, QColor(255, 170, 120))
-            return QBrush(gradient)
-
-        # Стиль по умолчанию
-        return QBrush(QColor(189, 183, 107))  # Золотистый по умолчанию
\ No newline at end of file
+        """Получение кисти баре на основе стиля (общий реестр стилей)"""
+        brush = style_registry.get_brush(style_registry.CHORD_BARRE, style_name, x, y, width, height)
+        if brush is None:
+            return QBrush(QColor(*style_registry.DEFAULT_ELEMENT_COLOR))  # Золотистый по умолчанию
+        return brush
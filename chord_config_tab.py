@@ -1,16 +1,112 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QComboBox, QLabel, QScrollArea, QGridLayout,
-                             QGroupBox, QMessageBox, QSizePolicy, QFileDialog)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QPainter
+                             QGroupBox, QMessageBox, QSizePolicy, QFileDialog, QProgressBar,
+                             QApplication)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage
 import os
-import pandas as pd
 import json
-import openpyxl
+import logging
+from datetime import datetime
 import subprocess
 import sys
+from collections import OrderedDict
 
-from chord_config_manager import ChordConfigManager
+from chord_config_manager import ChordConfigManager, element_to_json
+
+logger = logging.getLogger(__name__)
+
+
+class PixmapCache:
+    """LRU кэш готовых (отмасштабированных) изображений аккордов с ограничением по памяти"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # ключ -> (pixmap, размер в байтах)
+
+    @staticmethod
+    def pixmap_bytes(pixmap):
+        """Оценка занимаемой изображением памяти"""
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def get(self, key):
+        """Получение изображения из кэша (None если нет)"""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def put(self, key, pixmap):
+        """Добавление изображения в кэш с вытеснением самых старых"""
+        size = self.pixmap_bytes(pixmap)
+        if size > self.max_bytes:
+            return
+
+        if key in self._items:
+            self.total_bytes -= self._items.pop(key)[1]
+
+        self._items[key] = (pixmap, size)
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            _, (_, old_size) = self._items.popitem(last=False)
+            self.total_bytes -= old_size
+
+    def clear(self):
+        """Очистка кэша (счетчики сохраняются)"""
+        self._items.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ConfigLoadWorker(QThread):
+    """Фоновая загрузка конфигурации аккордов (Excel, JSON и изображение грифа).
+
+    Строит новый ChordConfigManager, не трогая используемый вкладкой:
+    готовый снимок подменяется в GUI потоке целиком.
+    """
+
+    progress = pyqtSignal(int, int, str)  # поколение, процент, описание этапа
+    loaded = pyqtSignal(int, object, object)  # поколение, менеджер (None при ошибке), QImage грифа
+
+    def __init__(self, generation, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self._cancelled = False
+
+    def cancel(self):
+        """Отмена загрузки: результат не будет отправлен"""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        self.progress.emit(self.generation, 10, "Чтение конфигурации...")
+        config_manager = ChordConfigManager()
+        success = config_manager.load_config_data()
+        if self._cancelled:
+            return
+
+        # QPixmap нельзя создавать вне GUI потока - декодируем в QImage
+        image = None
+        if success and os.path.exists(config_manager.image_path):
+            self.progress.emit(self.generation, 70, "Загрузка изображения...")
+            image = QImage(config_manager.image_path)
+        if self._cancelled:
+            return
+
+        self.progress.emit(self.generation, 100, "Готово")
+        self.loaded.emit(self.generation, config_manager if success else None, image)
 
 
 class ChordConfigTab(QWidget):
@@ -26,8 +122,15 @@ class ChordConfigTab(QWidget):
         self.current_chords = []
         self.current_chord = None
         self.original_pixmap = None  # Сохраняем оригинальное изображение
+        self.original_image = None  # Оно же в QImage - для отрисовки аккордов
+        self.pixmap_cache = PixmapCache()  # Кэш готовых изображений аккордов
+        self.load_worker = None  # Поток фоновой загрузки конфигурации
+        self.load_generation = 0  # Номер последней запущенной загрузки
+        self.stale_workers = []  # Отмененные потоки, которые еще не завершились
+        self.pending_restore = None  # (группа, аккорд) для восстановления после обновления
 
         self.initUI()
+        QApplication.instance().aboutToQuit.connect(self.wait_for_loading)
         self.load_configuration()
 
     def initUI(self):
@@ -116,6 +219,12 @@ class ChordConfigTab(QWidget):
 
         layout.addLayout(top_layout)
 
+        # Индикатор фоновой загрузки конфигурации
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setVisible(False)
+        layout.addWidget(self.load_progress)
+
         # Область для изображения с прокруткой
         self.image_scroll = QScrollArea()
         self.image_scroll.setWidgetResizable(True)
@@ -145,7 +254,7 @@ class ChordConfigTab(QWidget):
             if not file_path:
                 return
 
-            print("💾 Сохранение конфигурации аккордов...")
+            logger.debug("💾 Сохранение конфигурации аккордов...")
 
             # Создаем структуру для сохранения
             config_data = {
@@ -157,7 +266,7 @@ class ChordConfigTab(QWidget):
                         "note_outline": self.current_note_outline,
                         "scale_type": "original"  # Всегда оригинальный масштаб
                     },
-                    "created_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "created_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 },
                 "chords": {}
             }
@@ -192,168 +301,282 @@ class ChordConfigTab(QWidget):
             # Добавляем информацию о группах
             config_data["groups"] = self.config_manager.get_chord_groups()
 
+            # Хэши аккордов прошлого экспорта в этот файл: неизменившиеся аккорды не пересобираем
+            manifest_path = self._get_export_manifest_path(file_path)
+            old_hashes, old_chords = self._load_previous_export(file_path, manifest_path)
+            run_inputs = (
+                self.config_manager.get_base_image_hash(),
+                self.config_manager.get_style_definitions_hash()
+            )
+
             # Собираем полную конфигурацию для каждого аккорда
             total_saved = 0
+            changed_count = 0
+            chord_hashes = {}
             for group in config_data["groups"]:
                 chords_in_group = self.config_manager.get_chords_by_group(group)
                 for chord_info in chords_in_group:
                     chord_name = chord_info['name']
 
-                    # Получаем элементы для обоих типов отображения
-                    elements_fingers = self.config_manager.get_chord_elements(
-                        chord_info['data'], "fingers"
-                    )
-                    elements_notes = self.config_manager.get_chord_elements(
-                        chord_info['data'], "notes"
+                    # Получаем планы (элементы и область обрезки) для обоих типов отображения
+                    plan_fingers = self.config_manager.get_render_plan(chord_info['data'], "fingers")
+                    plan_notes = self.config_manager.get_render_plan(chord_info['data'], "notes")
+
+                    display_settings = {
+                        "fret_type": self.current_fret_type,
+                        "barre_outline": self.current_barre_outline,
+                        "note_outline": self.current_note_outline
+                    }
+                    base_info = chords_info.get(chord_name, {})
+
+                    chord_hash = self.config_manager.get_chord_content_hash(
+                        plan_fingers,
+                        self.config_manager.get_chord_content_hash(plan_notes),
+                        group, base_info, display_settings, *run_inputs
                     )
+                    chord_hashes[chord_name] = chord_hash
+                    total_saved += 1
 
-                    # Получаем область обрезки
-                    ram_key = chord_info['data'].get('RAM')
-                    crop_rect = self.config_manager.get_ram_crop_area(ram_key)
+                    if old_hashes.get(chord_name) == chord_hash and chord_name in old_chords:
+                        # Входные данные не изменились - берем готовую запись
+                        config_data["chords"][chord_name] = old_chords[chord_name]
+                        continue
 
                     # Сохраняем конфигурацию аккорда
                     config_data["chords"][chord_name] = {
                         "group": group,
-                        "base_info": chords_info.get(chord_name, {}),
-                        "crop_rect": crop_rect,
-                        "elements_fingers": self._serialize_elements(elements_fingers),
-                        "elements_notes": self._serialize_elements(elements_notes),
-                        "display_settings": {
-                            "fret_type": self.current_fret_type,
-                            "barre_outline": self.current_barre_outline,
-                            "note_outline": self.current_note_outline
-                        }
+                        "base_info": base_info,
+                        "crop_rect": plan_fingers.crop_rect,
+                        "elements_fingers": self._serialize_elements(plan_fingers.elements),
+                        "elements_notes": self._serialize_elements(plan_notes.elements),
+                        "display_settings": display_settings
                     }
-                    total_saved += 1
+                    changed_count += 1
+
+            if changed_count == 0 and chord_hashes == old_hashes and os.path.exists(file_path):
+                QMessageBox.information(
+                    self,
+                    "Без изменений",
+                    f"Конфигурация аккордов не изменилась.\n"
+                    f"Файл {os.path.basename(file_path)} не перезаписан"
+                )
+                logger.info("✅ Конфигурация не изменилась: %s аккордов", total_saved)
+                return
 
             # Сохраняем в файл
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=2, ensure_ascii=False)
 
+            # Манифест с хэшами аккордов рядом с файлом конфигурации
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "chords": chord_hashes}, f, indent=2, ensure_ascii=False)
+
             QMessageBox.information(
                 self,
                 "Успех",
                 f"Конфигурация сохранена!\n"
-                f"Аккордов: {total_saved}\n"
+                f"Аккордов: {total_saved} (изменено: {changed_count})\n"
                 f"Файл: {os.path.basename(file_path)}"
             )
-            print(f"✅ Конфигурация сохранена: {total_saved} аккордов")
+            logger.info("✅ Конфигурация сохранена: %s аккордов, изменено %s", total_saved, changed_count)
 
         except Exception as e:
             error_msg = f"Ошибка при сохранении конфигурации: {str(e)}"
             QMessageBox.critical(self, "Ошибка", error_msg)
-            print(f"❌ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ %s", error_msg)
+
+    def _get_export_manifest_path(self, file_path):
+        """Путь к манифесту экспорта рядом с файлом конфигурации"""
+        return os.path.splitext(file_path)[0] + ".manifest.json"
+
+    def _load_previous_export(self, file_path, manifest_path):
+        """Загрузка хэшей и записей аккордов прошлого экспорта (пустые, если их нет)"""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                previous_config = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+
+        if manifest.get("version") != 1:
+            return {}, {}
+        return manifest.get("chords", {}), previous_config.get("chords", {})
 
     def _serialize_elements(self, elements):
         """Сериализация элементов для сохранения в JSON"""
         serialized = []
         for element in elements:
-            element_data = {
-                "type": element['type'],
-                "data": element['data'].copy()
-            }
-            # Убираем временные поля
-            if '_key' in element_data['data']:
-                del element_data['data']['_key']
-            serialized.append(element_data)
+            serialized.append({
+                "type": element.type,
+                "data": element_to_json(element)
+            })
         return serialized
 
-    def load_configuration(self):
-        """Загрузка конфигурации"""
-        if self.config_manager.load_config_data():
-            # Загружаем оригинальное изображение
-            if os.path.exists(self.config_manager.image_path):
-                self.original_pixmap = QPixmap(self.config_manager.image_path)
-                if not self.original_pixmap.isNull():
-                    # Показываем оригинальное изображение при запуске
-                    self.display_original_image()
-                else:
-                    self.image_label.setText("Ошибка загрузки изображения")
-            else:
-                self.image_label.setText(f"Изображение не найдено: {self.config_manager.image_path}")
+    def load_configuration(self, restore=None):
+        """Загрузка конфигурации в фоновом потоке (предыдущая загрузка отменяется)"""
+        if self.load_worker is not None and self.load_worker.isRunning():
+            self.load_worker.cancel()
+            self.stale_workers.append(self.load_worker)
+            logger.debug("⏹ Предыдущая загрузка конфигурации отменена")
+
+        self.load_generation += 1
+        self.pending_restore = restore
+        self.set_loading_state(True)
+
+        worker = ConfigLoadWorker(self.load_generation, self)
+        worker.progress.connect(self.on_load_progress)
+        worker.loaded.connect(self.on_configuration_loaded)
+        worker.finished.connect(lambda: self.on_load_worker_finished(worker))
+        self.load_worker = worker
+        worker.start()
+
+    def on_load_worker_finished(self, worker):
+        """Освобождение завершившегося потока загрузки"""
+        if worker in self.stale_workers:
+            self.stale_workers.remove(worker)
+        if worker is self.load_worker:
+            self.load_worker = None
+            if worker.is_cancelled():
+                self.set_loading_state(False)
+        worker.deleteLater()
+
+    def wait_for_loading(self):
+        """Ожидание потоков загрузки перед выходом из приложения"""
+        for worker in [self.load_worker] + self.stale_workers:
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+
+    def set_loading_state(self, loading):
+        """Блокировка кнопок и показ индикатора на время загрузки"""
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(loading)
+        # Обновление остается доступным: повторное нажатие отменяет текущую загрузку
+        for button in (self.refresh_colors_button, self.save_config_button):
+            button.setEnabled(not loading)
+
+    def on_load_progress(self, generation, value, message):
+        """Обновление индикатора загрузки"""
+        if generation != self.load_generation:
+            return
+        self.load_progress.setValue(value)
+        self.load_progress.setFormat(f"{message} %p%")
+        if self.original_pixmap is None:
+            self.image_label.setText(message)
 
-            # Заполняем комбобокс групп
-            groups = self.config_manager.get_chord_groups()
-            self.group_combo.clear()
-            self.group_combo.addItems(groups)
+    def on_configuration_loaded(self, generation, config_manager, image):
+        """Подмена конфигурации готовым снимком (в GUI потоке)"""
+        if generation != self.load_generation:
+            return  # Результат устаревшей загрузки
 
-            if groups:
-                self.current_group = groups[0]
-                self.load_chord_buttons()
+        self.set_loading_state(False)
+        restore, self.pending_restore = self.pending_restore, None
+
+        if config_manager is None:
+            if restore is not None:
+                QMessageBox.warning(self, "Ошибка", "Не удалось загрузить конфигурацию из Excel файла")
+                logger.error("❌ Ошибка обновления конфигурации")
             else:
-                self.image_label.setText("Группы аккордов не найдены")
-        else:
-            self.image_label.setText("Ошибка загрузки конфигурации. Проверьте файлы в папке templates2")
+                self.image_label.setText("Ошибка загрузки конфигурации. Проверьте файлы в папке templates2")
+            return
 
-    def refresh_configuration(self):
-        """Обновление конфигурации из Excel файла"""
         try:
-            print("🔄 Обновление конфигурации...")
-
-            # Сохраняем текущее состояние
-            current_group = self.current_group
-            current_chord = self.current_chord
-
-            # Перезагружаем данные
-            if self.config_manager.load_config_data():
-                # Перезагружаем изображение
-                if os.path.exists(self.config_manager.image_path):
-                    self.original_pixmap = QPixmap(self.config_manager.image_path)
-
-                # Обновляем комбобокс групп
-                groups = self.config_manager.get_chord_groups()
-                self.group_combo.clear()
-                self.group_combo.addItems(groups)
-
-                if groups:
-                    # Пытаемся восстановить предыдущее состояние
-                    if current_group in groups:
-                        self.current_group = current_group
-                        self.group_combo.setCurrentText(current_group)
-                    else:
-                        self.current_group = groups[0]
-                        self.group_combo.setCurrentText(groups[0])
-
-                    self.load_chord_buttons()
-
-                    # Пытаемся восстановить предыдущий аккорд
-
-                    if current_chord:
-                        chord_names = [chord['name'] for chord in self.current_chords]
-                        if current_chord['name'] in chord_names:
-                            # Находим и активируем кнопку нужного аккорда
-                            index = chord_names.index(current_chord['name'])
-                            self.current_chord = self.current_chords[index]
-                            self.display_chord(self.current_chord)
-                        else:
-                            # Показываем первый аккорд группы
-                            self.current_chord = self.current_chords[0]
-                            self.display_chord(self.current_chord)
-                    else:
-                        # Показываем первый аккорд группы
-                        self.current_chord = self.current_chords[0]
-                        self.display_chord(self.current_chord)
-                else:
-                    self.image_label.setText("Группы аккордов не найдены после обновления")
+            # Новый менеджер и изображение подменяются целиком, готовые изображения больше не актуальны
+            self.config_manager = config_manager
+            self.pixmap_cache.clear()
 
-                print("✅ Конфигурация обновлена успешно")
+            self.original_image = image
+            if image is not None:
+                self.original_pixmap = QPixmap.fromImage(image)
             else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось загрузить конфигурацию из Excel файла")
-                print("❌ Ошибка обновления конфигурации")
+                self.original_pixmap = None
+
+            if restore is not None:
+                self.apply_refreshed_configuration(*restore)
+            else:
+                self.apply_initial_configuration()
 
         except Exception as e:
             error_msg = f"Ошибка при обновлении конфигурации: {str(e)}"
             QMessageBox.critical(self, "Ошибка", error_msg)
-            print(f"❌ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ %s", error_msg)
+
+    def apply_initial_configuration(self):
+        """Заполнение вкладки после первой загрузки"""
+        # Показываем оригинальное изображение при запуске
+        if self.original_pixmap is None:
+            self.image_label.setText(f"Изображение не найдено: {self.config_manager.image_path}")
+        elif self.original_pixmap.isNull():
+            self.image_label.setText("Ошибка загрузки изображения")
+        else:
+            self.display_original_image()
+
+        # Заполняем комбобокс групп
+        groups = self.config_manager.get_chord_groups()
+        self.group_combo.clear()
+        self.group_combo.addItems(groups)
+
+        if groups:
+            self.current_group = groups[0]
+            self.load_chord_buttons()
+        else:
+            self.image_label.setText("Группы аккордов не найдены")
+
+    def apply_refreshed_configuration(self, current_group, current_chord):
+        """Восстановление выбранных группы и аккорда после обновления"""
+        # Обновляем комбобокс групп
+        groups = self.config_manager.get_chord_groups()
+        self.group_combo.clear()
+        self.group_combo.addItems(groups)
+
+        if groups:
+            # Пытаемся восстановить предыдущее состояние
+            if current_group in groups:
+                self.current_group = current_group
+                self.group_combo.setCurrentText(current_group)
+            else:
+                self.current_group = groups[0]
+                self.group_combo.setCurrentText(groups[0])
+
+            self.load_chord_buttons()
+
+            # Пытаемся восстановить предыдущий аккорд
+            if current_chord:
+                chord_names = [chord['name'] for chord in self.current_chords]
+                if current_chord['name'] in chord_names:
+                    # Находим и активируем кнопку нужного аккорда
+                    index = chord_names.index(current_chord['name'])
+                    self.current_chord = self.current_chords[index]
+                    self.display_chord(self.current_chord)
+                else:
+                    # Показываем первый аккорд группы
+                    self.current_chord = self.current_chords[0]
+                    self.display_chord(self.current_chord)
+            else:
+                # Показываем первый аккорд группы
+                self.current_chord = self.current_chords[0]
+                self.display_chord(self.current_chord)
+        else:
+            self.image_label.setText("Группы аккордов не найдены после обновления")
+
+        logger.info("✅ Конфигурация обновлена успешно")
+
+    def refresh_configuration(self):
+        """Обновление конфигурации из Excel файла (в фоновом потоке)"""
+        logger.debug("🔄 Обновление конфигурации...")
+
+        # Сохраняем текущее состояние, чтобы восстановить его после загрузки
+        if self.pending_restore is not None:
+            restore = self.pending_restore
+        else:
+            restore = (self.current_group, self.current_chord)
+        self.load_configuration(restore=restore)
 
     def refresh_colors(self):
         """Обновление цветов из Excel файла"""
         try:
-            print("🎨 Обновление цветов...")
+            logger.debug("🎨 Обновление цветов...")
 
             # Запускаем функцию обновления цветов напрямую
             success = self.update_note_styles_no_pandas()
@@ -362,17 +585,15 @@ class ChordConfigTab(QWidget):
                 # Перезагружаем конфигурацию для применения новых цветов
                 self.refresh_configuration()
                 QMessageBox.information(self, "Успех", "Цвета успешно обновлены!")
-                print("✅ Цвета обновлены успешно")
+                logger.info("✅ Цвета обновлены успешно")
             else:
                 QMessageBox.warning(self, "Ошибка", "Не удалось обновить цвета")
-                print("❌ Ошибка обновления цветов")
+                logger.error("❌ Ошибка обновления цветов")
 
         except Exception as e:
             error_msg = f"Ошибка при обновлении цветов: {str(e)}"
             QMessageBox.critical(self, "Ошибка", error_msg)
-            print(f"❌ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ %s", error_msg)
 
     def update_note_styles_no_pandas(self):
         """
@@ -382,7 +603,8 @@ class ChordConfigTab(QWidget):
         json_path = os.path.join("templates2", "template.json")
 
         try:
-            print("Чтение Excel файла...")
+            logger.debug("Чтение Excel файла...")
+            import openpyxl
             workbook = openpyxl.load_workbook(excel_path)
             sheet = workbook['COLOR']
 
@@ -396,7 +618,7 @@ class ChordConfigTab(QWidget):
                 ton_col = headers.index('ton')
                 color_col = headers.index('color')
             except ValueError:
-                print("Ошибка: В таблице должны быть колонки 'ton' и 'color'")
+                logger.error("Ошибка: В таблице должны быть колонки 'ton' и 'color'")
                 return False
 
             # Читаем данные
@@ -407,17 +629,17 @@ class ChordConfigTab(QWidget):
 
                     if note_name.lower() == 'barre':
                         barre_style = style_name
-                        print(f"Загружен стиль для барре: {barre_style}")
+                        logger.debug("Загружен стиль для барре: %s", barre_style)
                     else:
                         note_to_style[note_name] = style_name
-                        print(f"Загружено: {note_name} -> {style_name}")
+                        logger.debug("Загружено: %s -> %s", note_name, style_name)
 
-            print(f"Всего загружено {len(note_to_style)} соответствий для нот")
+            logger.debug("Всего загружено %s соответствий для нот", len(note_to_style))
             if barre_style:
-                print(f"Стиль для барре: {barre_style}")
+                logger.debug("Стиль для барре: %s", barre_style)
 
             # Чтение и обновление JSON
-            print("Чтение JSON файла...")
+            logger.debug("Чтение JSON файла...")
             with open(json_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
@@ -433,10 +655,10 @@ class ChordConfigTab(QWidget):
                             old_style = note_data.get('style', 'не установлен')
                             note_data['style'] = note_to_style[note_name]
                             updated_notes_count += 1
-                            print(
-                                f"Обновлена нота: {note_key} - '{note_name}' - '{old_style}' -> '{note_to_style[note_name]}'")
+                            logger.debug("Обновлена нота: %s - '%s' - '%s' -> '%s'",
+                                         note_key, note_name, old_style, note_to_style[note_name])
             else:
-                print("Раздел 'notes' не найден в JSON")
+                logger.warning("Раздел 'notes' не найден в JSON")
 
             # Обновляем барре (раздел 'barres')
             if 'barres' in data and barre_style:
@@ -444,22 +666,22 @@ class ChordConfigTab(QWidget):
                     old_style = barre_data.get('style', 'не установлен')
                     barre_data['style'] = barre_style
                     updated_barre_count += 1
-                    print(f"Обновлено барре: {barre_key} - '{old_style}' -> '{barre_style}'")
+                    logger.debug("Обновлено барре: %s - '%s' -> '%s'", barre_key, old_style, barre_style)
             else:
                 if 'barres' not in data:
-                    print("Раздел 'barres' не найден в JSON")
+                    logger.warning("Раздел 'barres' не найден в JSON")
                 if not barre_style:
-                    print("Стиль для барре не задан в Excel")
+                    logger.warning("Стиль для барре не задан в Excel")
 
             # Сохранение
             with open(json_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
 
-            print(f"Готово! Обновлено {updated_notes_count} нот и {updated_barre_count} барре")
+            logger.info("Готово! Обновлено %s нот и %s барре", updated_notes_count, updated_barre_count)
             return True
 
         except Exception as e:
-            print(f"Ошибка: {e}")
+            logger.exception("Ошибка обновления стилей нот: %s", e)
             return False
 
     def display_original_image(self):
@@ -473,8 +695,9 @@ class ChordConfigTab(QWidget):
                 Qt.SmoothTransformation
             )
             self.image_label.setPixmap(scaled_pixmap)
-            print(
-                f"📏 Оригинальное изображение: {self.original_pixmap.width()}x{self.original_pixmap.height()} -> {scaled_pixmap.width()}x{scaled_pixmap.height()}")
+            logger.debug("📏 Оригинальное изображение: %sx%s -> %sx%s",
+                         self.original_pixmap.width(), self.original_pixmap.height(),
+                         scaled_pixmap.width(), scaled_pixmap.height())
 
     def load_chord_buttons(self):
         """Загрузка кнопок аккордов для текущей группы"""
@@ -591,261 +814,56 @@ class ChordConfigTab(QWidget):
                 self.image_label.setText("Ошибка: изображение не загружено")
                 return
 
-            # Получаем область обрезки из RAM для этого конкретного аккорда
-            ram_key = chord_info['data'].get('RAM')
-            crop_rect = self.config_manager.get_ram_crop_area(ram_key)
-
-            print(f"🎯 Оригинальное изображение: {self.original_pixmap.width()}x{self.original_pixmap.height()}")
-            print(f"🎯 Область обрезки для RAM '{ram_key}': {crop_rect}")
-
-            # Получаем элементы для отображения
-            elements = self.config_manager.get_chord_elements(
+            # Получаем план отрисовки (область обрезки из RAM и готовые элементы) из кэша
+            plan = self.config_manager.get_render_plan(
                 chord_info['data'],
-                self.current_display_type
+                self.current_display_type,
+                self.current_fret_type,
+                self.current_barre_outline,
+                self.current_note_outline
             )
+            crop_rect = plan.crop_rect
+            elements = plan.elements
+
+            logger.debug("🎯 Отображение аккорда %s: RAM '%s', область обрезки %s, элементов: %s",
+                         chord_info['name'], chord_info['data'].get('RAM'), crop_rect, len(elements))
+
+            # Готовое изображение с теми же настройками уже может быть в кэше
+            cache_key = (
+                chord_info['name'], self.current_display_type, self.current_fret_type,
+                self.current_barre_outline, self.current_note_outline, self.current_scale_type,
+                # Без обрезки "Маленький 1" подстраивается под размер области отображения
+                None if crop_rect else (self.image_label.width(), self.image_label.height())
+            )
+            cached_pixmap = self.pixmap_cache.get(cache_key)
+            if cached_pixmap is not None:
+                self.image_label.setPixmap(cached_pixmap)
+                logger.debug("⚡ Изображение из кэша (попаданий: %s, промахов: %s, %s КБ)",
+                             self.pixmap_cache.hits, self.pixmap_cache.misses,
+                             self.pixmap_cache.total_bytes // 1024)
+                return
 
-            print(f"🎯 Отображение аккорда: {chord_info['name']}")
-            print(f"📊 Найдено элементов: {len(elements)}")
-
-            # Преобразуем символы ладов в зависимости от выбранного типа
-            if self.current_fret_type == "numeric":
-                elements = self.convert_frets_to_numeric(elements)
-
-            # Применяем настройки обводки к элементам
-            elements = self.apply_outline_settings(elements)
-
-            # ВСЕГДА используем обрезку по RAM, если она определена
-            if crop_rect:
-                crop_x, crop_y, crop_width, crop_height = crop_rect
-
-                # Проверяем границы и корректируем при необходимости
-                crop_x = max(0, min(crop_x, self.original_pixmap.width() - 1))
-                crop_y = max(0, min(crop_y, self.original_pixmap.height() - 1))
-                crop_width = max(1, min(crop_width, self.original_pixmap.width() - crop_x))
-                crop_height = max(1, min(crop_height, self.original_pixmap.height() - crop_y))
-
-                print(f"🎯 Финальная область обрезки: ({crop_x}, {crop_y}, {crop_width}, {crop_height})")
-
-                # СОЗДАЕМ НОВОЕ ИЗОБРАЖЕНИЕ РАЗМЕРОМ С ОБЛАСТЬ ОБРЕЗКИ
-                result_pixmap = QPixmap(crop_width, crop_height)
-                result_pixmap.fill(Qt.white)  # Белый фон
-
-                # Создаем painter для нового изображения
-                painter = QPainter(result_pixmap)
-
-                # Копируем область из оригинального изображения
-                painter.drawPixmap(0, 0, self.original_pixmap,
-                                   crop_x, crop_y, crop_width, crop_height)
-
-                # Рисуем элементы на НОВОМ изображении с правильными координатами
-                self.config_manager.draw_elements_on_canvas(
-                    painter, elements, (crop_x, crop_y, crop_width, crop_height)
-                )
-                painter.end()
-
-                # Применяем выбранный масштаб
-                if self.current_scale_type == "small1":
-                    # МАЛЕНЬКИЙ 1 - как было раньше (авто масштаб)
-                    display_width = min(400, crop_width)
-                    scale_factor = display_width / crop_width
-                    display_height = int(crop_height * scale_factor)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Маленький 1: {crop_width}x{crop_height} -> {display_width}x{display_height}")
-
-                elif self.current_scale_type == "small2":
-                    # МАЛЕНЬКИЙ 2 - 30% от оригинального
-                    display_width = int(crop_width * 0.3)
-                    display_height = int(crop_height * 0.3)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Маленький 2 (30%): {crop_width}x{crop_height} -> {display_width}x{display_height}")
-
-                elif self.current_scale_type == "medium1":
-                    # СРЕДНИЙ 1 - 50% от оригинального
-                    display_width = int(crop_width * 0.5)
-                    display_height = int(crop_height * 0.5)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Средний 1 (50%): {crop_width}x{crop_height} -> {display_width}x{display_height}")
-
-                elif self.current_scale_type == "medium2":
-                    # СРЕДНИЙ 2 - 70% от оригинального
-                    display_width = int(crop_width * 0.7)
-                    display_height = int(crop_height * 0.7)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Средний 2 (70%): {crop_width}x{crop_height} -> {display_width}x{display_height}")
-
-                else:
-                    # ОРИГИНАЛЬНЫЙ РАЗМЕР
-                    self.image_label.setPixmap(result_pixmap)
-                    print(f"📏 Оригинальный размер: {crop_width}x{crop_height}")
-
-            else:
-                # Если нет обрезки, рисуем на полном изображении
-                result_pixmap = self.config_manager.draw_elements_on_image(
-                    self.original_pixmap, elements, None
-                )
-
-                # Применяем выбранный масштаб
-                if self.current_scale_type == "small1":
-                    # МАЛЕНЬКИЙ 1
-                    scaled_pixmap = result_pixmap.scaled(
-                        self.image_label.width(),
-                        self.image_label.height(),
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Маленький 1 полного изображения")
-
-                elif self.current_scale_type == "small2":
-                    # МАЛЕНЬКИЙ 2 - 30% от оригинального
-                    display_width = int(result_pixmap.width() * 0.3)
-                    display_height = int(result_pixmap.height() * 0.3)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Маленький 2 (30%) полного изображения")
-
-                elif self.current_scale_type == "medium1":
-                    # СРЕДНИЙ 1 - 50% от оригинального
-                    display_width = int(result_pixmap.width() * 0.5)
-                    display_height = int(result_pixmap.height() * 0.5)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Средний 1 (50%) полного изображения")
-
-                elif self.current_scale_type == "medium2":
-                    # СРЕДНИЙ 2 - 70% от оригинального
-                    display_width = int(result_pixmap.width() * 0.7)
-                    display_height = int(result_pixmap.height() * 0.7)
-
-                    scaled_pixmap = result_pixmap.scaled(
-                        display_width,
-                        display_height,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    self.image_label.setPixmap(scaled_pixmap)
-                    print(f"📏 Средний 2 (70%) полного изображения")
+            # Обрезка по RAM, элементы и масштаб - общий код с пакетным экспортом
+            display_image = self.config_manager.render_chord_image(
+                self.original_image, plan, self.current_scale_type,
+                fit_size=(self.image_label.width(), self.image_label.height())
+            )
+            display_pixmap = QPixmap.fromImage(display_image)
+            logger.debug("📏 Масштаб %s: %sx%s", self.current_scale_type, display_pixmap.width(), display_pixmap.height())
 
-                else:
-                    # ОРИГИНАЛЬНЫЙ РАЗМЕР
-                    self.image_label.setPixmap(result_pixmap)
-                    print(f"📏 Оригинальный размер полного изображения")
+            self.pixmap_cache.put(cache_key, display_pixmap)
+            self.image_label.setPixmap(display_pixmap)
 
         except Exception as e:
             self.image_label.setText(f"Ошибка отображения: {str(e)}")
-            print(f"Ошибка при отображении аккорда: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Ошибка при отображении аккорда: %s", e)
 
     def convert_frets_to_numeric(self, elements):
         """Преобразование римских цифр ладов в обычные цифры"""
-        roman_to_numeric = {
-            'I': '1', 'II': '2', 'III': '3', 'IV': '4', 'V': '5',
-            'VI': '6', 'VII': '7', 'VIII': '8', 'IX': '9', 'X': '10',
-            'XI': '11', 'XII': '12', 'XIII': '13', 'XIV': '14', 'XV': '15',
-            'XVI': '16'
-        }
-
-        converted_elements = []
-        for element in elements:
-            if element['type'] == 'fret':
-                # Создаем копию данных элемента
-                converted_element = element.copy()
-                fret_data = converted_element['data'].copy()
-
-                # Преобразуем символ лада
-                original_symbol = fret_data.get('symbol', 'I')
-                if original_symbol in roman_to_numeric:
-                    fret_data['symbol'] = roman_to_numeric[original_symbol]
-                    print(f"🎯 Преобразован лад: {original_symbol} -> {fret_data['symbol']}")
-
-                converted_element['data'] = fret_data
-                converted_elements.append(converted_element)
-            else:
-                # Для других типов элементов оставляем как есть
-                converted_elements.append(element)
-
-        return converted_elements
+        return self.config_manager.convert_frets_to_numeric(elements)
 
     def apply_outline_settings(self, elements):
-        """Применение настроек обводки к элементам"""
-        # Определяем толщину обводки для барре (В ДВА РАЗА ТОЛЩЕ)
-        barre_outline_widths = {
-            "none": 0,
-            "thin": 2,  # было 1, стало 2
-            "medium": 4,  # было 2, стало 4
-            "thick": 6  # было 3, стало 6
-        }
-
-        # Определяем толщину обводки для нот (В ДВА РАЗА ТОЛЩЕ)
-        note_outline_widths = {
-            "none": 0,
-            "thin": 2,  # было 1, стало 2
-            "medium": 4,  # было 2, стало 4
-            "thick": 6  # было 3, стало 6
-        }
-
-        barre_width = barre_outline_widths.get(self.current_barre_outline, 0)
-        note_width = note_outline_widths.get(self.current_note_outline, 0)
-
-        modified_elements = []
-        for element in elements:
-            if element['type'] == 'barre' and barre_width > 0:
-                # Добавляем обводку к барре
-                modified_element = element.copy()
-                modified_element['data'] = element['data'].copy()
-                modified_element['data']['outline_width'] = barre_width
-                modified_element['data']['outline_color'] = [0, 0, 0]  # Черный цвет
-                modified_elements.append(modified_element)
-            elif element['type'] == 'note' and note_width > 0:
-                # Добавляем обводку к нотам
-                modified_element = element.copy()
-                modified_element['data'] = element['data'].copy()
-                modified_element['data']['outline_width'] = note_width
-                modified_element['data']['outline_color'] = [0, 0, 0]  # Черный цвет
-                modified_elements.append(modified_element)
-            else:
-                # Для других элементов оставляем как есть
-                modified_elements.append(element)
-
-        return modified_elements
\ No newline at end of file
+        """Применение текущих настроек обводки к элементам"""
+        return self.config_manager.apply_outline_settings(
+            elements, self.current_barre_outline, self.current_note_outline
+        )
@@ -0,0 +1,403 @@
+"""Потоковая разбивка длинных записей на аккорды.
+
+MP3 декодируется через ffmpeg блоками PCM фиксированного размера, поэтому
+память не зависит от длины файла: хранятся только текущий блок, состояние
+фильтра и огибающей и звук незавершенного аккорда.
+
+Запись проходится дважды: первый проход измеряет пики (для нормализации
+громкости и порогов в процентах), второй находит аккорды и отдает их по
+мере нахождения. Правила те же, что в ChordRecorderTab.find_chords_robust:
+огибающая - скользящее среднее 20 мс, аккорд - участок выше порога тишины
+достаточной длительности и амплитуды, конец - точка затухания + 100 мс.
+Фильтр ВЧ шума - тот же Баттерворт 4 порядка, но однопроходный (с
+сохранением состояния между блоками), а не filtfilt по всему файлу.
+"""
+import json
+import subprocess
+from collections import namedtuple
+
+import numpy as np
+from scipy import signal
+
+# Длительность блока PCM, читаемого из ffmpeg
+BLOCK_SECONDS = 1.0
+# Окно сглаживания огибающей
+ENVELOPE_WINDOW_SECONDS = 0.02
+# Частота огибающей для поиска аккордов (миллисекундное разрешение, Гц)
+DETECTION_RATE = 1000
+# Блоков децимации, обрабатываемых за один проход (ограничивает временные массивы)
+DETECTION_CHUNK_BLOCKS = 65536
+# Точка затухания ищется в последних секундах звука
+FADE_SEARCH_SECONDS = 3.0
+# Шаг обратного поиска точки затухания (семплов огибающей за одну операцию NumPy)
+FADE_SEARCH_CHUNK = 4096
+# Плавность после точки затухания
+FADE_TAIL_SECONDS = 0.1
+# Размер окна спектрального анализа (отсев шумов)
+SPECTRUM_SIZE = 4096
+# Участки звука длиннее этого не считаются аккордом (ограничивает буфер)
+MAX_CHORD_SECONDS = 60.0
+# Запас до максимальной громкости при нормализации, как в AudioSegment.normalize()
+NORMALIZE_HEADROOM_DB = 0.1
+
+# Параметры аудиопотока
+AudioInfo = namedtuple('AudioInfo', ['sample_rate', 'channels', 'duration'])
+
+# Найденный аккорд: границы в семплах и звук (моно, после фильтра, до нормализации)
+ChordBoundary = namedtuple('ChordBoundary', ['start', 'end', 'samples'])
+
+
+def probe_audio(file_path, ffprobe_path='ffprobe'):
+    """Частота дискретизации, число каналов и длительность первой аудиодорожки"""
+    result = subprocess.run(
+        [ffprobe_path, '-v', 'error', '-select_streams', 'a:0',
+         '-show_entries', 'stream=sample_rate,channels:format=duration', '-of', 'json', file_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe не смог прочитать файл: {result.stderr.strip()}")
+
+    info = json.loads(result.stdout)
+    stream = info['streams'][0]
+    duration = float(info.get('format', {}).get('duration', 0) or 0)
+    return AudioInfo(int(stream['sample_rate']), int(stream['channels']), duration)
+
+
+def read_pcm_blocks(file_path, channels, block_frames, ffmpeg_path='ffmpeg'):
+    """Декодирование через ffmpeg блоками: массивы float32 формы (кадры, каналы) в диапазоне -1..1"""
+    process = subprocess.Popen(
+        [ffmpeg_path, '-v', 'error', '-nostdin', '-i', file_path,
+         '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', str(channels), '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    frame_bytes = 4 * channels
+    block_bytes = block_frames * frame_bytes
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            usable = len(data) - len(data) % frame_bytes
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, channels)
+            if len(data) < block_bytes:
+                break
+
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg завершился с кодом {process.returncode}")
+    finally:
+        # Чтение прервано (ошибка или отмена) - останавливаем ffmpeg
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+class LowpassFilter:
+    """Фильтр Баттерворта 4 порядка с состоянием между блоками (cutoff <= 0 - без фильтра)"""
+
+    def __init__(self, sample_rate, cutoff_freq):
+        normal_cutoff = cutoff_freq / (sample_rate / 2)
+        if cutoff_freq <= 0 or normal_cutoff >= 1:
+            self.sos = None
+            return
+        self.sos = signal.butter(4, normal_cutoff, btype='low', output='sos')
+        self.state = np.zeros((self.sos.shape[0], 2))
+
+    def process(self, samples):
+        if self.sos is None:
+            return samples
+        filtered, self.state = signal.sosfilt(self.sos, samples, zi=self.state)
+        return filtered
+
+
+def normalize_gain(raw_peak):
+    """Множитель, приводящий пик к полной шкале int16 с запасом NORMALIZE_HEADROOM_DB"""
+    if raw_peak <= 0:
+        return 0.0
+    return 32768 * 10 ** (-NORMALIZE_HEADROOM_DB / 20) / raw_peak
+
+
+def smooth_envelope(values, window):
+    """Скользящее среднее, равное np.convolve(values, np.ones(window) / window, mode='same'),
+    за O(N) через кумулятивную сумму вместо O(N * window) свертки"""
+    if len(values) < window:
+        # Короткий сигнал: mode='same' возвращает window значений, оставляем свертку
+        return np.convolve(values, np.ones(window) / window, mode='same')
+    # Значение n - среднее по [n - window//2, n + (window-1)//2], за краями нули:
+    # sums[k] - сумма первых k значений сигнала, дополненного window//2 нулями слева
+    count = len(values)
+    lead = window // 2
+    sums = np.zeros(count + window)
+    np.cumsum(values, out=sums[lead + 1:lead + 1 + count])
+    sums[lead + 1 + count:] = sums[lead + count]
+    envelope = np.subtract(sums[window:], sums[:count])
+    envelope /= window
+    return envelope
+
+
+def block_magnitudes(samples, factor):
+    """Средний модуль семплов по блокам из factor семплов и пик модуля.
+
+    Сигнал обрабатывается частями по DETECTION_CHUNK_BLOCKS блоков, поэтому
+    полноразмерных промежуточных массивов не создается.
+    """
+    means = np.empty(-(-len(samples) // factor))
+    peak = 0.0
+    chunk_length = factor * DETECTION_CHUNK_BLOCKS
+    for offset in range(0, len(samples), chunk_length):
+        magnitudes = np.abs(samples[offset:offset + chunk_length].astype(np.float64))
+        peak = max(peak, magnitudes.max())
+        first = offset // factor
+        whole = len(magnitudes) // factor
+        means[first:first + whole] = magnitudes[:whole * factor].reshape(whole, factor).mean(axis=1)
+        if whole * factor < len(magnitudes):
+            means[first + whole] = magnitudes[whole * factor:].mean()
+    return means, peak
+
+
+def detection_envelope(samples, sample_rate):
+    """Огибающая для поиска аккордов на частоте около DETECTION_RATE.
+
+    Возвращает (огибающая в процентах от пика, шаг децимации, пик). Значение i
+    огибающей относится к семплам [i * шаг, (i + 1) * шаг) исходного сигнала.
+    """
+    factor = max(1, sample_rate // DETECTION_RATE)
+    means, peak = block_magnitudes(samples, factor)
+    if peak == 0:
+        return means, factor, peak
+    window = max(1, int(ENVELOPE_WINDOW_SECONDS * sample_rate / factor))
+    return smooth_envelope(means / peak * 100, window), factor, peak
+
+
+def find_fade_point(segment_envelope, threshold, search_length):
+    """Точка затухания: индекс последнего значения огибающей выше порога
+    среди последних search_length значений участка (None, если таких нет)"""
+    search_from = max(0, len(segment_envelope) - search_length) + 1
+    # Идем с конца блоками: обычно порог пересекается у самого конца участка,
+    # и просматривать все search_length значений не нужно
+    chunk_end = len(segment_envelope)
+    while chunk_end > search_from:
+        chunk_start = max(search_from, chunk_end - FADE_SEARCH_CHUNK)
+        above = segment_envelope[chunk_start:chunk_end] > threshold
+        if above.any():
+            # Обратный argmax - последнее True без цикла по семплам
+            return chunk_end - 1 - int(np.argmax(above[::-1]))
+        chunk_end = chunk_start
+    return None
+
+
+def is_chord_spectrum(samples, sample_rate):
+    """Проверка, что звук похож на аккорд, а не на шипение (доля энергии ниже 1 кГц)"""
+    if len(samples) <= 1024:
+        return True
+    fft = np.abs(np.fft.rfft(samples[:SPECTRUM_SIZE], n=SPECTRUM_SIZE))
+    freqs = np.fft.rfftfreq(SPECTRUM_SIZE, 1 / sample_rate)
+    total_energy = np.sum(fft)
+    return not (total_energy > 0 and np.sum(fft[freqs < 1000]) / total_energy < 0.3)
+
+
+class StreamingChordSegmenter:
+    """Поиск аккордов в потоке моно семплов (после фильтра), блок за блоком.
+
+    reference_peak - пик отфильтрованного моно сигнала всей записи: огибающая
+    считается в процентах от него, как в find_chords_robust. feed() и finish()
+    возвращают аккорды, границы которых уже известны.
+    """
+
+    def __init__(self, sample_rate, reference_peak, silence_thresh=-35, min_chord_duration=800,
+                 min_amplitude=10, fade_threshold=1.0, max_chord_seconds=MAX_CHORD_SECONDS):
+        self.sample_rate = sample_rate
+        self.reference_peak = reference_peak
+        self.silence_thresh_linear = 10 ** (silence_thresh / 20) * 100  # в процентах
+        self.min_chord_duration = min_chord_duration
+        self.min_amplitude = min_amplitude
+        self.fade_threshold = fade_threshold
+        self.fade_search = int(FADE_SEARCH_SECONDS * sample_rate)
+        self.fade_tail = int(FADE_TAIL_SECONDS * sample_rate)
+        self.max_chord_samples = int(max_chord_seconds * sample_rate)
+
+        # Скользящее среднее mode='same': значение n - среднее по [n - window//2, n + lag]
+        self.window = max(1, int(ENVELOPE_WINDOW_SECONDS * sample_rate))
+        self.lag = (self.window - 1) // 2
+        self._history = np.zeros(self.window - 1)  # последние значения |x| для скользящей суммы
+
+        self._received = 0  # получено семплов
+        self._envelope_count = 0  # посчитано значений огибающей
+        self._buffer_start = 0  # абсолютный индекс начала буферов
+        self._samples = np.zeros(0)  # семплы с _buffer_start
+        self._envelope = np.zeros(0)  # огибающая с _buffer_start
+
+        self._was_sound = None  # состояние последнего значения огибающей
+        self._open_start = None  # начало незавершенного участка звука
+        self._open_overlong = False
+        self._pending = []  # (начало, конец звука аккорда), ожидающие семплов после затухания
+
+    def feed(self, samples):
+        """Обработка блока семплов; возвращает аккорды, завершенные к концу блока"""
+        samples = np.asarray(samples, dtype=np.float64)
+        if self.reference_peak <= 0 or not len(samples):
+            self._received += len(samples)
+            return []
+
+        self._append(samples, self._running_envelope(samples))
+        return self._collect(final=False)
+
+    def finish(self):
+        """Конец записи: досчитывает огибающую и возвращает оставшиеся аккорды"""
+        if self.reference_peak <= 0:
+            return []
+
+        # Хвост огибающей с нулями после конца записи, как у np.convolve(mode='same')
+        remaining = self._received - self._envelope_count
+        if remaining > 0:
+            tail = self._running_envelope(np.zeros(self.lag), count_samples=False)
+            self._append(np.zeros(0), tail[-remaining:])
+
+        if self._open_start is not None and not self._open_overlong:
+            self._close_segment(self._open_start, self._received)
+        self._open_start = None
+        return self._collect(final=True)
+
+    def _running_envelope(self, samples, count_samples=True):
+        """Новые значения огибающей (скользящая сумма по кумулятивной сумме блока)"""
+        normalized = np.abs(samples) / self.reference_peak * 100
+        extended = np.concatenate((self._history, normalized))
+        sums = np.concatenate(([0.0], np.cumsum(extended)))
+        envelope = (sums[self.window:] - sums[:-self.window]) / self.window
+        if self.window > 1:
+            self._history = extended[-(self.window - 1):]
+
+        if count_samples:
+            # Значения до начала записи (n < 0) отбрасываем
+            first = max(0, self.lag - self._received)
+            envelope = envelope[first:]
+        return envelope
+
+    def _append(self, samples, envelope):
+        """Добавление семплов и огибающей в буферы и поиск границ звука"""
+        self._samples = np.concatenate((self._samples, samples))
+        self._received += len(samples)
+
+        if len(envelope):
+            self._envelope = np.concatenate((self._envelope, envelope))
+            self._scan(envelope, self._envelope_count)
+            self._envelope_count += len(envelope)
+
+    def _scan(self, envelope, offset):
+        """Переходы тишина/звук в новых значениях огибающей (offset - индекс первого)"""
+        is_sound = envelope > self.silence_thresh_linear
+        if self._was_sound is None:
+            self._was_sound = bool(is_sound[0])
+        previous = np.concatenate(([self._was_sound], is_sound[:-1]))
+        self._was_sound = bool(is_sound[-1])
+
+        # Как np.diff: границей служит последний семпл перед переходом
+        for index in np.flatnonzero(previous != is_sound):
+            boundary = offset + index - 1
+            if is_sound[index]:
+                self._open_start = boundary
+                self._open_overlong = False
+            elif self._open_start is not None:
+                if not self._open_overlong:
+                    self._close_segment(self._open_start, boundary)
+                self._open_start = None
+
+        if (self._open_start is not None and
+                offset + len(envelope) - self._open_start > self.max_chord_samples):
+            self._open_overlong = True
+
+    def _close_segment(self, start, end):
+        """Проверка завершенного участка звука; подходящий ставится в очередь на извлечение"""
+        if (end - start) * 1000 / self.sample_rate < self.min_chord_duration:
+            return
+
+        segment_envelope = self._envelope[start - self._buffer_start:end - self._buffer_start]
+        if not len(segment_envelope) or np.max(segment_envelope) < self.min_amplitude:
+            return
+
+        # Точка затухания - последний семпл выше порога в последних секундах звука
+        fade_offset = find_fade_point(segment_envelope, self.fade_threshold, self.fade_search)
+        fade_point = end if fade_offset is None else start + fade_offset
+
+        self._pending.append((start, fade_point + self.fade_tail))
+
+    def _collect(self, final):
+        """Извлечение аккордов, для которых уже получены все семплы, и обрезка буферов"""
+        chords = []
+        waiting = []
+        for start, stop in self._pending:
+            if stop > self._received and not final:
+                waiting.append((start, stop))
+                continue
+            stop = min(stop, self._received)
+            chord_samples = self._samples[start - self._buffer_start:stop - self._buffer_start].copy()
+            if is_chord_spectrum(chord_samples, self.sample_rate):
+                chords.append(ChordBoundary(start, stop, chord_samples))
+        self._pending = waiting
+
+        # Храним только то, что еще может понадобиться
+        keep_from = max(0, self._envelope_count - 1)
+        if self._open_start is not None and not self._open_overlong:
+            keep_from = min(keep_from, self._open_start)
+        for start, _ in self._pending:
+            keep_from = min(keep_from, start)
+        if keep_from > self._buffer_start:
+            self._samples = self._samples[keep_from - self._buffer_start:]
+            self._envelope = self._envelope[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+
+        return chords
+
+
+def measure_peaks(file_path, info, lowpass_cutoff, ffmpeg_path='ffmpeg', progress_callback=None):
+    """Первый проход: пик исходных семплов (для нормализации) и пик отфильтрованного моно сигнала"""
+    block_frames = int(BLOCK_SECONDS * info.sample_rate)
+    lowpass = LowpassFilter(info.sample_rate, lowpass_cutoff)
+    raw_peak = 0.0
+    filtered_peak = 0.0
+    frames = 0
+
+    for block in read_pcm_blocks(file_path, info.channels, block_frames, ffmpeg_path):
+        raw_peak = max(raw_peak, float(np.max(np.abs(block))))
+        filtered = lowpass.process(block.mean(axis=1, dtype=np.float64))
+        filtered_peak = max(filtered_peak, float(np.max(np.abs(filtered))))
+        frames += len(block)
+        if progress_callback and info.duration:
+            progress_callback(min(1.0, frames / (info.duration * info.sample_rate)))
+
+    return raw_peak, filtered_peak
+
+
+def stream_chords(file_path, info, silence_thresh=-35, min_chord_duration=800, min_amplitude=10,
+                  fade_threshold=1.0, lowpass_cutoff=8000, ffmpeg_path='ffmpeg',
+                  reference_peak=None, progress_callback=None):
+    """Генератор аккордов записи (ChordBoundary) по мере их нахождения.
+
+    reference_peak - пик отфильтрованного моно сигнала; если не задан,
+    измеряется отдельным проходом (measure_peaks).
+    """
+    if reference_peak is None:
+        _, reference_peak = measure_peaks(file_path, info, lowpass_cutoff, ffmpeg_path)
+
+    block_frames = int(BLOCK_SECONDS * info.sample_rate)
+    lowpass = LowpassFilter(info.sample_rate, lowpass_cutoff)
+    segmenter = StreamingChordSegmenter(
+        info.sample_rate, reference_peak, silence_thresh=silence_thresh,
+        min_chord_duration=min_chord_duration, min_amplitude=min_amplitude, fade_threshold=fade_threshold
+    )
+    frames = 0
+
+    for block in read_pcm_blocks(file_path, info.channels, block_frames, ffmpeg_path):
+        yield from segmenter.feed(lowpass.process(block.mean(axis=1, dtype=np.float64)))
+        frames += len(block)
+        if progress_callback and info.duration:
+            progress_callback(min(1.0, frames / (info.duration * info.sample_rate)))
+
+    yield from segmenter.finish()
+
+
+def chord_to_pcm16(chord, gain, channels):
+    """Звук аккорда в байты PCM int16 с нормализацией (моно, продублированное на все каналы)"""
+    pcm = np.clip(np.rint(chord.samples * gain), -32768, 32767).astype(np.int16)
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    return pcm.tobytes()
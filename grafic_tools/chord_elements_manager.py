@@ -1,9 +1,17 @@
-import copy
+from .element_model import Barre, CropRect, Fret, Note, OpenNote
 
 
 class ChordElementsManager:
     """Класс для управления элементами аккордов"""
 
+    # Раздел элементов -> класс элемента модели
+    ELEMENT_TYPES = {
+        'frets': Fret,
+        'notes': Note,
+        'open_notes': OpenNote,
+        'barres': Barre,
+    }
+
     def __init__(self):
         self.elements = {
             'frets': [],
@@ -13,34 +21,52 @@ class ChordElementsManager:
             'crop_rect': None
         }
 
-    def prepare_elements_for_saving(self, display_type):
-        """Подготавливает элементы для сохранения в зависимости от типа отображения"""
-        elements_copy = copy.deepcopy(self.elements)
+    def load_from_json(self, data):
+        """Загрузка элементов из словаря JSON конфигурации аккорда"""
+        self.elements = {
+            section: [cls.from_json(item) for item in data.get(section, [])]
+            for section, cls in self.ELEMENT_TYPES.items()
+        }
+        crop_rect = data.get('crop_rect')
+        self.elements['crop_rect'] = CropRect.from_json(crop_rect) if crop_rect else None
+
+    def to_json(self):
+        """Элементы в виде словаря JSON"""
+        data = {
+            section: [element.to_json() for element in self.elements[section]]
+            for section in self.ELEMENT_TYPES
+        }
+        crop_rect = self.elements['crop_rect']
+        data['crop_rect'] = crop_rect.to_json() if crop_rect else None
+        return data
 
+    @staticmethod
+    def _get_display_texts(display_type):
+        """Отображаемый текст нот и открытых нот для типа отображения"""
         if display_type == "Расположение нот":
             # Для нот: показываем названия нот
-            for note in elements_copy['notes']:
-                note['display_text'] = 'note_name'
-            for open_note in elements_copy['open_notes']:
-                open_note['display_text'] = 'note_name'
-        else:
-            # Для пальцев: показываем пальцы и символы
-            for note in elements_copy['notes']:
-                note['display_text'] = 'finger'
-            for open_note in elements_copy['open_notes']:
-                open_note['display_text'] = 'symbol'
-
-        return elements_copy
+            return 'note_name', 'note_name'
+        # Для пальцев: показываем пальцы и символы
+        return 'finger', 'symbol'
+
+    def prepare_elements_for_saving(self, display_type):
+        """Подготавливает элементы для сохранения в зависимости от типа отображения"""
+        note_text, open_note_text = self._get_display_texts(display_type)
+
+        data = self.to_json()
+        for note in data['notes']:
+            note['display_text'] = note_text
+        for open_note in data['open_notes']:
+            open_note['display_text'] = open_note_text
+        return data
 
     def update_elements_display(self, display_type):
         """Обновляет отображение элементов в реальном времени"""
-        if display_type == "Расположение нот":
-            for note in self.elements['notes']:
-                note['display_text'] = 'note_name'
-            for open_note in self.elements['open_notes']:
-                open_note['display_text'] = 'note_name'
-        else:
-            for note in self.elements['notes']:
-                note['display_text'] = 'finger'
-            for open_note in self.elements['open_notes']:
-                open_note['display_text'] = 'symbol'
\ No newline at end of file
+        note_text, open_note_text = self._get_display_texts(display_type)
+
+        self.elements['notes'] = [
+            note._replace(display_text=note_text) for note in self.elements['notes']
+        ]
+        self.elements['open_notes'] = [
+            open_note._replace(display_text=open_note_text) for open_note in self.elements['open_notes']
+        ]
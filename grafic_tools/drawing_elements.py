@@ -1,26 +1,24 @@
-from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QLinearGradient, QRadialGradient, QPen
+from PyQt5.QtGui import QPainter, QColor, QFont, QLinearGradient, QPen
 from PyQt5.QtCore import Qt, QPoint, QRect
 
+from . import font_cache, style_registry
+
 
 class DrawingElements:
     @staticmethod
     def draw_fret(painter, fret):
-        """Рисование лада с различными стилями"""
-        x, y, size, symbol = fret['x'], fret['y'], fret['size'], fret['symbol']
-        style = fret.get('style', 'default')
-        font_family = fret.get('font_family', 'Arial')
-        color = fret.get('color', (0, 0, 0))
+        """Рисование лада (element_model.Fret) с различными стилями"""
+        x, y, size, symbol = fret.x, fret.y, fret.size, fret.symbol
+        style, font_family, color = fret.style, fret.font_family, fret.color
 
         # Применяем выбранный стиль
         DrawingElements._apply_fret_style(painter, x, y, size, style, color)
 
         # Настраиваем шрифт
-        font = QFont(font_family, size, QFont.Bold)
-        painter.setFont(font)
+        key = font_cache.font_key(font_family, size, QFont.Bold)
+        painter.setFont(font_cache.get_font(key))
 
-        font_metrics = QFontMetrics(painter.font())
-        text_width = font_metrics.width(symbol)
-        text_height = font_metrics.height()
+        text_width, text_height = font_cache.text_size(key, symbol)
 
         text_x = x - text_width // 2
         text_y = y + text_height // 3
@@ -86,13 +84,13 @@ class DrawingElements:
 
     @staticmethod
     def draw_note(painter, note):
-        """Рисование ноты с различными стилями и оформлением"""
-        x, y, radius, style = note['x'], note['y'], note['radius'], note.get('style', 'default')
-        finger, note_name = note['finger'], note['note_name']
-        decoration = note.get('decoration', 'none')
-        text_color = note.get('text_color', (255, 255, 255))
-        font_style = note.get('font_style', 'normal')
-        display_text = note.get('display_text', 'finger')  # 'finger' или 'note_name'
+        """Рисование ноты (element_model.Note) с различными стилями и оформлением"""
+        x, y, radius, style = note.x, note.y, note.radius, note.style
+        finger, note_name = note.finger, note.note_name
+        decoration = note.decoration
+        text_color = note.text_color
+        font_style = note.font_style
+        display_text = note.display_text  # 'finger' или 'note_name'
 
         # Применяем выбранный стиль
         DrawingElements._apply_note_style(painter, x, y, radius, style)
@@ -109,13 +107,13 @@ class DrawingElements:
 
     @staticmethod
     def draw_open_note(painter, open_note):
-        """Рисование открытой ноты с различными стилями и оформлением"""
-        x, y, radius, style = open_note['x'], open_note['y'], open_note['radius'], open_note.get('style', 'default')
-        symbol, note_name = open_note['symbol'], open_note['note_name']
-        decoration = open_note.get('decoration', 'none')
-        text_color = open_note.get('text_color', (255, 255, 255))
-        font_style = open_note.get('font_style', 'normal')
-        display_text = open_note.get('display_text', 'symbol')  # 'symbol' или 'note_name'
+        """Рисование открытой ноты (element_model.OpenNote) с различными стилями и оформлением"""
+        x, y, radius, style = open_note.x, open_note.y, open_note.radius, open_note.style
+        symbol, note_name = open_note.symbol, open_note.note_name
+        decoration = open_note.decoration
+        text_color = open_note.text_color
+        font_style = open_note.font_style
+        display_text = open_note.display_text  # 'symbol' или 'note_name'
 
         # Применяем выбранный стиль
         DrawingElements._apply_note_style(painter, x, y, radius, style)
@@ -133,389 +131,14 @@ class DrawingElements:
     @staticmethod
     def _apply_note_style(painter, x, y, radius, style):
         """Применение различных стилей к ноте"""
-        painter.setPen(QColor(0, 0, 0))  # Черная обводка по умолчанию
+        if style_registry.get_style(style_registry.NOTE, style) is None:
+            style = 'default'
+        spec = style_registry.NOTE_STYLES[style]
 
-        if style == 'default':
-            painter.setBrush(QColor(255, 0, 0))
-
-        elif style == 'blue_gradient':
-            gradient = QLinearGradient(x - radius, y - radius, x + radius, y + radius)
-            gradient.setColorAt(0, QColor(100, 150, 255))
-            gradient.setColorAt(1, QColor(50, 100, 200))
-            painter.setBrush(gradient)
-
-        elif style == 'red_3d':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 150, 150))
-            gradient.setColorAt(0.7, QColor(220, 50, 50))
-            gradient.setColorAt(1, QColor(180, 0, 0))
-            painter.setBrush(gradient)
-
-        elif style == 'green_3d':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 180))
-            gradient.setColorAt(0.7, QColor(80, 200, 80))
-            gradient.setColorAt(1, QColor(40, 160, 40))
-            painter.setBrush(gradient)
-
-        elif style == 'purple_3d':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(230, 200, 255))
-            gradient.setColorAt(0.7, QColor(180, 100, 230))
-            gradient.setColorAt(1, QColor(140, 60, 200))
-            painter.setBrush(gradient)
-
-        elif style == 'gold_3d':
-            gradient = QLinearGradient(x - radius, y - radius, x + radius, y + radius)
-            gradient.setColorAt(0, QColor(255, 230, 100))
-            gradient.setColorAt(0.5, QColor(255, 200, 50))
-            gradient.setColorAt(1, QColor(230, 170, 30))
-            painter.setBrush(gradient)
-
-        elif style == 'glass':
-            painter.setBrush(QColor(255, 255, 255, 180))
-            painter.setPen(QColor(200, 200, 255, 200))
-
-        elif style == 'metal':
-            gradient = QLinearGradient(x - radius, y - radius, x + radius, y + radius)
-            gradient.setColorAt(0, QColor(220, 220, 220))
-            gradient.setColorAt(0.5, QColor(180, 180, 180))
-            gradient.setColorAt(1, QColor(150, 150, 150))
-            painter.setBrush(gradient)
-
-        elif style == 'fire':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 255, 150))
-            gradient.setColorAt(0.5, QColor(255, 200, 50))
-            gradient.setColorAt(1, QColor(255, 100, 0))
-            painter.setBrush(gradient)
-
-        elif style == 'ice':
-            gradient = QLinearGradient(x - radius, y - radius, x + radius, y + radius)
-            gradient.setColorAt(0, QColor(200, 230, 255))
-            gradient.setColorAt(0.5, QColor(150, 200, 255))
-            gradient.setColorAt(1, QColor(100, 170, 255))
-            painter.setBrush(gradient)
-
-        # ЗАМЕНЕННЫЕ СТИЛИ С НОВЫМИ ЦВЕТАМИ
-        elif style == 'soft_pink':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 220))
-            gradient.setColorAt(0.7, QColor(255, 150, 180))
-            gradient.setColorAt(1, QColor(230, 100, 150))
-            painter.setBrush(gradient)
-
-        elif style == 'mint_green':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 180))
-            gradient.setColorAt(0.7, QColor(120, 230, 120))
-            gradient.setColorAt(1, QColor(80, 200, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'lavender':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 200, 255))
-            gradient.setColorAt(0.7, QColor(180, 160, 240))
-            gradient.setColorAt(1, QColor(140, 120, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'peach':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 150))
-            gradient.setColorAt(0.7, QColor(255, 160, 100))
-            gradient.setColorAt(1, QColor(230, 120, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'sky_blue':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(150, 200, 255))
-            gradient.setColorAt(0.7, QColor(100, 160, 240))
-            gradient.setColorAt(1, QColor(70, 130, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'lemon_yellow':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 255, 150))
-            gradient.setColorAt(0.7, QColor(255, 230, 80))
-            gradient.setColorAt(1, QColor(240, 200, 40))
-            painter.setBrush(gradient)
-
-        elif style == 'coral':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 180, 150))
-            gradient.setColorAt(0.7, QColor(255, 140, 100))
-            gradient.setColorAt(1, QColor(230, 100, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'aqua_marine':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(150, 255, 220))
-            gradient.setColorAt(0.7, QColor(100, 230, 190))
-            gradient.setColorAt(1, QColor(70, 200, 160))
-            painter.setBrush(gradient)
-
-        elif style == 'rose_quartz':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 210))
-            gradient.setColorAt(0.7, QColor(240, 160, 180))
-            gradient.setColorAt(1, QColor(220, 120, 150))
-            painter.setBrush(gradient)
-
-        elif style == 'seafoam':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 200))
-            gradient.setColorAt(0.7, QColor(140, 230, 170))
-            gradient.setColorAt(1, QColor(100, 200, 140))
-            painter.setBrush(gradient)
-
-        elif style == 'buttercup':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 230, 120))
-            gradient.setColorAt(0.7, QColor(255, 200, 60))
-            gradient.setColorAt(1, QColor(240, 170, 30))
-            painter.setBrush(gradient)
-
-        elif style == 'lilac':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 180, 255))
-            gradient.setColorAt(0.7, QColor(190, 140, 240))
-            gradient.setColorAt(1, QColor(160, 100, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'honey':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 220, 120))
-            gradient.setColorAt(0.7, QColor(255, 180, 60))
-            gradient.setColorAt(1, QColor(230, 150, 30))
-            painter.setBrush(gradient)
-
-        elif style == 'turquoise':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(100, 240, 220))
-            gradient.setColorAt(0.7, QColor(70, 200, 190))
-            gradient.setColorAt(1, QColor(50, 170, 160))
-            painter.setBrush(gradient)
-
-        elif style == 'apricot':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 140))
-            gradient.setColorAt(0.7, QColor(255, 160, 100))
-            gradient.setColorAt(1, QColor(230, 120, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'periwinkle':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(200, 200, 255))
-            gradient.setColorAt(0.7, QColor(160, 160, 240))
-            gradient.setColorAt(1, QColor(120, 120, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'sage':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 220, 160))
-            gradient.setColorAt(0.7, QColor(140, 190, 120))
-            gradient.setColorAt(1, QColor(100, 160, 90))
-            painter.setBrush(gradient)
-
-        elif style == 'melon':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 180, 140))
-            gradient.setColorAt(0.7, QColor(255, 140, 100))
-            gradient.setColorAt(1, QColor(230, 100, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'powder_blue':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 200, 255))
-            gradient.setColorAt(0.7, QColor(140, 170, 240))
-            gradient.setColorAt(1, QColor(100, 140, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'pistachio':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 160))
-            gradient.setColorAt(0.7, QColor(140, 230, 120))
-            gradient.setColorAt(1, QColor(100, 200, 90))
-            painter.setBrush(gradient)
-
-        elif style == 'blush':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 180, 190))
-            gradient.setColorAt(0.7, QColor(240, 140, 160))
-            gradient.setColorAt(1, QColor(220, 100, 130))
-            painter.setBrush(gradient)
-
-        elif style == 'mauve':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 180, 210))
-            gradient.setColorAt(0.7, QColor(190, 140, 180))
-            gradient.setColorAt(1, QColor(160, 100, 150))
-            painter.setBrush(gradient)
-
-        elif style == 'cream':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 240, 200))
-            gradient.setColorAt(0.7, QColor(255, 220, 160))
-            gradient.setColorAt(1, QColor(240, 190, 120))
-            painter.setBrush(gradient)
-
-        elif style == 'teal':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(0, 200, 200))
-            gradient.setColorAt(0.7, QColor(0, 160, 160))
-            gradient.setColorAt(1, QColor(0, 120, 120))
-            painter.setBrush(gradient)
-
-        elif style == 'salmon':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 160, 140))
-            gradient.setColorAt(0.7, QColor(255, 120, 100))
-            gradient.setColorAt(1, QColor(230, 80, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'orchid':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(230, 160, 220))
-            gradient.setColorAt(0.7, QColor(200, 120, 200))
-            gradient.setColorAt(1, QColor(170, 80, 170))
-            painter.setBrush(gradient)
-
-        elif style == 'mint_blue':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(160, 220, 255))
-            gradient.setColorAt(0.7, QColor(120, 190, 240))
-            gradient.setColorAt(1, QColor(80, 160, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'pear':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(200, 255, 150))
-            gradient.setColorAt(0.7, QColor(160, 230, 100))
-            gradient.setColorAt(1, QColor(120, 200, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'rose_gold':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 160))
-            gradient.setColorAt(0.7, QColor(240, 160, 120))
-            gradient.setColorAt(1, QColor(220, 120, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'lavender_gray':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 200, 220))
-            gradient.setColorAt(0.7, QColor(190, 170, 190))
-            gradient.setColorAt(1, QColor(160, 140, 160))
-            painter.setBrush(gradient)
-
-        elif style == 'honeydew':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(200, 255, 200))
-            gradient.setColorAt(0.7, QColor(160, 230, 160))
-            gradient.setColorAt(1, QColor(120, 200, 120))
-            painter.setBrush(gradient)
-
-        elif style == 'peach_puff':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 200, 160))
-            gradient.setColorAt(0.7, QColor(255, 160, 120))
-            gradient.setColorAt(1, QColor(230, 120, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'azure':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 200, 255))
-            gradient.setColorAt(0.7, QColor(140, 170, 240))
-            gradient.setColorAt(1, QColor(100, 140, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'pale_green':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 180))
-            gradient.setColorAt(0.7, QColor(140, 230, 140))
-            gradient.setColorAt(1, QColor(100, 200, 100))
-            painter.setBrush(gradient)
-
-        elif style == 'light_coral':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 160, 160))
-            gradient.setColorAt(0.7, QColor(240, 120, 120))
-            gradient.setColorAt(1, QColor(220, 80, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'thistle':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 180, 220))
-            gradient.setColorAt(0.7, QColor(190, 140, 190))
-            gradient.setColorAt(1, QColor(160, 100, 160))
-            painter.setBrush(gradient)
-
-        elif style == 'wheat':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 220, 160))
-            gradient.setColorAt(0.7, QColor(240, 190, 120))
-            gradient.setColorAt(1, QColor(220, 160, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'light_cyan':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(180, 255, 255))
-            gradient.setColorAt(0.7, QColor(140, 230, 230))
-            gradient.setColorAt(1, QColor(100, 200, 200))
-            painter.setBrush(gradient)
-
-        elif style == 'pale_turquoise':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(160, 240, 240))
-            gradient.setColorAt(0.7, QColor(120, 220, 220))
-            gradient.setColorAt(1, QColor(80, 190, 190))
-            painter.setBrush(gradient)
-
-        elif style == 'light_pink':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 180, 200))
-            gradient.setColorAt(0.7, QColor(240, 140, 170))
-            gradient.setColorAt(1, QColor(220, 100, 140))
-            painter.setBrush(gradient)
-
-        elif style == 'light_salmon':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 160, 140))
-            gradient.setColorAt(0.7, QColor(255, 120, 100))
-            gradient.setColorAt(1, QColor(230, 80, 70))
-            painter.setBrush(gradient)
-
-        elif style == 'light_skyblue':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(160, 200, 255))
-            gradient.setColorAt(0.7, QColor(120, 170, 240))
-            gradient.setColorAt(1, QColor(80, 140, 220))
-            painter.setBrush(gradient)
-
-        elif style == 'light_green':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(160, 255, 160))
-            gradient.setColorAt(0.7, QColor(120, 230, 120))
-            gradient.setColorAt(1, QColor(80, 200, 80))
-            painter.setBrush(gradient)
-
-        elif style == 'plum':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(220, 160, 220))
-            gradient.setColorAt(0.7, QColor(190, 120, 190))
-            gradient.setColorAt(1, QColor(160, 80, 160))
-            painter.setBrush(gradient)
-
-        elif style == 'bisque':
-            gradient = QRadialGradient(x, y, radius)
-            gradient.setColorAt(0, QColor(255, 220, 180))
-            gradient.setColorAt(0.7, QColor(255, 190, 140))
-            gradient.setColorAt(1, QColor(240, 160, 100))
-            painter.setBrush(gradient)
-
-        else:
-            # Стиль по умолчанию
-            painter.setBrush(QColor(255, 0, 0))
+        # Черная обводка по умолчанию
+        painter.setPen(QColor(*spec.pen) if spec.pen else QColor(0, 0, 0))
+        painter.setBrush(style_registry.get_brush(style_registry.NOTE, style,
+                                                  x - radius, y - radius, radius * 2, radius * 2))
 
     @staticmethod
     def _apply_decoration(painter, x, y, radius, decoration, style):
@@ -574,54 +197,36 @@ class DrawingElements:
 
         # Настраиваем шрифт - увеличиваем размер для лучшего заполнения круга
         font_size = max(10, radius)  # Увеличиваем размер шрифта
-        font = QFont("Arial", font_size)
-
-        if font_style == 'bold':
-            font.setWeight(QFont.Bold)
-        elif font_style == 'light':
-            font.setWeight(QFont.Light)
-        elif font_style == 'italic':
-            font.setItalic(True)
-        elif font_style == 'bold_italic':
-            font.setWeight(QFont.Bold)
-            font.setItalic(True)
-
-        painter.setFont(font)
+        key = font_cache.style_font_key("Arial", font_size, font_style)
 
         # Устанавливаем цвет текста
         painter.setPen(QColor(*text_color))
 
         # Идеальное центрирование текста
-        font_metrics = QFontMetrics(font)
-        text_width = font_metrics.width(text)
-        text_height = font_metrics.height()
-
-        # Центрируем по горизонтали и вертикали
-        text_x = x - text_width // 2
-        text_y = y + text_height // 4  # Более точное вертикальное центрирование
+        text_width, text_height = font_cache.text_size(key, text)
 
         # Если текст слишком большой для круга, уменьшаем шрифт
         if text_width > radius * 1.8 or text_height > radius * 1.8:
             font_size = max(8, radius * 3 // 4)
-            font.setPointSize(font_size)
-            painter.setFont(font)
-            font_metrics = QFontMetrics(font)
-            text_width = font_metrics.width(text)
-            text_height = font_metrics.height()
-            text_x = x - text_width // 2
-            text_y = y + text_height // 4
+            key = font_cache.style_font_key("Arial", font_size, font_style)
+            text_width, text_height = font_cache.text_size(key, text)
+
+        painter.setFont(font_cache.get_font(key))
+
+        # Центрируем по горизонтали и вертикали
+        text_x = x - text_width // 2
+        text_y = y + text_height // 4  # Более точное вертикальное центрирование
 
         painter.drawText(text_x, text_y, text)
 
     @staticmethod
     def draw_barre(painter, barre):
-        """Рисование баре с различными стилями"""
+        """Рисование баре (element_model.Barre, x, y - центр) с различными стилями"""
         x, y, width, height, radius, style = (
-            barre['x'], barre['y'], barre['width'],
-            barre['height'], barre['radius'], barre.get('style', 'default')
+            barre.x, barre.y, barre.width, barre.height, barre.radius, barre.style
         )
-        color = barre.get('color', (189, 183, 107))
-        decoration = barre.get('decoration', 'none')
+        color = barre.color
+        decoration = barre.decoration
 
         # Применяем выбранный стиль
         DrawingElements._apply_barre_style(painter, x, y, width, height, radius, style, color)
@@ -644,99 +249,14 @@ class DrawingElements:
         """Применение различных стилей к баре"""
         painter.setPen(QColor(0, 0, 0))  # Черная обводка по умолчанию
 
-        if style == 'default':
-            painter.setBrush(QColor(*color))
-        elif style == 'wood':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(210, 180, 140))
-            gradient.setColorAt(0.5, QColor(160, 120, 80))
-            gradient.setColorAt(1, QColor(210, 180, 140))
-            painter.setBrush(gradient)
-        elif style == 'metal':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(200, 200, 200))
-            gradient.setColorAt(0.5, QColor(100, 100, 100))
-            gradient.setColorAt(1, QColor(200, 200, 200))
-            painter.setBrush(gradient)
-        elif style == 'rubber':
-            gradient = QRadialGradient(x, y, max(width, height))
-            gradient.setColorAt(0, QColor(80, 80, 80))
-            gradient.setColorAt(1, QColor(40, 40, 40))
-            painter.setBrush(gradient)
-        elif style == 'gradient':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(*color))
-            lighter = QColor(*color).lighter(150)
-            gradient.setColorAt(1, QColor(lighter.red(), lighter.green(), lighter.blue()))
-            painter.setBrush(gradient)
-        elif style == 'striped':
-            painter.setBrush(QColor(*color))
-
-            # НОВЫЕ ОРАНЖЕВЫЕ СТИЛИ ДЛЯ БАРЕ
-        elif style == 'orange_wood':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(220, 160, 100))
-            gradient.setColorAt(0.5, QColor(180, 120, 60))
-            gradient.setColorAt(1, QColor(220, 160, 100))
-            painter.setBrush(gradient)
-        elif style == 'orange_metal':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(255, 200, 120))
-            gradient.setColorAt(0.3, QColor(255, 160, 80))
-            gradient.setColorAt(0.7, QColor(220, 120, 50))
-            gradient.setColorAt(1, QColor(200, 100, 40))
-            painter.setBrush(gradient)
-        elif style == 'orange_rubber':
-            gradient = QRadialGradient(x, y, max(width, height))
-            gradient.setColorAt(0, QColor(200, 120, 60))
-            gradient.setColorAt(0.7, QColor(180, 100, 50))
-            gradient.setColorAt(1, QColor(160, 80, 40))
-            painter.setBrush(gradient)
-        elif style == 'orange_gradient':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(255, 180, 80))
-            gradient.setColorAt(0.5, QColor(255, 140, 40))
-            gradient.setColorAt(1, QColor(220, 100, 20))
-            painter.setBrush(gradient)
-        elif style == 'orange_glow':
-            gradient = QRadialGradient(x, y, max(width, height))
-            gradient.setColorAt(0, QColor(255, 220, 150))
-            gradient.setColorAt(0.5, QColor(255, 180, 80))
-            gradient.setColorAt(1, QColor(255, 140, 40))
-            painter.setBrush(gradient)
-        elif style == 'burnt_orange':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(220, 140, 80))
-            gradient.setColorAt(0.5, QColor(200, 100, 50))
-            gradient.setColorAt(1, QColor(180, 80, 30))
-            painter.setBrush(gradient)
-        elif style == 'orange_amber':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(255, 200, 100))
-            gradient.setColorAt(0.5, QColor(255, 160, 40))
-            gradient.setColorAt(1, QColor(230, 120, 20))
-            painter.setBrush(gradient)
-        elif style == 'orange_sunset':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(255, 180, 100))
-            gradient.setColorAt(0.5, QColor(255, 140, 60))
-            gradient.setColorAt(1, QColor(220, 100, 40))
-            painter.setBrush(gradient)
-        elif style == 'orange_rust':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(220, 140, 80))
-            gradient.setColorAt(0.5, QColor(200, 100, 50))
-            gradient.setColorAt(1, QColor(160, 70, 30))
-            painter.setBrush(gradient)
-        elif style == 'orange_pumpkin':
-            gradient = QLinearGradient(x - width // 2, y - height // 2, x + width // 2, y + height // 2)
-            gradient.setColorAt(0, QColor(255, 160, 80))
-            gradient.setColorAt(0.5, QColor(255, 120, 40))
-            gradient.setColorAt(1, QColor(220, 80, 20))
-            painter.setBrush(gradient)
-        else:
-            painter.setBrush(QColor(*color))
-
+        if style_registry.get_style(style_registry.BARRE, style) is None:
+            style = 'default'
+        # Градиент - от (x - width // 2, y - height // 2) до (x + width // 2, y + height // 2)
+        half_width, half_height = width // 2, height // 2
+        painter.setBrush(style_registry.get_brush(style_registry.BARRE, style,
+                                                  x - half_width, y - half_height,
+                                                  half_width * 2, half_height * 2, color,
+                                                  extent=max(width, height)))
 
     @staticmethod
     def _apply_barre_decoration(painter, x, y, width, height, radius, decoration, style, color):
@@ -797,10 +317,10 @@ class DrawingElements:
 
     @staticmethod
     def draw_crop_rect(painter, crop_rect):
-        """Рисование рамки обрезки с улучшенной видимостью"""
-        x, y, width, height = crop_rect['x'], crop_rect['y'], crop_rect['width'], crop_rect['height']
-        color = crop_rect.get('color', (255, 0, 0))
-        style = crop_rect.get('style', 'dashed')
+        """Рисование рамки обрезки (element_model.CropRect) с улучшенной видимостью"""
+        x, y, width, height = crop_rect.x, crop_rect.y, crop_rect.width, crop_rect.height
+        color = crop_rect.color
+        style = crop_rect.style
 
         # Основная рамка - более толстая и заметная
         pen = QPen(QColor(*color))
@@ -843,13 +363,13 @@ class DrawingElements:
             painter.drawRect(point_x - marker_size // 2, point_y - marker_size // 2, marker_size, marker_size)
 
         # Добавляем текст с размерами
-        font = QFont("Arial", 10, QFont.Bold)
-        painter.setFont(font)
+        key = font_cache.font_key("Arial", 10, QFont.Bold)
+        painter.setFont(font_cache.get_font(key))
         painter.setPen(QColor(*color))
 
         # Размеры области
         size_text = f"{width} x {height}"
-        text_width = QFontMetrics(font).width(size_text)
+        text_width, _ = font_cache.text_size(key, size_text)
 
         # Рисуем текст в центре верхней границы
         text_x = x + (width - text_width) // 2
@@ -0,0 +1,92 @@
+"""Колоночная геометрия элементов шаблонов (NumPy structured array).
+
+Координаты и размеры ладов, нот, открытых нот и баре из template.json
+хранятся одной таблицей - по колонке на поле, строка на элемент, - а
+(раздел, ключ) отображается в номер строки. Так сдвиг на область обрезки и
+проверка границ выполняются для всех элементов аккорда одной операцией над
+массивами, а не поэлементно.
+
+x, y - центр элемента (как при отрисовке); width и height - габариты:
+для нот это диаметр, для ладов - размер шрифта, для баре - размер прямоугольника.
+"""
+import numpy as np
+
+from .element_model import SECTION_TYPES
+
+# Разделы шаблонов с геометрией (рамки обрезки - сама область, а не элементы)
+GEOMETRY_SECTIONS = ('frets', 'notes', 'open_notes', 'barres')
+
+GEOMETRY_DTYPE = np.dtype([
+    ('x', np.float64),
+    ('y', np.float64),
+    ('width', np.float64),
+    ('height', np.float64),
+    ('radius', np.float64),
+])
+
+# Класс элемента модели -> раздел шаблонов
+SECTION_BY_TYPE = {SECTION_TYPES[section]: section for section in GEOMETRY_SECTIONS}
+
+
+def _geometry_row(section, element):
+    """Строка таблицы геометрии для элемента модели"""
+    if section == 'frets':
+        return element.x, element.y, element.size, element.size, 0
+    if section == 'barres':
+        return element.x, element.y, element.width, element.height, element.radius
+    diameter = element.radius * 2
+    return element.x, element.y, diameter, diameter, element.radius
+
+
+class TemplateGeometry:
+    """Геометрия элементов шаблонов: таблица NumPy и индекс (раздел, ключ) -> строка"""
+
+    def __init__(self, templates):
+        """templates - {раздел: {ключ: элемент}}; элементы - модели или словари JSON"""
+        rows = []
+        self.index = {}
+        for section in GEOMETRY_SECTIONS:
+            cls = SECTION_TYPES[section]
+            for key, element in templates.get(section, {}).items():
+                if isinstance(element, dict):
+                    element = cls.from_json(element)
+                self.index[(section, key)] = len(rows)
+                rows.append(_geometry_row(section, element))
+        self.data = np.array(rows, dtype=GEOMETRY_DTYPE)
+
+    def __len__(self):
+        return len(self.data)
+
+    def rows(self, section_keys):
+        """Номера строк для последовательности пар (раздел, ключ)"""
+        index = self.index
+        return np.fromiter((index[section_key] for section_key in section_keys), dtype=np.intp)
+
+    def element_rows(self, elements):
+        """Номера строк для элементов аккорда (ChordElement с данными модели)"""
+        return self.rows((SECTION_BY_TYPE[type(element.data)], element.key) for element in elements)
+
+    def offset(self, rows, crop_rect):
+        """Координаты центров строк относительно области обрезки (целые, как для Qt)"""
+        geometry = self.data[rows]
+        if not crop_rect:
+            return geometry['x'], geometry['y']
+        crop_x, crop_y = crop_rect[0], crop_rect[1]
+        x = np.rint(geometry['x'] - crop_x).astype(np.int64)
+        y = np.rint(geometry['y'] - crop_y).astype(np.int64)
+        return x, y
+
+    def bounds(self, rows):
+        """Габаритные прямоугольники строк: (left, top, right, bottom)"""
+        geometry = self.data[rows]
+        half_width = geometry['width'] / 2
+        half_height = geometry['height'] / 2
+        return (geometry['x'] - half_width, geometry['y'] - half_height,
+                geometry['x'] + half_width, geometry['y'] + half_height)
+
+    def outside(self, rows, crop_rect):
+        """Маска строк, чьи габариты выходят за область обрезки (x, y, ширина, высота)"""
+        left, top, right, bottom = self.bounds(rows)
+        crop_x, crop_y, crop_width, crop_height = crop_rect
+        return ((left < crop_x) | (top < crop_y) |
+                (right > crop_x + crop_width) | (bottom > crop_y + crop_height))
@@ -0,0 +1,191 @@
+"""Модель элементов диаграммы аккорда: лады, ноты, открытые ноты, баре и рамка обрезки.
+
+Элементы - неизменяемые NamedTuple: поля читаются как атрибуты (без словаря
+экземпляра и поиска по ключу), изменения делаются через _replace. Поля
+повторяют ключи шаблонов template.json; from_json/to_json переводят элемент
+из словаря JSON и обратно. Цвета хранятся кортежами, в JSON пишутся списками.
+Значения по умолчанию - те же, что использует отрисовка аккордов.
+"""
+from typing import NamedTuple, Tuple
+
+Color = Tuple[int, int, int]
+
+
+def _from_json(cls, data):
+    """Элемент класса cls из словаря JSON (отсутствующие ключи - по умолчанию)"""
+    defaults = cls._field_defaults
+    return cls._make([
+        tuple(value) if isinstance(value, list) else value
+        for value in (data.get(name, defaults[name]) for name in cls._fields)
+    ])
+
+
+def _to_json(element):
+    """Словарь JSON элемента.
+
+    Необязательные поля (обводка) записываются, только если хотя бы одно из
+    них отличается от значения по умолчанию.
+    """
+    defaults = element._field_defaults
+    skip = ()
+    if all(getattr(element, name) == defaults[name] for name in element.optional_fields):
+        skip = element.optional_fields
+
+    return {
+        name: list(value) if isinstance(value, tuple) else value
+        for name, value in zip(element._fields, element)
+        if name not in skip
+    }
+
+
+def _note_text(note):
+    """Отображаемый на ноте текст"""
+    if note.display_text == 'note_name':
+        return note.note_name
+    if note.display_text == 'symbol':
+        return getattr(note, 'symbol', '')
+    return getattr(note, 'finger', '1')
+
+
+class Fret(NamedTuple):
+    """Лад: цифра над грифом"""
+    x: int = 0
+    y: int = 0
+    size: int = 60
+    symbol: str = 'I'
+    font_family: str = 'Arial'
+    style: str = 'default'
+    color: Color = (0, 0, 0)
+
+    element_type = 'fret'
+    optional_fields = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return _from_json(cls, data)
+
+    def to_json(self):
+        return _to_json(self)
+
+
+class Note(NamedTuple):
+    """Нота (палец) на ладу"""
+    x: int = 0
+    y: int = 0
+    radius: int = 15
+    style: str = 'red_3d'
+    decoration: str = 'none'
+    text_color: Color = (255, 255, 255)
+    font_style: str = 'normal'
+    display_text: str = 'finger'
+    finger: str = '1'
+    note_name: str = ''
+    outline_width: int = 0
+    outline_color: Color = (0, 0, 0)
+
+    element_type = 'note'
+    optional_fields = ('outline_width', 'outline_color')
+
+    @classmethod
+    def from_json(cls, data):
+        return _from_json(cls, data)
+
+    def to_json(self):
+        return _to_json(self)
+
+    def text(self):
+        return _note_text(self)
+
+
+class OpenNote(NamedTuple):
+    """Открытая (или заглушенная) струна перед грифом"""
+    x: int = 0
+    y: int = 0
+    radius: int = 15
+    style: str = 'red_3d'
+    decoration: str = 'none'
+    text_color: Color = (255, 255, 255)
+    font_style: str = 'normal'
+    display_text: str = 'symbol'
+    symbol: str = ''
+    note_name: str = ''
+    outline_width: int = 0
+    outline_color: Color = (0, 0, 0)
+
+    element_type = 'note'
+    optional_fields = ('outline_width', 'outline_color')
+
+    @classmethod
+    def from_json(cls, data):
+        return _from_json(cls, data)
+
+    def to_json(self):
+        return _to_json(self)
+
+    def text(self):
+        return _note_text(self)
+
+
+class Barre(NamedTuple):
+    """Баре; x, y - центр прямоугольника"""
+    x: int = 0
+    y: int = 0
+    width: int = 100
+    height: int = 20
+    radius: int = 10
+    style: str = 'wood'
+    decoration: str = 'none'
+    color: Color = (189, 183, 107)
+    outline_width: int = 0
+    outline_color: Color = (0, 0, 0)
+
+    element_type = 'barre'
+    optional_fields = ('outline_width', 'outline_color')
+
+    @classmethod
+    def from_json(cls, data):
+        return _from_json(cls, data)
+
+    def to_json(self):
+        return _to_json(self)
+
+
+class CropRect(NamedTuple):
+    """Рамка обрезки; x, y - левый верхний угол"""
+    x: int = 0
+    y: int = 0
+    width: int = 100
+    height: int = 100
+    style: str = 'dashed'
+    color: Color = (255, 0, 0)
+
+    element_type = 'crop_rect'
+    optional_fields = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return _from_json(cls, data)
+
+    def to_json(self):
+        return _to_json(self)
+
+
+# Раздел template.json -> класс элемента
+SECTION_TYPES = {
+    'frets': Fret,
+    'notes': Note,
+    'open_notes': OpenNote,
+    'barres': Barre,
+    'crop_rects': CropRect,
+}
+
+
+def section_from_json(section, items):
+    """Элементы раздела шаблонов: {ключ: словарь JSON} -> {ключ: элемент}"""
+    cls = SECTION_TYPES[section]
+    return {key: cls.from_json(data) for key, data in items.items()}
+
+
+def section_to_json(items):
+    """Элементы раздела шаблонов в JSON: {ключ: элемент} -> {ключ: словарь}"""
+    return {key: element.to_json() for key, element in items.items()}
@@ -0,0 +1,72 @@
+"""Кэш шрифтов, метрик и размеров текста для отрисовки ладов, нот и символов.
+
+Шрифт определяется ключом (семейство, размер, насыщенность, курсив). Для
+каждого ключа QFont и QFontMetrics создаются один раз, а размеры строк
+(ширина, высота) запоминаются по паре (ключ шрифта, текст).
+"""
+from PyQt5.QtGui import QFont, QFontMetrics
+
+# Максимальное количество запомненных размеров строк
+TEXT_SIZE_CACHE_LIMIT = 4096
+
+# Стиль шрифта ноты -> (насыщенность, курсив)
+FONT_STYLES = {
+    'normal': (QFont.Normal, False),
+    'bold': (QFont.Bold, False),
+    'light': (QFont.Light, False),
+    'italic': (QFont.Normal, True),
+    'bold_italic': (QFont.Bold, True),
+}
+
+_fonts = {}  # ключ -> QFont
+_metrics = {}  # ключ -> QFontMetrics
+_text_sizes = {}  # (ключ, текст) -> (ширина, высота)
+
+
+def font_key(family, size, weight=QFont.Normal, italic=False):
+    """Ключ шрифта для кэша"""
+    return family, size, weight, italic
+
+
+def style_font_key(family, size, font_style):
+    """Ключ шрифта по названию стиля ('bold', 'italic', ...)"""
+    weight, italic = FONT_STYLES.get(font_style, FONT_STYLES['normal'])
+    return font_key(family, size, weight, italic)
+
+
+def get_font(key):
+    """QFont для ключа (общий объект - не изменять)"""
+    font = _fonts.get(key)
+    if font is None:
+        family, size, weight, italic = key
+        font = QFont(family, size, weight, italic)
+        _fonts[key] = font
+    return font
+
+
+def get_metrics(key):
+    """QFontMetrics для ключа"""
+    metrics = _metrics.get(key)
+    if metrics is None:
+        metrics = QFontMetrics(get_font(key))
+        _metrics[key] = metrics
+    return metrics
+
+
+def text_size(key, text):
+    """Ширина и высота строки в шрифте"""
+    size = _text_sizes.get((key, text))
+    if size is None:
+        metrics = get_metrics(key)
+        size = (metrics.width(text), metrics.height())
+        if len(_text_sizes) >= TEXT_SIZE_CACHE_LIMIT:
+            _text_sizes.clear()
+        _text_sizes[(key, text)] = size
+    return size
+
+
+def clear():
+    """Очистка кэша (например, после смены шрифтов в системе)"""
+    _fonts.clear()
+    _metrics.clear()
+    _text_sizes.clear()
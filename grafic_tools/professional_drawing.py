@@ -14,6 +14,7 @@ from .templates_manager import TemplatesManager
 from .drawing_elements import DrawingElements
 from .chord_save_dialog import ChordSaveDialog
 from .chord_elements_manager import ChordElementsManager
+from .element_model import Barre, CropRect, Fret, Note, OpenNote
 from .controls_manager import ControlsManager
 from .image_manager import ImageManager
 
@@ -651,11 +652,8 @@ class ProfessionalDrawingTab(QMainWindow):
             # Проверяем, содержит ли шаблон допустимую ноту
             note_name = template_data.get('note_name', '')
             if note_name in valid_notes:
-                # Создаем копию шаблона чтобы не изменять оригинал
-                note_data = template_data.copy()
-
                 # Добавляем ноту в элементы
-                self.elements_manager.elements['notes'].append(note_data)
+                self.elements_manager.elements['notes'].append(Note.from_json(template_data))
                 added_count += 1
 
         self.repaint()
@@ -681,11 +679,8 @@ class ProfessionalDrawingTab(QMainWindow):
             # Проверяем, содержит ли шаблон допустимую ноту
             note_name = template_data.get('note_name', '')
             if note_name in valid_notes:
-                # Создаем копию шаблона чтобы не изменять оригинал
-                open_note_data = template_data.copy()
-
                 # Добавляем открытую ноту в элементы
-                self.elements_manager.elements['open_notes'].append(open_note_data)
+                self.elements_manager.elements['open_notes'].append(OpenNote.from_json(template_data))
                 added_count += 1
 
         self.repaint()
@@ -705,11 +700,8 @@ class ProfessionalDrawingTab(QMainWindow):
 
         added_count = 0
         for template_name, template_data in frets_templates.items():
-            # Создаем копию шаблона чтобы не изменять оригинал
-            fret_data = template_data.copy()
-
             # Добавляем лад в элементы
-            self.elements_manager.elements['frets'].append(fret_data)
+            self.elements_manager.elements['frets'].append(Fret.from_json(template_data))
             added_count += 1
 
         self.repaint()
@@ -813,17 +805,15 @@ class ProfessionalDrawingTab(QMainWindow):
                                         f"Описание: {chord_info.get('description', 'Нет описания')}")
 
                 # Загружаем элементы отрисовки
-                self.elements_manager.elements = chord_config.get('elements', {
-                    'frets': [], 'notes': [], 'open_notes': [], 'barres': [], 'crop_rect': None
-                })
+                self.elements_manager.load_from_json(chord_config.get('elements', {}))
 
                 # Обновляем поля ввода для рамки если есть
                 if self.elements_manager.elements['crop_rect']:
                     crop = self.elements_manager.elements['crop_rect']
-                    self.crop_x_input.setText(str(crop.get('x', 50)))
-                    self.crop_y_input.setText(str(crop.get('y', 50)))
-                    self.crop_width_input.setText(str(crop.get('width', 400)))
-                    self.crop_height_input.setText(str(crop.get('height', 300)))
+                    self.crop_x_input.setText(str(crop.x))
+                    self.crop_y_input.setText(str(crop.y))
+                    self.crop_width_input.setText(str(crop.width))
+                    self.crop_height_input.setText(str(crop.height))
 
                 self.repaint()
                 QMessageBox.information(self, "Успех", "Конфигурация аккорда загружена")
@@ -870,10 +860,10 @@ class ProfessionalDrawingTab(QMainWindow):
             img_height = result_image.height()
 
             # Корректируем координаты если нужно
-            x = max(0, min(crop['x'], img_width - 1))
-            y = max(0, min(crop['y'], img_height - 1))
-            width = max(1, min(crop['width'], img_width - x))
-            height = max(1, min(crop['height'], img_height - y))
+            x = max(0, min(crop.x, img_width - 1))
+            y = max(0, min(crop.y, img_height - 1))
+            width = max(1, min(crop.width, img_width - x))
+            height = max(1, min(crop.height, img_height - y))
 
             cropped_image = result_image.copy(x, y, width, height)
 
@@ -911,10 +901,10 @@ class ProfessionalDrawingTab(QMainWindow):
             }
             color = color_map.get(color_name, (0, 0, 0))
 
-            self.elements_manager.elements['frets'].append({
-                'x': x, 'y': y, 'size': size, 'symbol': symbol,
-                'font_family': font_family, 'style': style, 'color': color
-            })
+            self.elements_manager.elements['frets'].append(Fret(
+                x=x, y=y, size=size, symbol=symbol,
+                font_family=font_family, style=style, color=color
+            ))
             self.repaint()
         except ValueError as e:
             QMessageBox.warning(self, "Ошибка ввода", "Проверьте правильность введенных данных")
@@ -951,10 +941,10 @@ class ProfessionalDrawingTab(QMainWindow):
             }
             color = color_map.get(color_name, (189, 183, 107))
 
-            self.elements_manager.elements['barres'].append({
-                'x': x, 'y': y, 'width': width, 'height': height,
-                'radius': radius, 'style': style, 'decoration': decoration, 'color': color
-            })
+            self.elements_manager.elements['barres'].append(Barre(
+                x=x, y=y, width=width, height=height,
+                radius=radius, style=style, decoration=decoration, color=color
+            ))
             self.repaint()
         except ValueError as e:
             QMessageBox.warning(self, "Ошибка ввода", "Проверьте правильность введенных данных")
@@ -986,11 +976,11 @@ class ProfessionalDrawingTab(QMainWindow):
             finger = self.note_finger_combo.currentText()
             note_name = self.note_name_combo.currentText()
 
-            self.elements_manager.elements['notes'].append({
-                'x': x, 'y': y, 'radius': radius, 'style': style, 'decoration': decoration,
-                'text_color': text_color, 'font_style': font_style, 'display_text': display_text,
-                'finger': finger, 'note_name': note_name
-            })
+            self.elements_manager.elements['notes'].append(Note(
+                x=x, y=y, radius=radius, style=style, decoration=decoration,
+                text_color=text_color, font_style=font_style, display_text=display_text,
+                finger=finger, note_name=note_name
+            ))
             self.repaint()
         except ValueError as e:
             QMessageBox.warning(self, "Ошибка ввода", "Проверьте правильность введенных данных")
@@ -1022,11 +1012,11 @@ class ProfessionalDrawingTab(QMainWindow):
             symbol = self.open_note_symbol_combo.currentText()
             note_name = self.open_note_name_combo.currentText()
 
-            self.elements_manager.elements['open_notes'].append({
-                'x': x, 'y': y, 'radius': radius, 'style': style, 'decoration': decoration,
-                'text_color': text_color, 'font_style': font_style, 'display_text': display_text,
-                'symbol': symbol, 'note_name': note_name
-            })
+            self.elements_manager.elements['open_notes'].append(OpenNote(
+                x=x, y=y, radius=radius, style=style, decoration=decoration,
+                text_color=text_color, font_style=font_style, display_text=display_text,
+                symbol=symbol, note_name=note_name
+            ))
             self.repaint()
         except ValueError as e:
             QMessageBox.warning(self, "Ошибка ввода", "Проверьте правильность введенных данных")
@@ -1053,10 +1043,10 @@ class ProfessionalDrawingTab(QMainWindow):
             }
             color = color_map.get(color_name, (255, 0, 0))
 
-            self.elements_manager.elements['crop_rect'] = {
-                'x': x, 'y': y, 'width': width, 'height': height,
-                'style': style, 'color': color
-            }
+            self.elements_manager.elements['crop_rect'] = CropRect(
+                x=x, y=y, width=width, height=height,
+                style=style, color=color
+            )
             self.repaint()
 
         except ValueError as e:
@@ -1260,7 +1250,7 @@ class ProfessionalDrawingTab(QMainWindow):
             )
 
             if ok and template_name:
-                crop_data = self.elements_manager.elements['crop_rect'].copy()
+                crop_data = self.elements_manager.elements['crop_rect'].to_json()
                 if self.templates_manager.add_template('crop_rects', template_name, crop_data):
                     self.templates_manager.save_templates()
                     # Обновляем комбобокс
@@ -0,0 +1,255 @@
+"""Единый реестр стилей заливки нот и баре.
+
+Стиль описывается таблично: тип заливки и опорные цвета (stops). Точки
+градиента задаются относительно прямоугольника элемента: начало/конец
+линейного градиента и центр радиального - в долях ширины и высоты,
+радиус - в долях max(ширина, высота). Реестр общий для редактора шаблонов
+(grafic_tools/drawing_elements.py) и отрисовки аккордов (drawing_elements.py).
+
+Баре в редакторе и при отрисовке аккордов исторически выглядят по-разному
+(оранжевые стили, набор стилей, стиль по умолчанию), поэтому для них две
+таблицы: BARRE_STYLES - редактора, CHORD_BARRE_STYLES - отрисовки аккордов.
+Ноты в обоих местах описаны одной таблицей NOTE_STYLES.
+
+Кисти, которые выдает get_brush, переиспользуются: сплошная заливка - одна
+на стиль и цвет элемента, градиент - один на стиль, цвет и прямоугольник
+элемента (повторяющиеся ноты и баре одного размера на одних и тех же местах).
+Градиент всегда строится в координатах самого элемента, без преобразования
+кисти: перенос нормализованного градиента через QTransform дает расхождения
+на единицу цвета в сотнях пикселей и меняет хэши уже выгруженных картинок.
+"""
+from collections import OrderedDict, namedtuple
+
+from PyQt5.QtGui import QBrush, QColor, QLinearGradient, QRadialGradient
+
+NOTE = "note"
+BARRE = "barre"
+CHORD_BARRE = "chord_barre"
+
+# Вместо конкретного цвета можно указать цвет самого элемента (цвет баре)
+ELEMENT_COLOR = "element"
+ELEMENT_COLOR_LIGHTER = "element_lighter"  # цвет элемента, осветленный на 50%
+
+# Цвет баре, если в данных элемента он не задан
+DEFAULT_ELEMENT_COLOR = (189, 183, 107)
+
+StyleSpec = namedtuple('StyleSpec', ['kind', 'stops', 'start', 'end', 'center', 'radius', 'pen'])
+
+
+def solid(color, pen=None):
+    """Сплошная заливка"""
+    return StyleSpec('solid', ((0, color),), None, None, None, None, pen)
+
+
+def linear(stops, start=(0, 0), end=(1, 1), pen=None):
+    """Линейный градиент (по умолчанию по диагонали прямоугольника элемента)"""
+    return StyleSpec('linear', tuple(stops), start, end, None, None, pen)
+
+
+def radial(stops, center=(0.5, 0.5), radius=0.5, pen=None):
+    """Радиальный градиент (по умолчанию вписан в квадрат элемента)"""
+    return StyleSpec('radial', tuple(stops), None, None, center, radius, pen)
+
+
+NOTE_STYLES = {
+    "default": solid((255, 0, 0)),
+    "blue_gradient": linear([(0, (100, 150, 255)), (1, (50, 100, 200))]),
+    "red_3d": radial([(0, (255, 150, 150)), (0.7, (220, 50, 50)), (1, (180, 0, 0))]),
+    "green_3d": radial([(0, (180, 255, 180)), (0.7, (80, 200, 80)), (1, (40, 160, 40))]),
+    "purple_3d": radial([(0, (230, 200, 255)), (0.7, (180, 100, 230)), (1, (140, 60, 200))]),
+    "gold_3d": linear([(0, (255, 230, 100)), (0.5, (255, 200, 50)), (1, (230, 170, 30))]),
+    "glass": solid((255, 255, 255, 180), pen=(200, 200, 255, 200)),
+    "metal": linear([(0, (220, 220, 220)), (0.5, (180, 180, 180)), (1, (150, 150, 150))]),
+    "fire": radial([(0, (255, 255, 150)), (0.5, (255, 200, 50)), (1, (255, 100, 0))]),
+    "ice": linear([(0, (200, 230, 255)), (0.5, (150, 200, 255)), (1, (100, 170, 255))]),
+    "soft_pink": radial([(0, (255, 200, 220)), (0.7, (255, 150, 180)), (1, (230, 100, 150))]),
+    "mint_green": radial([(0, (180, 255, 180)), (0.7, (120, 230, 120)), (1, (80, 200, 80))]),
+    "lavender": radial([(0, (220, 200, 255)), (0.7, (180, 160, 240)), (1, (140, 120, 220))]),
+    "peach": radial([(0, (255, 200, 150)), (0.7, (255, 160, 100)), (1, (230, 120, 80))]),
+    "sky_blue": radial([(0, (150, 200, 255)), (0.7, (100, 160, 240)), (1, (70, 130, 220))]),
+    "lemon_yellow": radial([(0, (255, 255, 150)), (0.7, (255, 230, 80)), (1, (240, 200, 40))]),
+    "coral": radial([(0, (255, 180, 150)), (0.7, (255, 140, 100)), (1, (230, 100, 70))]),
+    "aqua_marine": radial([(0, (150, 255, 220)), (0.7, (100, 230, 190)), (1, (70, 200, 160))]),
+    "rose_quartz": radial([(0, (255, 200, 210)), (0.7, (240, 160, 180)), (1, (220, 120, 150))]),
+    "seafoam": radial([(0, (180, 255, 200)), (0.7, (140, 230, 170)), (1, (100, 200, 140))]),
+    "buttercup": radial([(0, (255, 230, 120)), (0.7, (255, 200, 60)), (1, (240, 170, 30))]),
+    "lilac": radial([(0, (220, 180, 255)), (0.7, (190, 140, 240)), (1, (160, 100, 220))]),
+    "honey": radial([(0, (255, 220, 120)), (0.7, (255, 180, 60)), (1, (230, 150, 30))]),
+    "turquoise": radial([(0, (100, 240, 220)), (0.7, (70, 200, 190)), (1, (50, 170, 160))]),
+    "apricot": radial([(0, (255, 200, 140)), (0.7, (255, 160, 100)), (1, (230, 120, 70))]),
+    "periwinkle": radial([(0, (200, 200, 255)), (0.7, (160, 160, 240)), (1, (120, 120, 220))]),
+    "sage": radial([(0, (180, 220, 160)), (0.7, (140, 190, 120)), (1, (100, 160, 90))]),
+    "melon": radial([(0, (255, 180, 140)), (0.7, (255, 140, 100)), (1, (230, 100, 70))]),
+    "powder_blue": radial([(0, (180, 200, 255)), (0.7, (140, 170, 240)), (1, (100, 140, 220))]),
+    "pistachio": radial([(0, (180, 255, 160)), (0.7, (140, 230, 120)), (1, (100, 200, 90))]),
+    "blush": radial([(0, (255, 180, 190)), (0.7, (240, 140, 160)), (1, (220, 100, 130))]),
+    "mauve": radial([(0, (220, 180, 210)), (0.7, (190, 140, 180)), (1, (160, 100, 150))]),
+    "cream": radial([(0, (255, 240, 200)), (0.7, (255, 220, 160)), (1, (240, 190, 120))]),
+    "teal": radial([(0, (0, 200, 200)), (0.7, (0, 160, 160)), (1, (0, 120, 120))]),
+    "salmon": radial([(0, (255, 160, 140)), (0.7, (255, 120, 100)), (1, (230, 80, 70))]),
+    "orchid": radial([(0, (230, 160, 220)), (0.7, (200, 120, 200)), (1, (170, 80, 170))]),
+    "mint_blue": radial([(0, (160, 220, 255)), (0.7, (120, 190, 240)), (1, (80, 160, 220))]),
+    "pear": radial([(0, (200, 255, 150)), (0.7, (160, 230, 100)), (1, (120, 200, 70))]),
+    "rose_gold": radial([(0, (255, 200, 160)), (0.7, (240, 160, 120)), (1, (220, 120, 80))]),
+    "lavender_gray": radial([(0, (220, 200, 220)), (0.7, (190, 170, 190)), (1, (160, 140, 160))]),
+    "honeydew": radial([(0, (200, 255, 200)), (0.7, (160, 230, 160)), (1, (120, 200, 120))]),
+    "peach_puff": radial([(0, (255, 200, 160)), (0.7, (255, 160, 120)), (1, (230, 120, 80))]),
+    "azure": radial([(0, (180, 200, 255)), (0.7, (140, 170, 240)), (1, (100, 140, 220))]),
+    "pale_green": radial([(0, (180, 255, 180)), (0.7, (140, 230, 140)), (1, (100, 200, 100))]),
+    "light_coral": radial([(0, (255, 160, 160)), (0.7, (240, 120, 120)), (1, (220, 80, 80))]),
+    "thistle": radial([(0, (220, 180, 220)), (0.7, (190, 140, 190)), (1, (160, 100, 160))]),
+    "wheat": radial([(0, (255, 220, 160)), (0.7, (240, 190, 120)), (1, (220, 160, 80))]),
+    "light_cyan": radial([(0, (180, 255, 255)), (0.7, (140, 230, 230)), (1, (100, 200, 200))]),
+    "pale_turquoise": radial([(0, (160, 240, 240)), (0.7, (120, 220, 220)), (1, (80, 190, 190))]),
+    "light_pink": radial([(0, (255, 180, 200)), (0.7, (240, 140, 170)), (1, (220, 100, 140))]),
+    "light_salmon": radial([(0, (255, 160, 140)), (0.7, (255, 120, 100)), (1, (230, 80, 70))]),
+    "light_skyblue": radial([(0, (160, 200, 255)), (0.7, (120, 170, 240)), (1, (80, 140, 220))]),
+    "light_green": radial([(0, (160, 255, 160)), (0.7, (120, 230, 120)), (1, (80, 200, 80))]),
+    "plum": radial([(0, (220, 160, 220)), (0.7, (190, 120, 190)), (1, (160, 80, 160))]),
+    "bisque": radial([(0, (255, 220, 180)), (0.7, (255, 190, 140)), (1, (240, 160, 100))]),
+}
+
+BARRE_STYLES = {
+    "default": solid(ELEMENT_COLOR),
+    "wood": linear([(0, (210, 180, 140)), (0.5, (160, 120, 80)), (1, (210, 180, 140))]),
+    "metal": linear([(0, (200, 200, 200)), (0.5, (100, 100, 100)), (1, (200, 200, 200))]),
+    "rubber": radial([(0, (80, 80, 80)), (1, (40, 40, 40))], radius=1),
+    "gradient": linear([(0, ELEMENT_COLOR), (1, ELEMENT_COLOR_LIGHTER)]),
+    "striped": solid(ELEMENT_COLOR),
+    "orange_wood": linear([(0, (220, 160, 100)), (0.5, (180, 120, 60)), (1, (220, 160, 100))]),
+    "orange_metal": linear([(0, (255, 200, 120)), (0.3, (255, 160, 80)), (0.7, (220, 120, 50)), (1, (200, 100, 40))]),
+    "orange_rubber": radial([(0, (200, 120, 60)), (0.7, (180, 100, 50)), (1, (160, 80, 40))], radius=1),
+    "orange_gradient": linear([(0, (255, 180, 80)), (0.5, (255, 140, 40)), (1, (220, 100, 20))]),
+    "orange_glow": radial([(0, (255, 220, 150)), (0.5, (255, 180, 80)), (1, (255, 140, 40))], radius=1),
+    "burnt_orange": linear([(0, (220, 140, 80)), (0.5, (200, 100, 50)), (1, (180, 80, 30))]),
+    "orange_amber": linear([(0, (255, 200, 100)), (0.5, (255, 160, 40)), (1, (230, 120, 20))]),
+    "orange_sunset": linear([(0, (255, 180, 100)), (0.5, (255, 140, 60)), (1, (220, 100, 40))]),
+    "orange_rust": linear([(0, (220, 140, 80)), (0.5, (200, 100, 50)), (1, (160, 70, 30))]),
+    "orange_pumpkin": linear([(0, (255, 160, 80)), (0.5, (255, 120, 40)), (1, (220, 80, 20))]),
+}
+
+# Баре при отрисовке аккордов (drawing_elements.py, ChordConfigManager): цвет
+# элемента не используется, оранжевые стили - свои
+CHORD_BARRE_STYLES = {
+    "wood": BARRE_STYLES["wood"],
+    "metal": BARRE_STYLES["metal"],
+    "rubber": BARRE_STYLES["rubber"],
+    "gradient": BARRE_STYLES["gradient"],
+    "striped": BARRE_STYLES["striped"],
+    "orange_gradient": linear([(0, (255, 200, 100)), (0.5, (255, 140, 0)), (1, (255, 100, 0))]),
+    "orange_metal": linear([(0, (255, 220, 150)), (0.3, (255, 180, 80)), (0.7, (255, 140, 40)), (1, (255, 120, 20))]),
+    "orange_glow": radial([(0, (255, 230, 180)), (0.5, (255, 180, 80)), (1, (255, 140, 0))], radius=0.8),
+    "dark_orange": linear([(0, (255, 150, 50)), (0.5, (255, 120, 0)), (1, (220, 100, 0))]),
+    "orange_wood": linear([(0, (255, 200, 150)), (0.3, (255, 170, 100)), (0.7, (255, 140, 60)), (1, (255, 120, 40))]),
+    "bright_orange": linear([(0, (255, 230, 100)), (0.5, (255, 200, 0)), (1, (255, 160, 0))]),
+    "orange_red": linear([(0, (255, 180, 100)), (0.5, (255, 120, 0)), (1, (255, 80, 0))]),
+    "orange_yellow": linear([(0, (255, 240, 150)), (0.5, (255, 200, 50)), (1, (255, 180, 0))]),
+    "orange_brown": linear([(0, (255, 190, 130)), (0.5, (255, 150, 80)), (1, (210, 120, 60))]),
+    "orange_pastel": linear([(0, (255, 220, 180)), (0.5, (255, 190, 140)), (1, (255, 170, 120))]),
+}
+
+STYLES = {
+    NOTE: NOTE_STYLES,
+    BARRE: BARRE_STYLES,
+    CHORD_BARRE: CHORD_BARRE_STYLES,
+}
+
+
+def get_style(kind, name):
+    """Описание стиля по типу элемента и названию (None, если стиль неизвестен)"""
+    return STYLES[kind].get(name)
+
+
+def _resolve_color(color, element_color):
+    """QColor для опорного цвета стиля"""
+    if color == ELEMENT_COLOR:
+        return QColor(*element_color)
+    if color == ELEMENT_COLOR_LIGHTER:
+        lighter = QColor(*element_color).lighter(150)
+        return QColor(lighter.red(), lighter.green(), lighter.blue())
+    return QColor(*color)
+
+
+def create_brush(spec, left, top, width, height, element_color=DEFAULT_ELEMENT_COLOR, extent=None):
+    """Кисть по описанию стиля для прямоугольника элемента.
+
+    extent - размер, от которого считается радиус радиального градиента
+    (по умолчанию max(ширина, высота)).
+    """
+    if spec.kind == 'solid':
+        return QBrush(_resolve_color(spec.stops[0][1], element_color))
+
+    if spec.kind == 'linear':
+        gradient = QLinearGradient(left + spec.start[0] * width, top + spec.start[1] * height,
+                                   left + spec.end[0] * width, top + spec.end[1] * height)
+    else:
+        if extent is None:
+            extent = max(width, height)
+        gradient = QRadialGradient(left + spec.center[0] * width, top + spec.center[1] * height,
+                                   spec.radius * extent)
+
+    for position, color in spec.stops:
+        gradient.setColorAt(position, _resolve_color(color, element_color))
+    return QBrush(gradient)
+
+
+# Сколько градиентных кистей под конкретные прямоугольники держать в кэше
+GRADIENT_CACHE_SIZE = 512
+
+_solid_brushes = {}  # (тип элемента, стиль, цвет элемента) -> QBrush
+_gradient_brushes = OrderedDict()  # (тип, стиль, цвет, прямоугольник, extent) -> QBrush
+brushes_created = 0
+brushes_reused = 0
+
+
+def get_brush(kind, name, left, top, width, height, element_color=DEFAULT_ELEMENT_COLOR, extent=None):
+    """Кисть для стиля по названию (None, если стиль неизвестен).
+
+    Кисть предназначена для заливки фигуры, вписанной в прямоугольник
+    (left, top, width, height): ноты-круга или баре-прямоугольника.
+    extent - как в create_brush.
+    """
+    global brushes_created, brushes_reused
+
+    spec = STYLES[kind].get(name)
+    if spec is None:
+        return None
+
+    if spec.kind == 'solid':
+        key = (kind, name, tuple(element_color))
+        cache = _solid_brushes
+    else:
+        key = (kind, name, tuple(element_color), left, top, width, height, extent)
+        cache = _gradient_brushes
+
+    brush = cache.get(key)
+    if brush is not None:
+        brushes_reused += 1
+        if cache is _gradient_brushes:
+            _gradient_brushes.move_to_end(key)
+        return brush
+
+    brush = create_brush(spec, left, top, width, height, element_color, extent)
+    brushes_created += 1
+    cache[key] = brush
+    if len(_gradient_brushes) > GRADIENT_CACHE_SIZE:
+        _gradient_brushes.popitem(last=False)
+    return brush
+
+
+def get_brush_stats():
+    """Статистика кистей: сколько создано, сколько взято из кэша"""
+    return {
+        'created': brushes_created,
+        'reused': brushes_reused,
+        'shared': len(_solid_brushes) + len(_gradient_brushes),
+    }
+
+
+def clear_brush_cache():
+    """Очистка общих кистей и счетчиков"""
+    global brushes_created, brushes_reused
+    _solid_brushes.clear()
+    _gradient_brushes.clear()
+    brushes_created = 0
+    brushes_reused = 0
@@ -1,9 +1,7 @@
 import sys
 import os
 import json
-import numpy as np
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
+import time
 import tempfile
 import subprocess
 import warnings
@@ -13,35 +11,26 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'grafic_tools'))
 
 # Импорты из нашего пакета
 from grafic_tools.professional_drawing import ProfessionalDrawingTab
-
-from scipy import signal
+from grafic_tools import font_cache
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTreeView, QFileSystemModel, QVBoxLayout, QWidget, QPushButton, \
     QFileDialog, QMenu, QMessageBox, QDialog, QLabel, QLineEdit ,QListWidget,QListWidgetItem, QHBoxLayout, QTabWidget,
                              QTextEdit,QFrame, QComboBox,  QAction, QInputDialog,QToolBar,QWidgetAction,QShortcut,QGridLayout,
                              QProgressBar, QSpinBox, QCheckBox,QDoubleSpinBox)
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QBrush,QPixmap, QPainter, QPen, QFontMetrics, QFont, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QBrush,QPixmap, QPainter, QPen, QFont, QKeySequence
 
 # Пути к FFmpeg
 FFMPEG_PATH = r"C:\ProgramData\chocolatey\bin\ffmpeg.exe"
 FFPROBE_PATH = r"C:\ProgramData\chocolatey\bin\ffprobe.exe"
 
-# Подавляем warnings от pydub
-warnings.filterwarnings("ignore", category=RuntimeWarning, module="pydub")
-
-# Настраиваем pydub для использования правильного пути
-os.environ['PATH'] = r"C:\ProgramData\chocolatey\bin" + os.pathsep + os.environ['PATH']
-
-# Явно устанавливаем пути для pydub
-import pydub
-pydub.AudioSegment.converter = FFMPEG_PATH
-pydub.AudioSegment.ffprobe = FFPROBE_PATH
+# Тяжелые аудио модули (numpy, scipy.signal, pydub) загружаются при первом
+# использовании вкладки "Запись аккордов" - см. load_audio_stack()
+np = None
+signal = None
+AudioSegment = None
 
-# Переопределяем функцию which для pydub
-import pydub.utils
-original_which = pydub.utils.which
 
 def custom_which(program):
     if program == "ffmpeg":
@@ -53,7 +42,69 @@ def custom_which(program):
     else:
         return original_which(program)
 
-pydub.utils.which = custom_which
+
+def load_audio_stack():
+    """Отложенная загрузка numpy, scipy.signal и pydub (один раз за процесс)"""
+    global np, signal, AudioSegment, original_which
+    if AudioSegment is not None:
+        return
+
+    start = time.perf_counter()
+
+    # Подавляем warnings от pydub
+    warnings.filterwarnings("ignore", category=RuntimeWarning, module="pydub")
+
+    # Настраиваем pydub для использования правильного пути
+    os.environ['PATH'] = r"C:\ProgramData\chocolatey\bin" + os.pathsep + os.environ['PATH']
+
+    import numpy
+    from scipy import signal as scipy_signal
+
+    # Явно устанавливаем пути для pydub
+    import pydub
+    import pydub.utils
+    pydub.AudioSegment.converter = FFMPEG_PATH
+    pydub.AudioSegment.ffprobe = FFPROBE_PATH
+
+    # Переопределяем функцию which для pydub
+    original_which = pydub.utils.which
+    pydub.utils.which = custom_which
+
+    np = numpy
+    signal = scipy_signal
+    AudioSegment = pydub.AudioSegment
+    print(f"⏱ Аудио модули загружены за {(time.perf_counter() - start) * 1000:.0f} мс")
+
+
+def print_import_report(limit=25):
+    """Отчет о времени импорта при старте (аналог python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    )
+
+    # Строки вида "import time:  self [us] | cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((int(cumulative_us), int(self_us), depth, name.strip()))
+
+    top_level = [module for module in modules if module[2] == 0]
+    total_us = sum(module[0] for module in top_level)
+
+    print(f"Время импорта при старте: {total_us / 1000:.1f} мс")
+    print(f"{'накопительно, мс':>18} {'собственное, мс':>16}  модуль")
+    for cumulative_us, self_us, depth, name in sorted(modules, reverse=True)[:limit]:
+        print(f"{cumulative_us / 1000:>18.1f} {self_us / 1000:>16.1f}  {'  ' * depth}{name}")
+
+    for name in ("numpy", "scipy", "pydub", "pandas", "openpyxl"):
+        loaded = any(module[3] == name for module in modules)
+        print(f"{name}: {'загружается при старте' if loaded else 'отложен'}")
+
 
 # Создаем папку templates2 если её нет
 TEMPLATES2_DIR = "templates2"
@@ -85,17 +136,54 @@ class MainApp(QWidget):
         self.tabs = QTabWidget()
         self.layout.addWidget(self.tabs)
 
-        # Создаём вкладки
-        self.chord_redactor = ImageEditor()  # Закомментировано, если нет этого класса
-        self.chord_recorder = ChordRecorderTab()  # Закомментировано, если нет этого класса
-        self.pro_drawing = ProfessionalDrawingTab()  # Основная вкладка профессионального рисования
-        self.chord_config = ChordConfigTab()
+        # Вкладки создаются при первом открытии, до этого на их месте заглушки
+        self.chord_redactor = None
+        self.chord_recorder = None
+        self.pro_drawing = None
+        self.chord_config = None
+
+        self.tab_factories = [
+            ("chord_redactor", "Базовое рисование", ImageEditor),
+            ("chord_recorder", "Запись аккордов", ChordRecorderTab),
+            ("pro_drawing", "Профессиональное рисование", ProfessionalDrawingTab),
+            ("chord_config", "Конфигурация аккордов", ChordConfigTab),
+        ]
+
+        for _, title, _ in self.tab_factories:
+            placeholder = QLabel("Загрузка...")
+            placeholder.setAlignment(Qt.AlignCenter)
+            self.tabs.addTab(placeholder, title)
+
+        self.tabs.currentChanged.connect(self.ensure_tab)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Текущую вкладку создаем после того, как окно показано
+        QTimer.singleShot(0, lambda: self.ensure_tab(self.tabs.currentIndex()))
+
+    def ensure_tab(self, index):
+        """Создание вкладки при первой активации (заменяет заглушку)"""
+        if index < 0 or index >= len(self.tab_factories):
+            return
+
+        attribute, title, factory = self.tab_factories[index]
+        if getattr(self, attribute) is not None:
+            return
 
+        start = time.perf_counter()
+        widget = factory()
+        setattr(self, attribute, widget)
 
-        self.tabs.addTab(self.chord_redactor, "Базовое рисование")
-        self.tabs.addTab(self.chord_recorder, "Запись аккордов")
-        self.tabs.addTab(self.pro_drawing, "Профессиональное рисование")
-        self.tabs.addTab(self.chord_config, "Конфигурация аккордов")
+        # Подменяем заглушку без повторных сигналов currentChanged
+        self.tabs.blockSignals(True)
+        placeholder = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, widget, title)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+
+        print(f"⏱ Вкладка '{title}' создана за {(time.perf_counter() - start) * 1000:.0f} мс")
 
 
 # модуль 1 (Рисование аккордов)
@@ -631,13 +719,11 @@ class ImageEditor(QMainWindow):
                 if circle['symbol']:
                     # Устанавливаем размер шрифта в зависимости от радиуса
                     font_size = circle['radius_outer'] // 1  # Например, размер шрифта равен половине радиуса
-                    font = QFont("Arial", font_size, QFont.Bold)  # Устанавливаем шрифт, размер и стиль (жирный)
-                    painter.setFont(font)
+                    key = font_cache.font_key("Arial", font_size, QFont.Bold)  # Шрифт, размер и стиль (жирный)
+                    painter.setFont(font_cache.get_font(key))
 
                     # Получаем размеры текста
-                    font_metrics = QFontMetrics(painter.font())
-                    text_width = font_metrics.width(circle['symbol'])
-                    text_height = font_metrics.height()
+                    text_width, text_height = font_cache.text_size(key, circle['symbol'])
 
                     # Вычисляем координаты для центрирования текста
                     text_x = circle['x'] - text_width // 2
@@ -683,13 +769,11 @@ class ImageEditor(QMainWindow):
                 corner_radius = symbol.get('corner_radius', 5)
 
                 # Настраиваем шрифт
-                font = QFont(font_family, size, QFont.Bold if bold else QFont.Normal)
-                painter.setFont(font)
+                key = font_cache.font_key(font_family, size, QFont.Bold if bold else QFont.Normal)
+                painter.setFont(font_cache.get_font(key))
 
                 # Получаем размеры текста
-                font_metrics = QFontMetrics(painter.font())
-                text_width = font_metrics.width(text)
-                text_height = font_metrics.height()
+                text_width, text_height = font_cache.text_size(key, text)
 
                 # Отступы вокруг текста
                 padding = size // 3
@@ -1250,13 +1334,11 @@ class ImageEditor(QMainWindow):
                 if circle['symbol']:
                     # Устанавливаем размер шрифта в зависимости от радиуса
                     font_size = circle['radius_outer'] // 1  # Например, размер шрифта равен половине радиуса
-                    font = QFont("Arial", font_size, QFont.Bold)  # Устанавливаем шрифт, размер и стиль (жирный)
-                    painter.setFont(font)
+                    key = font_cache.font_key("Arial", font_size, QFont.Bold)  # Шрифт, размер и стиль (жирный)
+                    painter.setFont(font_cache.get_font(key))
 
                     # Получаем размеры текста
-                    font_metrics = QFontMetrics(painter.font())
-                    text_width = font_metrics.width(circle['symbol'])
-                    text_height = font_metrics.height()
+                    text_width, text_height = font_cache.text_size(key, circle['symbol'])
 
                     # Вычисляем координаты для центрирования текста
                     text_x = circle['x'] - text_width // 2
@@ -1301,12 +1383,10 @@ class ImageEditor(QMainWindow):
                 background_color = symbol.get('background_color', (50, 50, 50, 180))
                 corner_radius = symbol.get('corner_radius', 5)
 
-                font = QFont(font_family, size, QFont.Bold if bold else QFont.Normal)
-                painter.setFont(font)
+                key = font_cache.font_key(font_family, size, QFont.Bold if bold else QFont.Normal)
+                painter.setFont(font_cache.get_font(key))
 
-                font_metrics = QFontMetrics(painter.font())
-                text_width = font_metrics.width(text)
-                text_height = font_metrics.height()
+                text_width, text_height = font_cache.text_size(key, text)
 
                 padding = size // 3
                 rect_width = text_width + padding * 2
@@ -1481,12 +1561,120 @@ class ImageEditor(QMainWindow):
         self.save_symbol_template_button.hide()
         self.symbol_template_combo.hide()
 
+
+class SplitCancelled(Exception):
+    """Разбивка на аккорды отменена пользователем"""
+
+
+class ChordSplitWorker(QThread):
+    """Фоновая разбивка записи на аккорды (обычный или потоковый режим).
+
+    Найденные аккорды отправляются сигналом chord_found, отмена проверяется
+    при каждом обновлении прогресса (по этапам, сегментам и блокам).
+    """
+
+    progress = pyqtSignal(int, str)  # процент, описание этапа
+    message = pyqtSignal(str)  # сообщение для лога
+    chord_found = pyqtSignal(object)  # AudioSegment звука аккорда
+    failed = pyqtSignal(str)  # описание ошибки
+
+    def __init__(self, recorder, audio_file, settings, streaming, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.audio_file = audio_file
+        self.settings = settings  # значения настроек, прочитанные в GUI потоке
+        self.streaming = streaming
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Отмена разбивки: прерывается при следующем обновлении прогресса"""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def report_progress(self, percent, stage):
+        """Отправка прогресса; при отмене прерывает разбивку"""
+        if self._cancelled:
+            raise SplitCancelled()
+        self.progress.emit(percent, stage)
+
+    def run(self):
+        try:
+            load_audio_stack()
+            if self.streaming:
+                self.split_streaming()
+            else:
+                self.split_in_memory()
+            self.report_progress(100, "Готово")
+        except SplitCancelled:
+            pass
+        except Exception as e:
+            import traceback
+            self.error = str(e)
+            self.failed.emit(f"{e}\n{traceback.format_exc()}")
+
+    def split_in_memory(self):
+        """Разбивка с загрузкой всего файла в память"""
+        self.report_progress(0, "Декодирование MP3...")
+        audio = AudioSegment.from_file(self.audio_file, format="mp3")
+
+        # Нормализуем аудио
+        self.report_progress(20, "Нормализация...")
+        audio = audio.normalize()
+
+        # Находим аккорды с фильтрацией
+        self.report_progress(25, "Поиск аккордов...")
+        chord_segments = self.recorder.find_chords_robust(
+            audio, **self.settings,
+            progress_callback=lambda fraction: self.report_progress(25 + int(fraction * 75), "Поиск аккордов..."),
+            log_callback=self.message.emit
+        )
+        for segment in chord_segments:
+            self.chord_found.emit(segment)
+
+    def split_streaming(self):
+        """Потоковая разбивка: MP3 читается блоками через ffmpeg, аккорды отправляются по мере нахождения"""
+        import chord_segmentation
+
+        info = chord_segmentation.probe_audio(self.audio_file, FFPROBE_PATH)
+        self.message.emit(f"🌊 Потоковый режим: {info.sample_rate} Гц, каналов: {info.channels}, "
+                          f"{info.duration:.1f} сек")
+
+        lowpass_cutoff = self.settings['lowpass_cutoff']
+
+        # Первый проход - пики для нормализации и порогов
+        raw_peak, filtered_peak = chord_segmentation.measure_peaks(
+            self.audio_file, info, lowpass_cutoff, FFMPEG_PATH,
+            progress_callback=lambda fraction: self.report_progress(int(fraction * 50), "Измерение громкости...")
+        )
+        gain = chord_segmentation.normalize_gain(raw_peak)
+
+        # Второй проход - поиск аккордов
+        chords = chord_segmentation.stream_chords(
+            self.audio_file, info, **self.settings,
+            ffmpeg_path=FFMPEG_PATH,
+            reference_peak=filtered_peak,
+            progress_callback=lambda fraction: self.report_progress(50 + int(fraction * 50), "Поиск аккордов...")
+        )
+        for chord in chords:
+            self.chord_found.emit(AudioSegment(
+                chord_segmentation.chord_to_pcm16(chord, gain, info.channels),
+                frame_rate=info.sample_rate,
+                sample_width=2,
+                channels=info.channels
+            ))
+
+
 class ChordRecorderTab(QWidget):
     def __init__(self):
         super().__init__()
         self.audio_file = None
         self.chords = []
+        self.split_worker = None  # Поток текущей разбивки
         self.initUI()
+        QApplication.instance().aboutToQuit.connect(self.wait_for_split)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -1560,6 +1748,11 @@ class ChordRecorderTab(QWidget):
         self.lowpass_filter.setSuffix(" Hz")
         settings_layout.addWidget(self.lowpass_filter, 2, 3)
 
+        # Потоковый режим для длинных записей
+        self.streaming_mode = QCheckBox('Потоковый режим (длинные записи)')
+        self.streaming_mode.setToolTip('Файл читается блоками через ffmpeg: память не зависит от длины записи')
+        settings_layout.addWidget(self.streaming_mode, 3, 0, 1, 4)
+
         layout.addLayout(settings_layout)
 
         # Кнопка разбивки
@@ -1568,6 +1761,12 @@ class ChordRecorderTab(QWidget):
         self.split_btn.setEnabled(False)
         layout.addWidget(self.split_btn)
 
+        # Отмена разбивки
+        self.cancel_btn = QPushButton('Отменить')
+        self.cancel_btn.clicked.connect(self.cancel_split)
+        self.cancel_btn.setVisible(False)
+        layout.addWidget(self.cancel_btn)
+
         # Прогресс бар
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -1616,12 +1815,14 @@ class ChordRecorderTab(QWidget):
             self.split_btn.setEnabled(True)
             self.log_message(f"✅ Загружен файл: {os.path.basename(file_path)}")
 
-    def apply_lowpass_filter(self, audio_segment, cutoff_freq):
+    def apply_lowpass_filter(self, audio_segment, cutoff_freq, log_callback=None):
         """Применяет низкочастотный фильтр для устранения ВЧ шума"""
         if cutoff_freq <= 0:
             return audio_segment
 
         try:
+            load_audio_stack()
+
             # Конвертируем в numpy array
             samples = np.array(audio_segment.get_array_of_samples())
             sample_rate = audio_segment.frame_rate
@@ -1649,16 +1850,26 @@ class ChordRecorderTab(QWidget):
                 channels=audio_segment.channels
             )
         except Exception as e:
-            self.log_message(f"⚠️ Ошибка фильтрации: {e}")
+            (log_callback or self.log_message)(f"⚠️ Ошибка фильтрации: {e}")
             return audio_segment
 
     def find_chords_robust(self, audio_segment, silence_thresh=-35, min_chord_duration=800,
-                           min_amplitude=10, fade_threshold=1.0, lowpass_cutoff=8000):
-        """Находит аккорды, игнорируя шумы и шипение"""
+                           min_amplitude=10, fade_threshold=1.0, lowpass_cutoff=8000,
+                           progress_callback=None, log_callback=None):
+        """Находит аккорды, игнорируя шумы и шипение.
+
+        progress_callback(доля 0..1) вызывается после этапов и перед каждым
+        сегментом (может прервать поиск исключением); log_callback - для
+        сообщений при вызове не из GUI потока.
+        """
+        load_audio_stack()
+        import chord_segmentation
+        report_progress = progress_callback or (lambda fraction: None)
 
         # Применяем фильтр для устранения ВЧ шума
         if lowpass_cutoff > 0:
-            audio_segment = self.apply_lowpass_filter(audio_segment, lowpass_cutoff)
+            audio_segment = self.apply_lowpass_filter(audio_segment, lowpass_cutoff, log_callback)
+        report_progress(0.3)
 
         # Получаем семплы
         samples = np.array(audio_segment.get_array_of_samples())
@@ -1669,18 +1880,13 @@ class ChordRecorderTab(QWidget):
             samples = samples.reshape(-1, 2)
             samples = np.mean(samples, axis=1)
 
-        # Нормализуем амплитуду
-        max_amplitude = np.max(np.abs(samples))
+        # Огибающая в процентах от пика на пониженной частоте: для порогов хватает
+        # миллисекундного разрешения, семплы нужны только для извлечения аккордов
+        envelope, decimation, max_amplitude = chord_segmentation.detection_envelope(samples, sample_rate)
         if max_amplitude == 0:
             return []
-
-        normalized = np.abs(samples) / max_amplitude * 100  # в процентах
-
-        # Сглаживаем огибающую
-        window_size = int(0.02 * sample_rate)  # 20ms window
-        if window_size < 1:
-            window_size = 1
-        envelope = np.convolve(normalized, np.ones(window_size) / window_size, mode='same')
+        detection_rate = sample_rate / decimation
+        report_progress(0.4)
 
         # Пороги в линейной шкале
         silence_thresh_linear = 10 ** (silence_thresh / 20) * 100  # в процентах
@@ -1704,48 +1910,41 @@ class ChordRecorderTab(QWidget):
         if len(sound_starts) > len(sound_ends):
             sound_ends = np.append(sound_ends, len(envelope))
 
-        chord_segments = []
-
-        for start_idx, end_idx in zip(sound_starts, sound_ends):
-            segment_length_ms = (end_idx - start_idx) * 1000 / sample_rate
+        # Длительность проверяем для всех сегментов сразу
+        segments_count = min(len(sound_starts), len(sound_ends))
+        sound_starts = sound_starts[:segments_count]
+        sound_ends = sound_ends[:segments_count]
+        long_enough = (sound_ends - sound_starts) * 1000 / detection_rate >= min_chord_duration
 
-            # Пропускаем слишком короткие сегменты
-            if segment_length_ms < min_chord_duration:
-                continue
+        fade_search = int(3 * detection_rate)
+        fade_tail = int(0.1 * sample_rate)
+        chord_segments = []
 
-            # Проверяем максимальную амплитуду в сегменте
-            segment_envelope = envelope[start_idx:end_idx]
-            max_segment_amp = np.max(segment_envelope)
+        # Остальные проверки - только для достаточно длинных сегментов, без циклов по семплам
+        for segment_index in np.flatnonzero(long_enough):
+            report_progress(0.4 + 0.6 * segment_index / segments_count)
+            start_idx = sound_starts[segment_index]
+            end_idx = sound_ends[segment_index]
 
             # Пропускаем сегменты со слишком низкой амплитудой (шумы)
-            if max_segment_amp < min_amp_linear:
+            segment_envelope = envelope[start_idx:end_idx]
+            if np.max(segment_envelope) < min_amp_linear:
                 continue
 
-            # Находим точку затухания (где амплитуда падает ниже порога)
-            fade_point = end_idx
-            for i in range(len(segment_envelope) - 1, max(0, len(segment_envelope) - int(3 * sample_rate)), -1):
-                if segment_envelope[i] > fade_thresh_linear:
-                    fade_point = start_idx + i
-                    break
-
-            # Добавляем небольшую плавность в конце
-            fade_point = min(fade_point + int(0.1 * sample_rate), len(samples))
+            # Находим точку затухания (где амплитуда падает ниже порога) в последних 3 секундах
+            fade_offset = chord_segmentation.find_fade_point(segment_envelope, fade_thresh_linear, fade_search)
+            fade_point = end_idx if fade_offset is None else start_idx + fade_offset + 1
 
-            # Извлекаем сегмент
-            chord_samples = samples[start_idx:fade_point]
+            # Переводим границы в индексы исходных семплов и добавляем плавность в конце
+            chord_start = start_idx * decimation
+            fade_point = min(fade_point * decimation + fade_tail, len(samples))
 
-            # Проверяем, что это не шум (анализ спектра)
-            if len(chord_samples) > 1024:
-                fft = np.abs(np.fft.rfft(chord_samples[:4096]))
-                freqs = np.fft.rfftfreq(4096, 1 / sample_rate)
+            # Извлекаем сегмент из полного сигнала
+            chord_samples = samples[chord_start:fade_point]
 
-                # Ищем низкочастотные компоненты (аккорды имеют низкие частоты)
-                low_freq_energy = np.sum(fft[freqs < 1000])
-                total_energy = np.sum(fft)
-
-                if total_energy > 0 and low_freq_energy / total_energy < 0.3:
-                    # Слишком много высоких частот - вероятно шум
-                    continue
+            # Проверяем, что это не шум (аккорды имеют низкие частоты)
+            if not chord_segmentation.is_chord_spectrum(chord_samples, sample_rate):
+                continue
 
             # Создаем аудиосегмент
             if audio_segment.channels == 2:
@@ -1762,81 +1961,114 @@ class ChordRecorderTab(QWidget):
 
             chord_segments.append(chord_segment)
 
+        report_progress(1.0)
         return chord_segments
 
     def split_chords(self):
-        """Разбивка аудио на аккорды с фильтрацией шумов"""
-        if not self.audio_file:
+        """Разбивка аудио на аккорды с фильтрацией шумов (в фоновом потоке)"""
+        if not self.audio_file or self.split_worker is not None:
             return
 
-        try:
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-
-            self.log_message("🎵 Начинаю поиск аккордов с фильтрацией шумов...")
-            self.log_message(f"Мин. амплитуда: {self.min_amplitude.value()}%")
-            self.log_message(f"Мин. длительность: {self.min_chord_duration.value()}мс")
-
-            # Загружаем аудио файл
-            audio = AudioSegment.from_file(self.audio_file, format="mp3")
-            self.progress_bar.setValue(20)
-
-            # Нормализуем аудио
-            audio = audio.normalize()
-            self.progress_bar.setValue(40)
-
-            # Находим аккорды с фильтрацией
-            chord_segments = self.find_chords_robust(
-                audio,
-                silence_thresh=self.silence_thresh.value(),
-                min_chord_duration=self.min_chord_duration.value(),
-                min_amplitude=self.min_amplitude.value(),
-                fade_threshold=self.fade_threshold.value(),
-                lowpass_cutoff=self.lowpass_filter.value()
-            )
-            self.progress_bar.setValue(80)
-
-            # Обрабатываем каждый аккорд
+        self.chords = []
+        self.save_btn.setEnabled(False)
+        self.info_label.setText('')
+
+        self.log_message("🎵 Начинаю поиск аккордов с фильтрацией шумов...")
+        self.log_message(f"Мин. амплитуда: {self.min_amplitude.value()}%")
+        self.log_message(f"Мин. длительность: {self.min_chord_duration.value()}мс")
+
+        settings = {
+            'silence_thresh': self.silence_thresh.value(),
+            'min_chord_duration': self.min_chord_duration.value(),
+            'min_amplitude': self.min_amplitude.value(),
+            'fade_threshold': self.fade_threshold.value(),
+            'lowpass_cutoff': self.lowpass_filter.value(),
+        }
+        worker = ChordSplitWorker(self, self.audio_file, settings, self.streaming_mode.isChecked(), self)
+        worker.progress.connect(self.on_split_progress)
+        worker.message.connect(self.log_message)
+        worker.chord_found.connect(self.add_chord)
+        worker.failed.connect(self.on_split_failed)
+        worker.finished.connect(self.on_split_finished)
+        self.split_worker = worker
+
+        self.set_splitting_state(True)
+        worker.start()
+
+    def cancel_split(self):
+        """Отмена текущей разбивки"""
+        if self.split_worker is not None:
+            self.split_worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.log_message("⏹ Отмена поиска аккордов...")
+
+    def wait_for_split(self):
+        """Ожидание потока разбивки перед выходом из приложения"""
+        if self.split_worker is not None:
+            self.split_worker.cancel()
+            self.split_worker.wait()
+
+    def set_splitting_state(self, splitting):
+        """Блокировка кнопок и показ прогресса на время разбивки"""
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        self.progress_bar.setVisible(splitting)
+        self.cancel_btn.setVisible(splitting)
+        self.cancel_btn.setEnabled(splitting)
+        self.split_btn.setEnabled(not splitting)
+        self.load_btn.setEnabled(not splitting)
+
+    def on_split_progress(self, value, stage):
+        """Обновление индикатора разбивки"""
+        self.progress_bar.setValue(value)
+        self.progress_bar.setFormat(f"{stage} %p%")
+
+    def on_split_failed(self, error):
+        """Ошибка в потоке разбивки"""
+        self.log_message(f"❌ Ошибка при поиске аккордов: {error}")
+
+    def on_split_finished(self):
+        """Завершение потока разбивки (все аккорды уже получены сигналами)"""
+        worker, self.split_worker = self.split_worker, None
+        self.set_splitting_state(False)
+
+        if worker.is_cancelled():
             self.chords = []
-            leading_silence_duration = self.leading_silence.value()
-
-            for i, segment in enumerate(chord_segments):
-                # Добавляем тишину перед аккордом
-                silence = AudioSegment.silent(duration=leading_silence_duration)
-                final_chord = silence + segment
-
-                self.chords.append(final_chord)
-
-                total_duration = len(final_chord) / 1000.0
-                sound_duration = len(segment) / 1000.0
-                self.log_message(f"🎵 Аккорд {i + 1}: {total_duration:.2f} сек (звук: {sound_duration:.2f}сек)")
-
-            self.progress_bar.setValue(100)
-
-            # Выводим информацию
-            total_chords = len(self.chords)
-            self.info_label.setText(f"🎉 Найдено аккордов: {total_chords}")
-
-            if total_chords > 0:
-                durations = [len(chord) / 1000.0 for chord in self.chords]
-                self.log_message(f"✅ Найдено {total_chords} качественных аккордов")
-                self.log_message(f"📊 Длительность: от {min(durations):.2f} до {max(durations):.2f} сек")
-            else:
-                self.log_message("⚠️ Аккорды не найдены. Попробуйте:")
-                self.log_message("   - Уменьшить 'Мин. амплитуду'")
-                self.log_message("   - Уменьшить 'Мин. длительность'")
-                self.log_message("   - Увеличить 'Фильтр ВЧ шума'")
-
-            # Активируем кнопку сохранения
-            self.save_btn.setEnabled(total_chords > 0)
+            self.info_label.setText('')
+            self.log_message("⏹ Поиск аккордов отменен")
+        elif worker.error is None:
+            self.report_chords()
+        worker.deleteLater()
+
+    def add_chord(self, segment):
+        """Добавляет найденный аккорд с тишиной перед ним"""
+        silence = AudioSegment.silent(duration=self.leading_silence.value())
+        final_chord = silence + segment
+
+        self.chords.append(final_chord)
+
+        total_duration = len(final_chord) / 1000.0
+        sound_duration = len(segment) / 1000.0
+        self.log_message(f"🎵 Аккорд {len(self.chords)}: {total_duration:.2f} сек (звук: {sound_duration:.2f}сек)")
+
+    def report_chords(self):
+        """Итог поиска аккордов"""
+        # Выводим информацию
+        total_chords = len(self.chords)
+        self.info_label.setText(f"🎉 Найдено аккордов: {total_chords}")
+
+        if total_chords > 0:
+            durations = [len(chord) / 1000.0 for chord in self.chords]
+            self.log_message(f"✅ Найдено {total_chords} качественных аккордов")
+            self.log_message(f"📊 Длительность: от {min(durations):.2f} до {max(durations):.2f} сек")
+        else:
+            self.log_message("⚠️ Аккорды не найдены. Попробуйте:")
+            self.log_message("   - Уменьшить 'Мин. амплитуду'")
+            self.log_message("   - Уменьшить 'Мин. длительность'")
+            self.log_message("   - Увеличить 'Фильтр ВЧ шума'")
 
-            self.progress_bar.setVisible(False)
-
-        except Exception as e:
-            self.log_message(f"❌ Ошибка при поиске аккордов: {str(e)}")
-            import traceback
-            self.log_message(traceback.format_exc())
-            self.progress_bar.setVisible(False)
+        # Активируем кнопку сохранения
+        self.save_btn.setEnabled(total_chords > 0)
 
     def save_chords(self):
         """Сохранение аккордов в MP3 320kbps"""
@@ -1874,6 +2106,15 @@ class ChordRecorderTab(QWidget):
 
 
 if __name__ == '__main__':
+    if "--import-report" in sys.argv:
+        print_import_report()
+        sys.exit(0)
+
+    if "--verbose" in sys.argv:
+        # Подробная трассировка разбора и отрисовки аккордов (как render_chords.py -v)
+        from chord_config_manager import set_verbose_logging
+        set_verbose_logging()
+
     app = QApplication(sys.argv)
     window = MainApp()
     window.show()
@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import argparse
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Рендерим без оконной системы - должно быть задано до создания QGuiApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QGuiApplication, QImage, QImageWriter
+
+from chord_config_manager import ChordConfigManager, set_verbose_logging
+
+
+DISPLAY_TYPES = ["fingers", "notes"]
+
+# Манифест рядом с изображениями: относительный путь файла -> хэш входных данных
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Состояние процесса-воркера: приложение Qt, менеджер и изображение грифа загружаются один раз
+_worker_state = {}
+
+
+def load_manager(args, with_image=True):
+    """Создает менеджер конфигурации и загружает Excel, JSON и изображение грифа"""
+    # Трассировка разбора и отрисовки - только в подробном режиме (настраивается и в воркерах)
+    set_verbose_logging(args.verbose)
+
+    manager = ChordConfigManager()
+    if args.excel:
+        manager.excel_path = args.excel
+    if args.template:
+        manager.template_path = args.template
+    if args.image:
+        manager.image_path = args.image
+
+    loaded = manager.load_config_data()
+    if not loaded:
+        print("Ошибка: не удалось загрузить конфигурацию аккордов")
+        return None, None
+
+    if not with_image:
+        return manager, None
+
+    base_image = QImage(manager.image_path)
+    if base_image.isNull():
+        print(f"Ошибка: не удалось загрузить изображение: {manager.image_path}")
+        return None, None
+
+    return manager, base_image
+
+
+def get_output_path(output_dir, group, chord_name, display_type, scale_type, image_format):
+    """Путь к файлу изображения: <output>/<группа>/<аккорд>_<тип>_<масштаб>.<формат>"""
+    return os.path.join(output_dir, group, f"{chord_name}_{display_type}_{scale_type}.{image_format}")
+
+
+def load_manifest(output_dir):
+    """Загрузка манифеста предыдущего экспорта (пустой, если его нет или он устарел)"""
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest.get('files', {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_manifest(output_dir, files):
+    """Сохранение манифеста экспорта"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def get_run_inputs(manager):
+    """Общие для всех аккордов входные данные: хэши изображения грифа и кода отрисовки"""
+    return manager.get_base_image_hash(), manager.get_style_definitions_hash()
+
+
+def render_chord(manager, base_image, group, chord_info, args, manifest, run_inputs):
+    """Рендерит один аккорд во всех выбранных типах и масштабах.
+
+    Файлы, входные данные которых не изменились с прошлого экспорта, пропускаются.
+    Возвращает (сохранено, пропущено, записи манифеста).
+    """
+    saved = 0
+    skipped = 0
+    entries = {}
+    for display_type in args.display_types:
+        plan = manager.get_render_plan(
+            chord_info['data'], display_type, args.fret_type, args.barre_outline, args.note_outline
+        )
+
+        for scale_type in args.scales:
+            file_path = get_output_path(
+                args.output, group, chord_info['name'], display_type, scale_type, args.format
+            )
+            relative_path = os.path.relpath(file_path, args.output).replace(os.sep, '/')
+            content_hash = manager.get_chord_content_hash(
+                plan, *run_inputs, scale_type, args.format, args.quality
+            )
+
+            if not args.force and manifest.get(relative_path) == content_hash and os.path.exists(file_path):
+                entries[relative_path] = content_hash
+                skipped += 1
+                continue
+
+            image = manager.render_chord_image(base_image, plan, scale_type)
+
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if image.save(file_path, args.format.upper(), args.quality):
+                entries[relative_path] = content_hash
+                saved += 1
+            else:
+                print(f"  Ошибка сохранения: {file_path}")
+    return saved, skipped, entries
+
+
+def collect_chords(manager, args):
+    """Список (группа, аккорд) для рендеринга в детерминированном порядке"""
+    groups = manager.get_chord_groups()
+    if args.groups:
+        groups = [group for group in groups if group in args.groups]
+
+    chords = []
+    for group in groups:
+        for chord_info in manager.get_chords_by_group(group):
+            chords.append((group, chord_info))
+    return chords
+
+
+def render_catalogue(manager, base_image, args, manifest):
+    """Рендерит все аккорды (или выбранные группы) и печатает время по каждому аккорду"""
+    run_inputs = get_run_inputs(manager)
+    total_files = 0
+    total_skipped = 0
+    timings = []
+    entries = {}
+    start_time = time.perf_counter()
+
+    for group, chord_info in collect_chords(manager, args):
+        chord_start = time.perf_counter()
+        saved, skipped, chord_entries = render_chord(
+            manager, base_image, group, chord_info, args, manifest, run_inputs
+        )
+        elapsed = time.perf_counter() - chord_start
+
+        total_files += saved
+        total_skipped += skipped
+        entries.update(chord_entries)
+        timings.append((chord_info['name'], elapsed))
+        print(f"  {group}/{chord_info['name']}: {saved} файлов, {skipped} без изменений, {elapsed * 1000:.1f} мс")
+
+    total_time = time.perf_counter() - start_time
+    return total_files, total_skipped, timings, total_time, entries
+
+
+def init_worker(args, manifest):
+    """Инициализация процесса-воркера: Qt, конфигурация и изображение грифа загружаются один раз"""
+    _worker_state['app'] = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    manager, base_image = load_manager(args)
+    _worker_state['manager'] = manager
+    _worker_state['base_image'] = base_image
+    _worker_state['args'] = args
+    _worker_state['manifest'] = manifest
+    _worker_state['run_inputs'] = get_run_inputs(manager) if manager else None
+
+
+def render_shard(shard):
+    """Рендерит часть каталога в процессе-воркере; shard - список (группа, имя аккорда)"""
+    manager = _worker_state['manager']
+    base_image = _worker_state['base_image']
+    args = _worker_state['args']
+    if manager is None:
+        raise RuntimeError("Воркер не смог загрузить конфигурацию")
+
+    chords_by_name = {}
+    for group in sorted({group for group, _ in shard}):
+        for chord_info in manager.get_chords_by_group(group):
+            chords_by_name[(group, chord_info['name'])] = chord_info
+
+    total_files = 0
+    total_skipped = 0
+    timings = []
+    entries = {}
+    start_time = time.perf_counter()
+
+    for group, chord_name in shard:
+        chord_start = time.perf_counter()
+        saved, skipped, chord_entries = render_chord(
+            manager, base_image, group, chords_by_name[(group, chord_name)], args,
+            _worker_state['manifest'], _worker_state['run_inputs']
+        )
+        total_files += saved
+        total_skipped += skipped
+        entries.update(chord_entries)
+        timings.append((f"{group}/{chord_name}", saved, skipped, time.perf_counter() - chord_start))
+
+    return {
+        'worker': os.getpid(),
+        'files': total_files,
+        'skipped': total_skipped,
+        'timings': timings,
+        'entries': entries,
+        'time': time.perf_counter() - start_time
+    }
+
+
+def render_catalogue_parallel(manager, args, manifest):
+    """Рендерит каталог в пуле процессов: аккорды распределяются по воркерам по кругу"""
+    chords = [(group, chord_info['name']) for group, chord_info in collect_chords(manager, args)]
+    jobs = max(1, min(args.jobs, len(chords)))
+    shards = [chords[i::jobs] for i in range(jobs)]
+
+    total_files = 0
+    total_skipped = 0
+    timings = []
+    entries = {}
+    worker_stats = []
+    start_time = time.perf_counter()
+
+    # spawn: дочерние процессы не должны наследовать состояние Qt родителя
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                             initializer=init_worker, initargs=(args, manifest)) as executor:
+        futures = [executor.submit(render_shard, shard) for shard in shards if shard]
+        for future in as_completed(futures):
+            result = future.result()
+            for chord_name, saved, skipped, elapsed in result['timings']:
+                print(f"  [{result['worker']}] {chord_name}: {saved} файлов, {skipped} без изменений, "
+                      f"{elapsed * 1000:.1f} мс")
+                timings.append((chord_name, elapsed))
+            total_files += result['files']
+            total_skipped += result['skipped']
+            entries.update(result['entries'])
+            worker_stats.append(result)
+
+    total_time = time.perf_counter() - start_time
+    return total_files, total_skipped, timings, total_time, entries, worker_stats
+
+
+def print_summary(total_files, total_skipped, timings, total_time):
+    """Итоговая статистика рендеринга"""
+    print(f"\n{'=' * 50}")
+    print(f"Аккордов: {len(timings)}, файлов: {total_files}, без изменений: {total_skipped}, "
+          f"время: {total_time:.2f} сек")
+    if timings:
+        slowest_name, slowest_time = max(timings, key=lambda item: item[1])
+        average = sum(elapsed for _, elapsed in timings) / len(timings)
+        print(f"Среднее время на аккорд: {average * 1000:.1f} мс")
+        print(f"Самый медленный: {slowest_name} ({slowest_time * 1000:.1f} мс)")
+
+
+def print_worker_summary(worker_stats):
+    """Пропускная способность каждого воркера"""
+    print("\nПо воркерам:")
+    for stats in sorted(worker_stats, key=lambda item: item['worker']):
+        chords_count = len(stats['timings'])
+        rate = chords_count / stats['time'] if stats['time'] > 0 else 0.0
+        print(f"  PID {stats['worker']}: {chords_count} аккордов, {stats['files']} файлов, "
+              f"{stats['time']:.2f} сек ({rate:.2f} аккордов/сек)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Пакетный рендеринг изображений всех аккордов без графического интерфейса'
+    )
+    parser.add_argument('-o', '--output', default='chord_images', help='Папка для изображений')
+    parser.add_argument('--excel', help='Путь к chord_config.xlsx (по умолчанию templates2)')
+    parser.add_argument('--template', help='Путь к template.json (по умолчанию templates2)')
+    parser.add_argument('--image', help='Путь к изображению грифа (по умолчанию templates2/img.png)')
+    parser.add_argument('-s', '--scales', nargs='+', default=['original'],
+                        choices=ChordConfigManager.SCALE_TYPES, help='Масштабы изображений')
+    parser.add_argument('-d', '--display-types', nargs='+', default=DISPLAY_TYPES,
+                        choices=DISPLAY_TYPES, help='Типы отображения')
+    parser.add_argument('-g', '--groups', nargs='+', help='Рендерить только указанные группы аккордов')
+    parser.add_argument('-f', '--format', default='png', choices=['png', 'webp'], help='Формат файлов')
+    parser.add_argument('-q', '--quality', type=int, default=-1,
+                        help='Качество сжатия 0-100 (-1 - по умолчанию для формата)')
+    parser.add_argument('--fret-type', default='roman', choices=['roman', 'numeric'], help='Тип ладов')
+    parser.add_argument('--barre-outline', default='none', choices=list(ChordConfigManager.OUTLINE_WIDTHS),
+                        help='Обводка барре')
+    parser.add_argument('--note-outline', default='none', choices=list(ChordConfigManager.OUTLINE_WIDTHS),
+                        help='Обводка нот')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Количество процессов для параллельного рендеринга (0 - по числу ядер)')
+    parser.add_argument('--force', action='store_true',
+                        help='Перерисовать все аккорды, игнорируя манифест предыдущего экспорта')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Подробный отладочный вывод отрисовки')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+
+    supported_formats = [bytes(fmt).decode().lower() for fmt in QImageWriter.supportedImageFormats()]
+    if args.format not in supported_formats:
+        print(f"Ошибка: формат '{args.format}' не поддерживается установленным Qt")
+        return 1
+
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+
+    # В параллельном режиме изображение грифа загружает каждый воркер сам
+    manager, base_image = load_manager(args, with_image=args.jobs == 1)
+    if manager is None:
+        return 1
+
+    print(f"Рендеринг аккордов в: {os.path.abspath(args.output)}")
+    print(f"Типы: {', '.join(args.display_types)}; масштабы: {', '.join(args.scales)}; формат: {args.format}")
+    print(f"Процессов: {args.jobs}\n")
+
+    # С --force файлы перерисовываются без сравнения хэшей (render_chord), но записи
+    # манифеста остальных групп нужны и при частичном экспорте
+    manifest = load_manifest(args.output)
+
+    if args.jobs == 1:
+        total_files, total_skipped, timings, total_time, entries = render_catalogue(
+            manager, base_image, args, manifest
+        )
+        print_summary(total_files, total_skipped, timings, total_time)
+    else:
+        total_files, total_skipped, timings, total_time, entries, worker_stats = render_catalogue_parallel(
+            manager, args, manifest
+        )
+        print_summary(total_files, total_skipped, timings, total_time)
+        print_worker_summary(worker_stats)
+
+    if args.groups:
+        # Частичный экспорт: записи других групп сохраняем, если их файлы еще есть
+        manifest = {
+            relative_path: content_hash for relative_path, content_hash in manifest.items()
+            if os.path.exists(os.path.join(args.output, relative_path))
+        }
+        manifest.update(entries)
+    else:
+        # Полный экспорт: удаленные и переименованные аккорды в манифест не попадают
+        manifest = entries
+    save_manifest(args.output, manifest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
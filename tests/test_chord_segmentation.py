@@ -0,0 +1,154 @@
+"""Проверки разбивки записи на аккорды (chord_segmentation и find_chords_robust).
+
+Скользящая сумма и векторный поиск точки затухания сверяются с прежними
+реализациями (свертка и цикл по семплам), а границы аккордов - с
+синтетической записью benchmark_segmentation.make_recording.
+"""
+import os
+
+import numpy as np
+import pytest
+
+import chord_segmentation
+from benchmark_segmentation import make_recording
+from chord_segmentation import FADE_SEARCH_CHUNK, StreamingChordSegmenter, find_fade_point, smooth_envelope
+
+SAMPLE_RATE = 44100
+CHORDS = 6
+
+
+def convolve_envelope(values, window):
+    """Прежняя огибающая: свертка mode='same'"""
+    return np.convolve(values, np.ones(window) / window, mode='same')
+
+
+def fade_point_loop(segment_envelope, threshold, search_length):
+    """Прежний поиск точки затухания: цикл назад по последним search_length значениям"""
+    for i in range(len(segment_envelope) - 1, max(0, len(segment_envelope) - search_length), -1):
+        if segment_envelope[i] > threshold:
+            return i
+    return None
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 4, 7, 8, 20, 21, 882])
+@pytest.mark.parametrize('length', [1, 2, 3, 19, 20, 21, 881, 882, 883, 5000])
+def test_smooth_envelope_matches_convolve(window, length):
+    values = np.random.default_rng(length * 1000 + window).uniform(0, 100, length)
+    expected = convolve_envelope(values, window)
+    result = smooth_envelope(values, window)
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_smooth_envelope_long_signal():
+    values = np.abs(np.random.default_rng(1).normal(0, 30, 500000))
+    np.testing.assert_allclose(smooth_envelope(values, 882), convolve_envelope(values, 882), rtol=1e-9, atol=1e-7)
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 100, FADE_SEARCH_CHUNK - 1, FADE_SEARCH_CHUNK,
+                                    FADE_SEARCH_CHUNK + 1, 3 * FADE_SEARCH_CHUNK + 5])
+@pytest.mark.parametrize('search_length', [1, 2, 50, FADE_SEARCH_CHUNK, 2 * FADE_SEARCH_CHUNK + 3, 100000])
+@pytest.mark.parametrize('density', [0.0, 0.0005, 0.05, 1.0])
+def test_find_fade_point_matches_loop(length, search_length, density):
+    rng = np.random.default_rng(length + search_length)
+    envelope = rng.uniform(0, 1, length)
+    envelope[rng.uniform(0, 1, length) < density] = 2.0
+    assert find_fade_point(envelope, 1.5, search_length) == fade_point_loop(envelope, 1.5, search_length)
+
+
+def test_find_fade_point_skips_first_searched_value():
+    # Как и прежний цикл, значение с индексом len - search_length не просматривается
+    envelope = np.zeros(10)
+    envelope[4] = 5.0
+    assert find_fade_point(envelope, 1.0, 6) is None
+    assert find_fade_point(envelope, 1.0, 7) == 4
+
+
+@pytest.fixture(scope='module')
+def recording():
+    return make_recording(CHORDS, SAMPLE_RATE)
+
+
+@pytest.fixture(scope='module')
+def main_module():
+    """Модуль main; при импорте он создает templates2 в текущей папке, поэтому - из корня репозитория"""
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        main = pytest.importorskip('main')
+    finally:
+        os.chdir(cwd)
+    main.load_audio_stack()
+    return main
+
+
+def stream_boundaries(samples, block_size):
+    """Границы аккордов StreamingChordSegmenter при подаче записи блоками block_size"""
+    segmenter = StreamingChordSegmenter(SAMPLE_RATE, float(np.max(np.abs(samples.astype(np.float64)))))
+    chords = []
+    for offset in range(0, len(samples), block_size):
+        chords.extend(segmenter.feed(samples[offset:offset + block_size]))
+    chords.extend(segmenter.finish())
+    return [(int(chord.start), int(chord.end)) for chord in chords]
+
+
+def robust_boundaries(main, samples):
+    """Границы аккордов ChordRecorderTab.find_chords_robust (без фильтра ВЧ шума).
+
+    Метод возвращает только звук аккордов: начало находим по совпадению
+    семплов с записью.
+    """
+    audio = main.AudioSegment(samples.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+    chords = main.ChordRecorderTab.find_chords_robust(None, audio, lowpass_cutoff=0)
+
+    boundaries = []
+    search_from = 0
+    for chord in chords:
+        chord_samples = np.array(chord.get_array_of_samples(), dtype=np.int16)
+        head = np.lib.stride_tricks.sliding_window_view(samples[search_from:], 64)
+        matches = np.flatnonzero((head == chord_samples[:64]).all(axis=1))
+        start = next(search_from + int(match) for match in matches
+                     if np.array_equal(samples[search_from + match:search_from + match + len(chord_samples)],
+                                       chord_samples))
+        boundaries.append((start, start + len(chord_samples)))
+        search_from = start + 1
+    return boundaries
+
+
+def check_boundaries(boundaries, spans):
+    """Аккорд начинается не раньше чем за 20 мс до звука и заканчивается до следующего аккорда"""
+    assert len(boundaries) == len(spans)
+    next_starts = [start for start, _ in spans[1:]] + [None]
+    for (start, end), (span_start, _), next_start in zip(boundaries, spans, next_starts):
+        assert span_start - 0.02 * SAMPLE_RATE <= start <= span_start
+        assert end - start >= 0.8 * SAMPLE_RATE
+        if next_start is not None:
+            assert end < next_start
+
+
+def test_streaming_boundaries_match_recording(recording):
+    samples, spans = recording
+    check_boundaries(stream_boundaries(samples, SAMPLE_RATE), spans)
+
+
+@pytest.mark.parametrize('block_size', [1000, 4097, 300000])
+def test_streaming_boundaries_do_not_depend_on_block_size(recording, block_size):
+    samples, _ = recording
+    assert stream_boundaries(samples, block_size) == stream_boundaries(samples, SAMPLE_RATE)
+
+
+def test_find_chords_robust_boundaries(main_module, recording):
+    samples, spans = recording
+    check_boundaries(robust_boundaries(main_module, samples), spans)
+
+
+def test_find_chords_robust_matches_streaming(main_module, recording):
+    # Поиск на огибающей с шагом децимации расходится с потоковым не больше чем на два шага
+    samples, _ = recording
+    tolerance = 2 * (SAMPLE_RATE // chord_segmentation.DETECTION_RATE)
+    streaming = stream_boundaries(samples, SAMPLE_RATE)
+    robust = robust_boundaries(main_module, samples)
+    assert len(robust) == len(streaming)
+    for (robust_start, robust_end), (stream_start, stream_end) in zip(robust, streaming):
+        assert abs(robust_start - stream_start) <= tolerance
+        assert abs(robust_end - stream_end) <= tolerance